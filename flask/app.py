@@ -1,27 +1,74 @@
 import os
+import threading
 from flask import Flask
 from flask_cors import CORS
 
 from endpoints.add_newsletter_user_graph import add_newsletter_user_graph_route
 from endpoints.create_newsletter import create_newsletter_route
 from endpoints.build_newsletter import build_newsletter_route
+from endpoints.build_newsletters import build_newsletters_route
 from endpoints.newsletter_build_check import newsletter_build_check_route
 from endpoints.create_dormant_newsletter import create_dormant_newsletter_route
 from endpoints.follow_user import follow_user_route
 from endpoints.add_older_posts import add_older_posts_route
 from endpoints.activate_dormant_newsletter import activate_dormant_newsletter_route
 from endpoints.update_list import update_list_route
+from endpoints.reconcile_list_mirrors import reconcile_list_mirrors_route
 from endpoints.update_all_lists import update_all_lists_route
 from endpoints.announce_newsletter import announce_newsletter_route
 from endpoints.check_new_newsletters import check_new_newsletters_route
+from utils.http_client import get_http_client
+from utils.blob_cache import blob_cache
+from utils.handle_resolver import handle_resolver
+from utils.firebase import get_firebase_client
+from utils.utils import is_localhost
+from utils.local_task_queue import local_task_queue
+from utils.write_budget import get_write_budget
+from utils.feed_reader import feed_reader
+from utils.http_cache import get_http_cache
+from utils.leaderboard_cache import leaderboard_snapshots, newsletter_username_snapshots
+from utils.list_mirror import get_list_mirror
 
 app = Flask(__name__)
 CORS(app)
+# Tasks created with TASK_BACKEND=local are dispatched to this app in-process
+local_task_queue.init_app(app)
+
+def warmup_firebase():
+    try:
+        get_firebase_client().warmup()
+    except Exception as e:
+        print(f"Firestore warmup failed: {e}")
+
+# Open the Firestore channel at container start instead of during the first request.
+if os.environ.get('FIREBASE_WARMUP_ON_START', 'false' if is_localhost() else 'true') == 'true':
+    threading.Thread(target=warmup_firebase, daemon=True).start()
 
 @app.route('/')
 def hello_world():
     return 'Hello, World! This is a Flask app running on Cloud Run!'
 
+@app.route('/warmup', methods=['GET'])
+def warmup():
+    # Can be used as the Cloud Run startup probe
+    get_firebase_client().warmup()
+    return {"status": "ok"}, 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return {
+        "http": get_http_client().get_stats(),
+        "blob_cache": blob_cache.get_stats(),
+        "handle_resolver": handle_resolver.get_stats(),
+        "local_tasks": local_task_queue.get_stats(),
+        "write_budget": get_write_budget().get_stats(),
+        "feed_reader": feed_reader.get_stats(),
+        "http_cache": get_http_cache().get_stats(),
+        "leaderboards": leaderboard_snapshots.get_stats(),
+        "newsletter_usernames": newsletter_username_snapshots.get_stats(),
+        "list_mirror": get_list_mirror().get_stats()
+    }, 200
+
 @app.route('/addNewsletterUserGraph', methods=['POST'])
 def add_newsletter_user_graph_route_wrapper():
     return add_newsletter_user_graph_route()
@@ -34,6 +81,10 @@ def create_newsletter_route_wrapper():
 def build_newsletter_route_wrapper():
     return build_newsletter_route()
 
+@app.route('/buildNewsletters', methods=['POST'])
+def build_newsletters_route_wrapper():
+    return build_newsletters_route()
+
 @app.route('/newsletterBuildCheck', methods=['POST'])
 def newsletter_build_check_route_wrapper():
     return newsletter_build_check_route()
@@ -58,6 +109,10 @@ def activate_dormant_newsletter_route_wrapper():
 def update_list_route_wrapper():
     return update_list_route()
 
+@app.route('/reconcileListMirrors', methods=['POST'])
+def reconcile_list_mirrors_route_wrapper():
+    return reconcile_list_mirrors_route()
+
 @app.route('/updateAllLists', methods=['POST'])
 def update_all_lists_route_wrapper():
     return update_all_lists_route()
@@ -4,7 +4,7 @@ import os
 import time
 from utils.newsletter import Newsletter
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.create_cloud_task import create_cloud_task
 from endpoints.add_newsletter_user_graph import create_dormant_newsletters_for_newsletter
 
@@ -15,7 +15,7 @@ def activate_dormant_newsletter_route():
         "subdomain": "string"
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         data = request.get_json()
         
@@ -30,6 +30,8 @@ def activate_dormant_newsletter_route():
             return {"error": "Missing required parameters: subdomain"}, 400
         
         firebase.setDormantNewsletterActive(subdomain)
+        # Build it on the next build check rather than waiting for its predicted next post
+        firebase.setSkipPostFrequencyCheck(subdomain)
 
         rec_newsletter_subdomains = firebase.getRecommendedNewsletterSubdomains(subdomain)
         oldest_added_post = firebase.getOldestPostDate(subdomain)
@@ -39,7 +41,8 @@ def activate_dormant_newsletter_route():
         add_older_posts_payload = {
             "oldestDatePostAdded": oldest_added_post,
             "subdomain": subdomain,
-            "numberOfIterations": 10
+            "numberOfIterations": 10,
+            "archiveCursor": firebase.getArchiveCursor(subdomain)
         }
 
         old_posts_response = create_cloud_task(
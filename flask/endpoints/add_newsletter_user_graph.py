@@ -4,9 +4,9 @@ import time
 from flask import request
 from utils.newsletter import Newsletter
 from utils.user import User
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.endpoints import SUBSTACK_NEWSLETTER_URL
-from utils.create_cloud_task import create_cloud_task
+from utils.create_cloud_task import create_cloud_tasks
 
 def add_newsletter_user_graph_route():
     """
@@ -17,7 +17,7 @@ def add_newsletter_user_graph_route():
         "publication_id": "string"
     }
     """
-    firebase_client = FirebaseClient()
+    firebase_client = get_firebase_client()
     try:
         data = request.get_json()
         
@@ -90,34 +90,45 @@ def create_dormant_newsletters_for_newsletter(subdomain, recommended_newsletters
     create_dormant_newsletter_endpoint = cloud_run_endpoint.rstrip('/') + '/createDormantNewsletter'
     follow_user_endpoint = cloud_run_endpoint.rstrip('/') + '/followUser'
 
-    task_responses = []
+    create_dormant_newsletter_tasks = []
+    follow_user_tasks = []
     for index, newsletter_subdomain in enumerate(recommended_newsletters_subdomains, start=1):
         recommended_newsletter_url = SUBSTACK_NEWSLETTER_URL.format(subdomain=newsletter_subdomain)
         create_dormant_newsletter_task_payload = {
             "url": recommended_newsletter_url,
             "parent_newsletter_subdomain": subdomain
         }
-
-        create_dormant_newsletter_task_response = create_cloud_task(
+        create_dormant_newsletter_tasks.append((
             create_dormant_newsletter_endpoint,
             create_dormant_newsletter_task_payload,
-            os.environ.get('CLOUD_TASKS_REC_NEWSLETTER_PROCESSING_QUEUE', 'default'),
-            f"create_dormant_newsletter_{newsletter_subdomain}_{subdomain}_{int(time.time())}",
-            delay_seconds=index * 30
-        )
+            index * 30,
+            f"create_dormant_newsletter_{newsletter_subdomain}_{subdomain}_{int(time.time())}"
+        ))
 
         follow_user_task_payload = {
             "user": subdomain,
             "to_follow_subdomain": newsletter_subdomain
         }
-        follow_user_task_response = create_cloud_task(
+        follow_user_tasks.append((
             follow_user_endpoint,
             follow_user_task_payload,
-            os.environ.get('CLOUD_TASKS_OLD_POSTS_IMPORT_QUEUE', 'default'),
-            f"follow_user_{subdomain}_follows_{newsletter_subdomain}_{int(time.time())}",
-            delay_seconds=index * 1800
-        )
+            index * 1800,
+            f"follow_user_{subdomain}_follows_{newsletter_subdomain}_{int(time.time())}"
+        ))
 
+    create_dormant_newsletter_task_responses = create_cloud_tasks(
+        create_dormant_newsletter_tasks,
+        os.environ.get('CLOUD_TASKS_REC_NEWSLETTER_PROCESSING_QUEUE', 'default')
+    )
+    follow_user_task_responses = create_cloud_tasks(
+        follow_user_tasks,
+        os.environ.get('CLOUD_TASKS_OLD_POSTS_IMPORT_QUEUE', 'default')
+    )
+
+    task_responses = []
+    for index, newsletter_subdomain in enumerate(recommended_newsletters_subdomains, start=1):
+        create_dormant_newsletter_task_response = create_dormant_newsletter_task_responses[index - 1]
+        follow_user_task_response = follow_user_task_responses[index - 1]
         task_responses.append({
             "subdomain": newsletter_subdomain,
             "index": index,
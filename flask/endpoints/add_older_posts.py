@@ -5,9 +5,15 @@ from flask import request
 
 from utils.newsletter import Newsletter
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
-from utils.endpoints import SUBSTACK_NEWSLETTER_URL
+from utils.firebase import get_firebase_client
+from utils.endpoints import SUBSTACK_NEWSLETTER_URL, PDS_USERNAME_EXTENSION
 from utils.create_cloud_task import create_cloud_task
+from utils.write_budget import get_write_budget, WRITE_POINTS
+
+# Most older posts imported per /addOlderPosts step, and the shortest wait between steps (the write
+# budget sets the actual pace)
+OLDER_POSTS_PER_STEP = int(os.environ.get('OLDER_POSTS_PER_STEP', 10))
+OLDER_POSTS_MIN_DELAY_SECONDS = int(os.environ.get('OLDER_POSTS_MIN_DELAY_SECONDS', 5))
 
 def add_older_posts_route():
     """
@@ -15,12 +21,17 @@ def add_older_posts_route():
     Expects JSON payload: {
         "oldestDatePostAdded": "string",  (ISO with Z)
         "subdomain": "string",
-        "numberOfIterations": "number"  (must be > 0 to execute)
+        "numberOfIterations": "number",  (must be > 0 to execute)
+        "archiveCursor": {"offset": "number", "postId": "number"}  (optional, where the previous step stopped in the archive)
     }
-    Due to Bluesky rate limits, we import only 10 old posts per hour. We recursively call the /addOlderPosts API in 
-    scheduled in the background and on each call we decrease the numberOfIterations, till either it is 0 or no more posts to add.
+    Due to Bluesky rate limits, each step imports only as many old posts (up to OLDER_POSTS_PER_STEP) as the
+    account's and the PDS's write budget allows above the share reserved for live builds (see utils/write_budget.py).
+    Budget for posts that weren't created (fewer left in the archive, or failed writes) is given back.
+    We recursively call the /addOlderPosts API in scheduled in the background, delayed until the budget is expected
+    to allow the next step, and on each call we decrease the numberOfIterations, till either it is 0 or no more posts to add.
+    A step without budget is rescheduled without importing anything or decreasing numberOfIterations.
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         data = request.get_json()
         
@@ -37,42 +48,69 @@ def add_older_posts_route():
             return {"error": "Missing required parameters: oldestDatePostAdded, subdomain, numberOfIterations"}, 400
         
         url = SUBSTACK_NEWSLETTER_URL.format(subdomain=subdomain)
+        cloud_run_endpoint = os.environ.get("CLOUD_RUN_ENDPOINT")
+        add_old_posts_endpoint = cloud_run_endpoint.rstrip('/') + '/addOlderPosts' if cloud_run_endpoint else None
 
-        # Initialize newsletter and fetch new data
-        newsletter = Newsletter(url)
-        newsletter_data = newsletter.getOlderPosts(oldestDatePostAdded)
-        
-        # Initialize AtprotoUser for creating posts
-        at_user = AtprotoUser(subdomain, url)
-        
-        # Create embedded link posts for each new post item
-        posts_added = 0
-        for post_item in newsletter_data:
-            try:
-                at_user.createEmbededLinkPost(
-                    post_item['title'],
-                    post_item['subtitle'],
-                    post_item['link'],
-                    post_item['thumbnail_url'],
-                    post_item['post_date'],
-                    post_item['labels']
+        # Take write budget for this step before fetching anything
+        write_budget = get_write_budget()
+        account = subdomain + PDS_USERNAME_EXTENSION
+        posts_allowed, next_delay_seconds = write_budget.acquire_backfill(
+            account, WRITE_POINTS["create"], OLDER_POSTS_PER_STEP
+        )
+        delay_seconds = max(next_delay_seconds, OLDER_POSTS_MIN_DELAY_SECONDS)
+
+        if posts_allowed == 0:
+            response_data = {
+                "status": "success",
+                "message": f"No write budget available. Retrying in {delay_seconds} seconds."
+            }
+            if add_old_posts_endpoint:
+                response_data["oldPostsResponse"] = create_cloud_task(
+                    add_old_posts_endpoint,
+                    data,
+                    os.environ.get('CLOUD_TASKS_OLD_POSTS_IMPORT_QUEUE', 'default'),
+                    task_name=f"add_older_posts_{subdomain}_{int(time.time())}",
+                    delay_seconds=delay_seconds
                 )
-                print(f"Created post: {post_item['title']}")
-                posts_added += 1
-            except Exception as e:
-                print(f"Skipping post {post_item.get('link', 'unknown')} due to error: {e}")
+                response_data["numberOfIterationsPending"] = numberOfIterations
+            return response_data, 200
+
+        # Resume the archive scan where the previous step stopped
+        archiveCursor = data['archiveCursor'] if 'archiveCursor' in data else firebase.getArchiveCursor(subdomain)
+
+        posts_added = 0
+        try:
+            # Initialize newsletter and fetch new data
+            newsletter = Newsletter(url)
+            newsletter_data, archiveCursor = newsletter.getOlderPostsFromCursor(
+                oldestDatePostAdded, archiveCursor, max_items=posts_allowed
+            )
+
+            # Initialize AtprotoUser for creating posts. Its writes were budgeted above.
+            at_user = AtprotoUser(subdomain, url, record_writes=False)
+
+            # Create embedded link posts for each new post item
+            post_results = at_user.createEmbededLinkPosts(newsletter_data)
+            for post_item, post_result in zip(newsletter_data, post_results):
+                if isinstance(post_result, Exception):
+                    print(f"Skipping post {post_item.link} due to error: {post_result}")
+                else:
+                    print(f"Created post: {post_item.title}")
+                    posts_added += 1
+        finally:
+            # Give back the budget of posts that weren't created
+            write_budget.release_backfill(account, (posts_allowed - posts_added) * WRITE_POINTS["create"])
         
         # Update last build details in Firebase
-        oldest_post_date = newsletter_data[-1]['post_date'] if newsletter_data else None
-        firebase.updateNumPosts(subdomain, posts_added, oldest_post_date)
+        oldest_post_date = newsletter_data[-1].post_date if newsletter_data else None
+        firebase.updateNumPosts(subdomain, posts_added, oldest_post_date, archiveCursor)
         
-        cloud_run_endpoint = os.environ.get("CLOUD_RUN_ENDPOINT")
-        if cloud_run_endpoint and numberOfIterations > 0 and len(newsletter_data) > 0:
-            add_old_posts_endpoint = cloud_run_endpoint.rstrip('/') + '/addOlderPosts'
+        if add_old_posts_endpoint and numberOfIterations > 0 and len(newsletter_data) > 0:
             add_old_posts_payload = {
                 "oldestDatePostAdded": oldest_post_date,
                 "subdomain": subdomain,
-                "numberOfIterations": numberOfIterations - 1
+                "numberOfIterations": numberOfIterations - 1,
+                "archiveCursor": archiveCursor
             }
 
             old_posts_response = create_cloud_task(
@@ -80,7 +118,7 @@ def add_older_posts_route():
                 add_old_posts_payload,
                 os.environ.get('CLOUD_TASKS_OLD_POSTS_IMPORT_QUEUE', 'default'),
                 task_name=f"add_older_posts_{subdomain}_{int(time.time())}",
-                delay_seconds=3600
+                delay_seconds=delay_seconds
             )
 
         response_data = {
@@ -5,9 +5,12 @@ from flask import request
 
 from utils.atproto_user import AtprotoUser
 from utils.endpoints import OG_CARD_ENDPOINT
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.categories import Categories
 
+# Also re-read the whole list from the PDS before announcing (O(list size) per announcement)
+ANNOUNCE_RECHECK_LIST = os.environ.get('ANNOUNCE_RECHECK_LIST', 'false').lower() == 'true'
+
 def announce_newsletter_route():
     """
     Creates an announcement post for a single newsletter provided in the request body.
@@ -19,7 +22,7 @@ def announce_newsletter_route():
         "substackUrl": "..."
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     
     try:
         # Verify Bearer token
@@ -64,11 +67,14 @@ def announce_newsletter_route():
         categories = Categories(handle=username, app_password=password)
         at_user = AtprotoUser(username, substack_url, password=password, pds_type="bsky")
 
-        # Step 1: Get existing members from the Bluesky list
-        existing_members = categories.getListMembers(all_newsletters_list)
-        existing_members_set = set(existing_members)
-
-        if newsletter_username in existing_members_set:
+        # Step 1: Check the list membership mirror, including the shared mirror entry for this newsletter:
+        # another instance may have announced it since the list was loaded here, and announcements are public.
+        # ANNOUNCE_RECHECK_LIST=true also re-reads the whole list from the PDS.
+        if categories.isListMember(all_newsletters_list, newsletter_username, fresh=True) or (
+            ANNOUNCE_RECHECK_LIST and any(
+                handle == newsletter_username for handle, _, _ in categories.getListItems(all_newsletters_list)
+            )
+        ):
             return {
                 "status": "skipped",
                 "message": f"{newsletter_username} already exists in the list"
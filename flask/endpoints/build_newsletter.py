@@ -2,8 +2,9 @@ from flask import request
 import json
 from utils.newsletter import Newsletter
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.endpoints import SUBSTACK_NEWSLETTER_URL
+from utils.build_schedule import update_posting_model
 
 def build_newsletter_route():
     """
@@ -11,11 +12,11 @@ def build_newsletter_route():
     Expects JSON payload: {
         "lastBuildDate": "string", 
         "noOfPosts": "int",
-        "postFrequency": "float",
+        "postFrequency": "float | null",
         "subdomain": "string"
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         data = request.get_json()
         
@@ -29,49 +30,11 @@ def build_newsletter_route():
         subdomain = data.get('subdomain')
         
         # Validate required parameters
-        if not all([lastBuildDate, noOfPosts is not None, postFrequency is not None, subdomain]):
-            return {"error": "Missing required parameters: lastBuildDate, noOfPosts, postFrequency, subdomain"}, 400
+        if not all([lastBuildDate, noOfPosts is not None, subdomain]):
+            return {"error": "Missing required parameters: lastBuildDate, noOfPosts, subdomain"}, 400
         
-        url = SUBSTACK_NEWSLETTER_URL.format(subdomain=subdomain)
+        posts_added = build_newsletter(subdomain, lastBuildDate, noOfPosts, postFrequency)
 
-        # Initialize newsletter and fetch new data
-        newsletter = Newsletter(url)
-        newsletter_data = newsletter.getNewsletterDataSinceLastBuild(
-            lastBuildDate=lastBuildDate,
-            numberOfPosts=noOfPosts,
-            postFrequency=postFrequency
-        )
-        
-        posts_added = 0
-
-        # Only create embedded link posts if there are new post items
-        if newsletter_data['post_items'] and len(newsletter_data['post_items']) > 0:
-            # Initialize AtprotoUser for creating posts
-            at_user = AtprotoUser(subdomain, url)
-            
-            for post_item in newsletter_data['post_items']:
-                try:
-                    at_user.createEmbededLinkPost(
-                        post_item['title'],
-                        post_item['subtitle'],
-                        post_item['link'],
-                        post_item['thumbnail_url'],
-                        post_item['post_date'],
-                        post_item['labels']
-                    )
-                    print(f"Created post: {post_item['title']}")
-                    posts_added += 1
-                except Exception as e:
-                    print(f"Skipping post {post_item.get('link', 'unknown')} due to error: {e}")
-        
-        # Update last build details in Firebase
-        firebase.updateLastBuildDetails(
-            subdomain=subdomain,
-            lastBuildDate=newsletter_data['last_build_date'],
-            numberOfPostsAdded=newsletter_data['number_of_posts'],
-            postFrequency=newsletter_data['post_frequency']
-        )
-        
         return {
             "status": "success",
             "message": f"Newsletter built successfully. {posts_added} posts added." if posts_added > 0 else "No new posts since last build. Nothing added."
@@ -80,4 +43,59 @@ def build_newsletter_route():
     except Exception as e:
         payload =  json.dumps(request.get_json())
         firebase.log_failed_task(payload, "/buildNewsletter", str(e))
-        return {"error": f"Internal server error: {str(e)}"}, 500 
\ No newline at end of file
+        return {"error": f"Internal server error: {str(e)}"}, 500
+
+def build_newsletter(subdomain, lastBuildDate, noOfPosts, postFrequency):
+    """
+    Fetches a newsletter's posts since lastBuildDate, publishes them on Bluesky and updates its
+    build details (posting model and cadence stats) in Firebase. Raises on failure.
+
+    Returns:
+        int: Number of posts added
+    """
+    firebase = get_firebase_client()
+    url = SUBSTACK_NEWSLETTER_URL.format(subdomain=subdomain)
+
+    build_state = firebase.getBuildState(subdomain)
+
+    # Initialize newsletter and fetch new data
+    newsletter = Newsletter(url)
+    newsletter_data = newsletter.getNewsletterDataSinceLastBuild(
+        lastBuildDate=lastBuildDate,
+        numberOfPosts=noOfPosts,
+        postFrequency=postFrequency,
+        cadenceStats=build_state['cadenceStats']
+    )
+    
+    posts_added = 0
+
+    # Only create embedded link posts if there are new post items
+    if newsletter_data['post_items'] and len(newsletter_data['post_items']) > 0:
+        # Initialize AtprotoUser for creating posts
+        at_user = AtprotoUser(subdomain, url)
+        
+        post_results = at_user.createEmbededLinkPosts(newsletter_data['post_items'])
+        for post_item, post_result in zip(newsletter_data['post_items'], post_results):
+            if isinstance(post_result, Exception):
+                print(f"Skipping post {post_item.link} due to error: {post_result}")
+            else:
+                print(f"Created post: {post_item.title}")
+                posts_added += 1
+    
+    # Fold the new post times into the posting model that schedules the next build
+    posting_model = update_posting_model(
+        build_state['postingModel'],
+        [post_item.post_date for post_item in newsletter_data['post_items']]
+    )
+
+    # Update last build details in Firebase
+    firebase.updateLastBuildDetails(
+        subdomain=subdomain,
+        lastBuildDate=newsletter_data['last_build_date'],
+        numberOfPostsAdded=newsletter_data['number_of_posts'],
+        postFrequency=newsletter_data['post_frequency'],
+        postingModel=posting_model,
+        cadenceStats=newsletter_data['cadence_stats']
+    )
+
+    return posts_added
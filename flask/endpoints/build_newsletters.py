@@ -0,0 +1,76 @@
+from flask import request
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from utils.firebase import get_firebase_client
+from endpoints.build_newsletter import build_newsletter
+
+# Newsletters built at the same time within one shard
+BUILD_SHARD_CONCURRENCY = int(os.environ.get('BUILD_SHARD_CONCURRENCY', 4))
+
+def build_newsletters_route():
+    """
+    Builds a shard of newsletters in one task, with bounded concurrency. The builds share this
+    process' HTTP, Firestore and atproto session pools.
+    Expects JSON payload: {
+        "newsletters": [
+            {"lastBuildDate": "string", "noOfPosts": "int", "postFrequency": "float | null", "subdomain": "string"},
+            ...
+        ]
+    }
+    A failed newsletter is logged on its own and doesn't fail the shard, so a task retry
+    doesn't rebuild the ones that succeeded.
+    """
+    firebase = get_firebase_client()
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('newsletters'), list):
+            return {"error": "Missing required parameter: newsletters"}, 400
+
+        newsletters = data['newsletters']
+        if not newsletters:
+            return {
+                "status": "success",
+                "message": "No newsletters in shard",
+                "results": []
+            }, 200
+
+        with ThreadPoolExecutor(max_workers=max(1, min(BUILD_SHARD_CONCURRENCY, len(newsletters)))) as executor:
+            results = list(executor.map(build_shard_newsletter, newsletters))
+
+        built = sum(1 for result in results if result["status"] == "success")
+        return {
+            "status": "success",
+            "message": f"Shard built. {built} of {len(newsletters)} newsletters built, {sum(result.get('posts_added', 0) for result in results)} posts added.",
+            "results": results
+        }, 200
+
+    except Exception as e:
+        payload = json.dumps(request.get_json(silent=True) or {})
+        firebase.log_failed_task(payload, "/buildNewsletters", str(e))
+        return {"error": f"Internal server error: {str(e)}"}, 500
+
+def build_shard_newsletter(newsletter):
+    """
+    Builds one newsletter of a shard and returns its outcome instead of raising.
+    """
+    subdomain = newsletter.get('subdomain') if isinstance(newsletter, dict) else None
+    try:
+        lastBuildDate = newsletter.get('lastBuildDate')
+        noOfPosts = newsletter.get('noOfPosts')
+        postFrequency = newsletter.get('postFrequency')
+        if not all([lastBuildDate, noOfPosts is not None, subdomain]):
+            return {
+                "subdomain": subdomain,
+                "status": "error",
+                "error": "Missing required parameters: lastBuildDate, noOfPosts, subdomain"
+            }
+
+        posts_added = build_newsletter(subdomain, lastBuildDate, noOfPosts, postFrequency)
+        return {"subdomain": subdomain, "status": "success", "posts_added": posts_added}
+
+    except Exception as e:
+        print(f"Failed to build newsletter {subdomain}: {e}")
+        get_firebase_client().log_failed_task(json.dumps(newsletter), "/buildNewsletters", str(e))
+        return {"subdomain": subdomain, "status": "error", "error": str(e)}
@@ -4,8 +4,8 @@ import time
 from flask import request
 
 from utils.categories import Categories
-from utils.firebase import FirebaseClient
-from utils.create_cloud_task import create_cloud_task
+from utils.firebase import get_firebase_client
+from utils.create_cloud_task import create_cloud_tasks
 
 
 def check_new_newsletters_route():
@@ -13,7 +13,7 @@ def check_new_newsletters_route():
     Identifies newsletters that are not yet in the Bluesky list and schedules
     announcement tasks over a 12-hour window, spacing tasks evenly.
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
 
     try:
         # Verify Bearer token
@@ -84,7 +84,8 @@ def check_new_newsletters_route():
         announce_endpoint = cloud_run_endpoint.rstrip('/') + '/announceNewsletter'
         queue_name = os.environ.get('CLOUD_TASKS_ANNOUNCEMENT_QUEUE', 'default')
 
-        tasks_scheduled = []
+        tasks = []
+        delays = []
 
         for index, newsletter in enumerate(remaining_newsletters):
             delay_seconds = int(index * interval_seconds)
@@ -99,17 +100,19 @@ def check_new_newsletters_route():
             if isinstance(task_username, str) and task_username.endswith('.skystack.xyz'):
                 task_username = task_username[:-len('.skystack.xyz')]
 
-            task_response = create_cloud_task(
-                announce_endpoint,
-                payload,
-                queue_name,
-                task_name=f"announce_{task_username}_{int(time.time())}",
-                delay_seconds=delay_seconds,
-                headers={
-                    "Authorization": f"Bearer {cloud_function_token}"
-                }
-            )
+            tasks.append((announce_endpoint, payload, delay_seconds, f"announce_{task_username}_{int(time.time())}"))
+            delays.append(delay_seconds)
+
+        task_responses = create_cloud_tasks(
+            tasks,
+            queue_name,
+            headers={
+                "Authorization": f"Bearer {cloud_function_token}"
+            }
+        )
 
+        tasks_scheduled = []
+        for newsletter, delay_seconds, task_response in zip(remaining_newsletters, delays, task_responses):
             tasks_scheduled.append({
                 "username": newsletter.get("username"),
                 "delay_seconds": delay_seconds,
@@ -6,7 +6,8 @@ from utils.user import User
 from utils.newsletter import Newsletter
 from utils.admin import create_account, delete_account
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
+from utils.build_schedule import update_posting_model
 from utils.create_cloud_task import create_cloud_task
 from utils.endpoints import SUBSTACK_NEWSLETTER_URL, PDS_USERNAME_EXTENSION
 
@@ -17,7 +18,7 @@ def create_dormant_newsletter_route():
         "url": "string"
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     subdomain = None
     try:
         data = request.get_json()
@@ -63,27 +64,20 @@ def create_dormant_newsletter_route():
         posts_info = newsletter.getPosts(limit=20)
         posts = posts_info.get('postsArray', [])
         posts_added = 0
-        for post in posts:
-            try:
-                post_response = at_user.createEmbededLinkPost(
-                    post['title'],
-                    post['subtitle'],
-                    post['link'],
-                    post['thumbnail_url'],
-                    post['post_date'],
-                    post['labels']
-                )
-                print(post_response)
+        post_results = at_user.createEmbededLinkPosts(posts)
+        for post, post_result in zip(posts, post_results):
+            if isinstance(post_result, Exception):
+                print(f"Skipping post {post.link} due to error: {post_result}")
+            else:
+                print(post_result)
                 posts_added += 1
-            except Exception as e:
-                print(f"Skipping post {post['link']} due to error: {e}")
 
         if posts_added == 0:
             raise Exception("No posts were added.")
         
         # 10. createNewsletter in Firebase
         isDormant = True
-        oldest_post_date = posts[-1]['post_date'] if posts else None
+        oldest_post_date = posts[-1].post_date if posts else None
         firebase.createNewsletter(
             publication['publication_id'],
             publication['name'],
@@ -95,7 +89,10 @@ def create_dormant_newsletter_route():
             posts_info.get('postFrequency'),
             posts_added,
             oldest_post_date,
-            isDormant
+            isDormant,
+            postingModel=update_posting_model(None, [post.post_date for post in posts]),
+            archiveCursor={"offset": len(posts), "postId": posts[-1].id} if posts else None,
+            cadenceStats=posts_info.get('cadenceStats')
         )
 
         # 11. create_cloud_task for /addNewsletterUserGraph
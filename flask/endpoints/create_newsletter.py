@@ -7,7 +7,8 @@ from utils.user import User
 from utils.newsletter import Newsletter
 from utils.admin import create_account, delete_account
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
+from utils.build_schedule import update_posting_model
 from utils.create_cloud_task import create_cloud_task
 from utils.endpoints import PDS_USERNAME_EXTENSION
 
@@ -18,7 +19,7 @@ def create_newsletter_route():
     Returns a streaming JSON response.
     """
     def generate():
-        firebase = FirebaseClient()
+        firebase = get_firebase_client()
         subdomain = None
         data = None
         try:
@@ -76,20 +77,13 @@ def create_newsletter_route():
 
             yield f"data: {json.dumps({'state': 'step_completed', 'message': 'Publishing posts', 'submessage': 'Creating Bluesky posts...'})}\n\n"
             
-            for post in posts:
-                try:
-                    post_response = at_user.createEmbededLinkPost(
-                        post['title'],
-                        post['subtitle'],
-                        post['link'],
-                        post['thumbnail_url'],
-                        post['post_date'],
-                        post['labels']
-                    )
-                    print(post_response)
+            post_results = at_user.createEmbededLinkPosts(posts)
+            for post, post_result in zip(posts, post_results):
+                if isinstance(post_result, Exception):
+                    print(f"Skipping post {post.link} due to error: {post_result}")
+                else:
+                    print(post_result)
                     posts_added += 1
-                except Exception as e:
-                    print(f"Skipping post {post['link']} due to error: {e}")
 
             if posts_added == 0 and len(posts) != 0:
                 raise Exception("No posts were added. All errored out.")
@@ -97,7 +91,7 @@ def create_newsletter_route():
             # Step 7: Saving to database
             yield f"data: {json.dumps({'state': 'step_completed', 'message': 'Saving newsletter', 'submessage': 'Updating Skystack status...'})}\n\n"
             
-            oldest_post_date = posts[-1]['post_date'] if posts else None
+            oldest_post_date = posts[-1].post_date if posts else None
             firebase.createNewsletter(
                 publication['publication_id'],
                 publication['name'],
@@ -108,7 +102,10 @@ def create_newsletter_route():
                 posts_info.get('lastBuildDate'),
                 posts_info.get('postFrequency'),
                 posts_added,
-                oldest_post_date
+                oldest_post_date,
+                postingModel=update_posting_model(None, [post.post_date for post in posts]),
+                archiveCursor={"offset": len(posts), "postId": posts[-1].id} if posts else None,
+                cadenceStats=posts_info.get('cadenceStats')
             )
 
             # Step 8: Setting up background tasks
@@ -140,7 +137,8 @@ def create_newsletter_route():
             add_old_posts_payload = {
                 "oldestDatePostAdded": oldest_post_date,
                 "subdomain": subdomain,
-                "numberOfIterations": 10
+                "numberOfIterations": 10,
+                "archiveCursor": {"offset": len(posts), "postId": posts[-1].id} if posts else None
             }
 
             old_posts_response = create_cloud_task(
@@ -1,7 +1,7 @@
 from flask import request
 import json
 from utils.atproto_user import AtprotoUser
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.endpoints import SUBSTACK_NEWSLETTER_URL, PDS_USERNAME_EXTENSION
 
 def follow_user_route():
@@ -12,7 +12,7 @@ def follow_user_route():
         "to_follow_subdomain": "string"
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         data = request.get_json()
         
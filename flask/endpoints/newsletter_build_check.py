@@ -1,16 +1,20 @@
 from flask import request
 import json
-from utils.firebase import FirebaseClient
-from utils.create_cloud_task import create_cloud_task
+from utils.firebase import get_firebase_client
+from utils.create_cloud_task import create_cloud_tasks
 import os
 
+# Newsletters built per /buildNewsletters task
+BUILD_SHARD_SIZE = int(os.environ.get('BUILD_SHARD_SIZE', 25))
+
 def newsletter_build_check_route():
     """
-    Checks for newsletters that need to be built and creates cloud tasks for each one.
+    Checks for newsletters that need to be built and creates cloud tasks for them, grouped in
+    shards of BUILD_SHARD_SIZE newsletters per /buildNewsletters task.
     Expects JSON payload: {} (no parameters required)
     """
     # Initialize Firebase client
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         # Get newsletters that need to be built
         newsletters_to_build = firebase.getNewslettersToBeBuilt()
@@ -30,57 +34,62 @@ def newsletter_build_check_route():
                 "error": "CLOUD_RUN_ENDPOINT environment variable not set"
             }, 500
         
-        build_endpoint = cloud_run_endpoint.rstrip('/') + '/buildNewsletter'
-        
-        # Calculate spacing: CRON_JOB_INTERVAL, 180 minutes (10800 seconds) divided by number of newsletters
+        build_endpoint = cloud_run_endpoint.rstrip('/') + '/buildNewsletters'
+
+        shards = [
+            newsletters_to_build[start:start + BUILD_SHARD_SIZE]
+            for start in range(0, len(newsletters_to_build), BUILD_SHARD_SIZE)
+        ]
+
+        # Calculate spacing: CRON_JOB_INTERVAL, 180 minutes (10800 seconds) divided by number of shards
         # This ensures tasks are evenly distributed over the CRON_JOB_INTERVAL window
         CRON_JOB_INTERVAL = 180
         total_window_seconds = CRON_JOB_INTERVAL * 60  # 180 minutes = 10800 seconds
-        spacing_seconds = total_window_seconds // len(newsletters_to_build) if len(newsletters_to_build) > 0 else 0
-        
-        # Create cloud tasks for each newsletter that needs to be built
+        spacing_seconds = total_window_seconds // len(shards) if len(shards) > 0 else 0
+
+        # Create one cloud task per shard
         created_tasks_count = 0
         failed_tasks_count = 0
         failed_tasks = []
-        
-        for index, newsletter in enumerate(newsletters_to_build):
-            try:
-                # Prepare payload for build_newsletter endpoint
-                task_payload = {
-                    "lastBuildDate": newsletter['lastBuildDate'],
-                    "noOfPosts": newsletter['numberOfPostsAdded'],
-                    "postFrequency": newsletter['postFrequency'],
-                    "subdomain": newsletter['sub_domain']
-                }
-                
-                # Calculate delay_seconds: each task spaced by spacing_seconds
-                delay_seconds = index * spacing_seconds
-                
-                # Create cloud task with delay
-                task_result = create_cloud_task(build_endpoint, task_payload, delay_seconds=delay_seconds)
-                
-                if task_result["status"] == "success":
-                    created_tasks_count += 1
-                    print(f"Created cloud task for newsletter: {newsletter['sub_domain']}")
-                else:
-                    failed_tasks_count += 1
-                    failed_tasks.append({
-                        "subdomain": newsletter['sub_domain'],
-                        "error": task_result["message"]
-                    })
-                    print(f"Failed to create cloud task for newsletter: {newsletter['sub_domain']} - {task_result['message']}")
-                    
-            except Exception as e:
+
+        tasks = []
+        for index, shard in enumerate(shards):
+            # Prepare payload for build_newsletters endpoint
+            task_payload = {
+                "newsletters": [
+                    {
+                        "lastBuildDate": newsletter['lastBuildDate'],
+                        "noOfPosts": newsletter['numberOfPostsAdded'],
+                        "postFrequency": newsletter['postFrequency'],
+                        "subdomain": newsletter['sub_domain']
+                    }
+                    for newsletter in shard
+                ]
+            }
+
+            # Calculate delay_seconds: each task spaced by spacing_seconds
+            delay_seconds = index * spacing_seconds
+            tasks.append((build_endpoint, task_payload, delay_seconds, None))
+
+        # Create cloud tasks with delay, concurrently
+        task_results = create_cloud_tasks(tasks)
+
+        for shard, task_result in zip(shards, task_results):
+            subdomains = [newsletter['sub_domain'] for newsletter in shard]
+            if task_result["status"] == "success":
+                created_tasks_count += 1
+                print(f"Created cloud task for newsletters: {', '.join(subdomains)}")
+            else:
                 failed_tasks_count += 1
                 failed_tasks.append({
-                    "subdomain": newsletter['sub_domain'],
-                    "error": str(e)
+                    "subdomains": subdomains,
+                    "error": task_result["message"]
                 })
-                print(f"Exception creating cloud task for newsletter: {newsletter['sub_domain']} - {str(e)}")
-        
+                print(f"Failed to create cloud task for newsletters: {', '.join(subdomains)} - {task_result['message']}")
+
         return {
             "status": "success",
-            "message": f"Newsletter build check completed. Out of {len(newsletters_to_build)}. {created_tasks_count} tasks created. {failed_tasks_count} tasks failed.",
+            "message": f"Newsletter build check completed. Out of {len(newsletters_to_build)}. {created_tasks_count} shard tasks created. {failed_tasks_count} tasks failed.",
             "newsletters_checked": len(newsletters_to_build),
             "tasks_created": created_tasks_count,
             "failed_tasks": failed_tasks
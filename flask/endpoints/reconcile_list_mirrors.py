@@ -0,0 +1,60 @@
+import os
+import json
+from flask import request
+
+from utils.firebase import get_firebase_client
+from utils.categories import Categories
+from utils.create_cloud_task import create_cloud_tasks
+
+def reconcile_list_mirrors_route():
+    """
+    Reconciles the list membership mirror (see utils/list_mirror.py) with the PDS.
+    Meant to be run on a schedule.
+
+    Expects JSON payload: {
+        "list_uri": "string"      # Optional. Reconciles this list.
+    }
+    Without list_uri, creates one task per known list (every category list, plus
+    STATUS_BSKY_ALL_NEWSLETTERS_LIST when set) that calls this endpoint with its list_uri.
+    """
+    firebase = get_firebase_client()
+    try:
+        data = request.get_json(silent=True) or {}
+        list_uri = data.get('list_uri')
+
+        if list_uri:
+            result = Categories().reconcileListMirror(list_uri)
+            return {
+                "status": "success",
+                "message": f"Reconciled list {list_uri}",
+                **result
+            }, 200
+
+        cloud_run_endpoint = os.environ.get("CLOUD_RUN_ENDPOINT")
+        if not cloud_run_endpoint:
+            return {
+                "status": "error",
+                "message": "CLOUD_RUN_ENDPOINT environment variable not set"
+            }, 500
+
+        list_uris = [category.get("list_url") for category in firebase.getCategories() or []]
+        list_uris.append(os.environ.get("STATUS_BSKY_ALL_NEWSLETTERS_LIST"))
+        list_uris = list(dict.fromkeys(uri for uri in list_uris if uri))
+
+        reconcile_endpoint = cloud_run_endpoint.rstrip('/') + '/reconcileListMirrors'
+        task_responses = create_cloud_tasks(
+            [(reconcile_endpoint, {"list_uri": uri}, None, None) for uri in list_uris],
+            os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default')
+        )
+
+        return {
+            "status": "success",
+            "message": f"Scheduled reconciliation of {len(list_uris)} lists",
+            "tasks_scheduled": sum(1 for response in task_responses if response.get("status") == "success"),
+            "lists": list_uris
+        }, 200
+
+    except Exception as e:
+        payload = json.dumps(request.get_json(silent=True) or {})
+        firebase.log_failed_task(payload, "/reconcileListMirrors", str(e))
+        return {"error": f"Internal server error: {str(e)}"}, 500
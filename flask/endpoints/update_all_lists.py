@@ -3,15 +3,15 @@ import json
 import time
 from flask import request
 
-from utils.firebase import FirebaseClient
-from utils.create_cloud_task import create_cloud_task
+from utils.firebase import get_firebase_client
+from utils.create_cloud_task import create_cloud_tasks
 
 def update_all_lists_route():
     """
     Schedules update tasks for all categories, spacing them out over 6 days.
     For each category, creates a cloud task to call /updateList endpoint.
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         # Get all categories
         categories = firebase.getCategories()
@@ -42,26 +42,30 @@ def update_all_lists_route():
             }, 500
         
         update_list_endpoint = cloud_run_endpoint.rstrip('/') + '/updateList'
-        tasks_scheduled = []
-        
+        tasks = []
+        delays = []
+
         # Schedule a task for each category
         for index, category in enumerate(categories):
             delay_seconds = int(index * interval_seconds)
-            
+
             payload = {
                 "id": category.get("id"),
                 "name": category.get("name"),
                 "list_url": category.get("list_url")
             }
-            
-            task_response = create_cloud_task(
-                update_list_endpoint,
-                payload,
-                os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default'),
-                task_name=f"update_list_{category.get('id', 'unknown')}_{int(time.time())}",
-                delay_seconds=delay_seconds
-            )
-            
+
+            task_name = f"update_list_{category.get('id', 'unknown')}_{int(time.time())}"
+            tasks.append((update_list_endpoint, payload, delay_seconds, task_name))
+            delays.append(delay_seconds)
+
+        task_responses = create_cloud_tasks(
+            tasks,
+            os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default')
+        )
+
+        tasks_scheduled = []
+        for category, delay_seconds, task_response in zip(categories, delays, task_responses):
             tasks_scheduled.append({
                 "category_id": category.get("id"),
                 "category_name": category.get("name"),
@@ -69,7 +73,7 @@ def update_all_lists_route():
                 "delay_days": round(delay_seconds / (24 * 3600), 2),
                 "task_response": task_response
             })
-        
+
         return {
             "status": "success",
             "message": f"Scheduled {len(tasks_scheduled)} update tasks over {total_days} days",
@@ -1,7 +1,12 @@
 from flask import request
+import os
 import json
-from utils.firebase import FirebaseClient
+from utils.firebase import get_firebase_client
 from utils.categories import Categories
+from utils.leaderboard_cache import newsletter_username_snapshots
+
+# Also remove our newsletters that dropped off the category's leaderboard
+UPDATE_LIST_REMOVE_DROPPED = os.environ.get('UPDATE_LIST_REMOVE_DROPPED', 'false').lower() == 'true'
 
 def update_list_route():
     """
@@ -9,6 +14,8 @@ def update_list_route():
     1. In the bestsellers list for the given category
     2. Not already in the list
     3. Present in the all newsletters collection
+    With UPDATE_LIST_REMOVE_DROPPED=true, newsletters in the list that are no longer in the
+    bestsellers are removed in the same applyWrites batches.
     
     Expects JSON payload: {
         "id": "string",           # Category ID for bestsellers
@@ -16,7 +23,7 @@ def update_list_route():
         "list_url": "string"      # URI of the Bluesky list to update
     }
     """
-    firebase = FirebaseClient()
+    firebase = get_firebase_client()
     try:
         data = request.get_json()
         
@@ -35,8 +42,10 @@ def update_list_route():
         # Initialize Categories client
         categories = Categories()
         
-        # Step 1: Get all newsletter usernames
-        all_newsletters = firebase.getAllNewsletterUsernames()
+        # Step 1: Get all newsletter usernames (one snapshot shared by the categories of a run)
+        all_newsletters = newsletter_username_snapshots.get("all", lambda: frozenset(firebase.getAllNewsletterUsernames()))
+        if not all_newsletters:
+            newsletter_username_snapshots.invalidate("all")  # A failed download isn't shared
         
         # Step 2: Get bestsellers for the category
         bestsellers = categories.getBestsellers(id)
@@ -46,7 +55,7 @@ def update_list_route():
         
         # Step 4: Remove already present usernames from all newsletters
         existing_members_set = set(existing_members)
-        all_newsletters_set = set(all_newsletters)
+        all_newsletters_set = all_newsletters
         
         remaining_newsletters = all_newsletters_set - existing_members_set
         
@@ -54,13 +63,19 @@ def update_list_route():
         bestsellers_set = set(bestsellers)
         usernames_to_add = remaining_newsletters & bestsellers_set
         
-        # Step 6: Add users to list
-        successful = 0
+        # Newsletters of ours that dropped off the leaderboard
+        usernames_to_remove = (existing_members_set & all_newsletters_set) - bestsellers_set if UPDATE_LIST_REMOVE_DROPPED else set()
+        
+        # Step 6: Add (and remove) users in batched list writes
+        added = 0
+        removed = 0
         failed = 0
         failed_usernames = []
         
-        if usernames_to_add:
-            successful, failed, failed_usernames = categories.addUsersToList(list(usernames_to_add), list_url)
+        if usernames_to_add or usernames_to_remove:
+            added, removed, failed, failed_usernames = categories.updateListMembers(
+                list_url, list(usernames_to_add), remove_usernames=list(usernames_to_remove)
+            )
         
         # Prepare minimal response
         response = {
@@ -69,8 +84,10 @@ def update_list_route():
             "total_newsletters": len(all_newsletters),
             "bestsellers_count": len(bestsellers),
             "existing_members_count": len(existing_members),
-            "users_added": successful,
-            "users_failed": failed
+            "users_added": added,
+            "users_removed": removed,
+            "users_failed": failed,
+            "users_to_remove": len(usernames_to_remove)
         }
         
         # Only include failed usernames if there are failures
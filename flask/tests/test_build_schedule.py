@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from datetime import datetime, timedelta, timezone
+from utils.build_schedule import update_posting_model, predict_next_build
+from utils.cadence import add_interval, new_cadence_stats
+
+
+def test_weekly_publisher_is_built_after_its_usual_hour():
+    # Every Tuesday around 09:10 UTC
+    first_post = datetime(2025, 1, 7, 9, 10, tzinfo=timezone.utc)
+    post_dates = [(first_post + timedelta(weeks=week)).isoformat().replace('+00:00', 'Z') for week in range(10)]
+    posting_model = update_posting_model(None, post_dates)
+
+    assert posting_model['lastPostAt'] == '2025-03-11T09:10:00Z'
+    assert posting_model['recentGaps'][-1] == 168.0
+
+    schedule = predict_next_build(None, None, posting_model, now=datetime(2025, 3, 13, tzinfo=timezone.utc))
+    assert schedule['predictedPostAt'] == datetime(2025, 3, 18, 10, tzinfo=timezone.utc)
+    assert schedule['nextBuildAt'] == datetime(2025, 3, 18, 10, 30, tzinfo=timezone.utc)
+
+def test_overdue_newsletter_backs_off_and_falls_back_to_post_frequency():
+    now = datetime(2025, 1, 20, tzinfo=timezone.utc)
+
+    schedule = predict_next_build('2025-01-01T00:00:00Z', 1.5, None, now=now)
+    assert now < schedule['nextBuildAt'] <= now + timedelta(days=7)
+    assert schedule['pollIntervalSeconds'] > 6 * 3600
+
+    assert predict_next_build(None, 1.5, None)['nextBuildAt'] is None
+
+def test_update_posting_model_ignores_already_seen_posts():
+    posting_model = update_posting_model(None, ['2025-01-02T08:00:00Z', '2025-01-01T08:00:00Z'])
+    assert update_posting_model(posting_model, ['2025-01-02T08:00:00Z']) == posting_model
+
+def test_regular_cadence_stats_are_used_without_recent_gaps():
+    now = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    stats = new_cadence_stats()
+    for interval in [2.9, 3.0, 3.1, 3.0, 2.9, 3.1]:
+        stats = add_interval(stats, interval)
+
+    # postFrequency says daily, the long-run cadence says every 3 days
+    schedule = predict_next_build('2025-01-01T00:00:00Z', 1.0, None, now=now, cadence_stats=stats)
+    assert schedule['predictedPostAt'] == datetime(2025, 1, 4, tzinfo=timezone.utc)
+
+    # Irregular stats aren't trusted, so postFrequency is used
+    irregular = new_cadence_stats()
+    for interval in [0.1, 9.0]:
+        irregular = add_interval(irregular, interval)
+    schedule = predict_next_build('2025-01-01T00:00:00Z', 1.0, None, now=now, cadence_stats=irregular)
+    assert schedule['predictedPostAt'] == datetime(2025, 1, 2, tzinfo=timezone.utc)
@@ -0,0 +1,58 @@
+import os
+import sys
+import statistics
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.cadence import update_cadence_stats, cadence_summary, seed_cadence_stats
+from utils.post import iso_to_epoch
+from utils.utils import getPostFreqDetails
+
+
+def test_streaming_stats_match_batch_stats_in_any_chunking():
+    day = 86400.0
+    timestamps = [0, 2 * day, 3 * day, 7 * day, 8.5 * day, 15 * day]
+    intervals = [2, 1, 4, 1.5, 6.5]
+
+    stats = update_cadence_stats(None, timestamps[:2])
+    stats = update_cadence_stats(stats, list(reversed(timestamps[2:])), previous_timestamp=timestamps[1])
+    summary = cadence_summary(stats)
+
+    assert stats['count'] == 5
+    assert abs(summary['mean'] - statistics.mean(intervals)) < 1e-9
+    assert abs(summary['stddev'] - statistics.stdev(intervals)) < 1e-9
+    assert (summary['min'], summary['max']) == (1, 6.5)
+    assert 0 < summary['confidence'] < 1
+    assert cadence_summary(update_cadence_stats(None, timestamps[:2]))['confidence'] == 0.0
+
+
+def test_post_freq_details_counts_every_new_interval():
+    # One new post two days after the last build: the interval is counted (not 0)
+    details = getPostFreqDetails(1, None, "2025-07-01T00:00:00Z", ["2025-07-03T00:00:00Z"])
+    assert details['postFrequency'] == 2.0
+    assert details['numberOfPosts'] == 2
+
+    # Three new posts add three intervals, weighted against the stored intervals rather than posts
+    details = getPostFreqDetails(
+        2, 2.0, "2025-07-03T00:00:00Z",
+        ["2025-07-09T00:00:00Z", "2025-07-07T00:00:00Z", "2025-07-05T00:00:00Z"],
+        post_timestamps=[iso_to_epoch("2025-07-09T00:00:00Z"), iso_to_epoch("2025-07-07T00:00:00Z"),
+                         iso_to_epoch("2025-07-05T00:00:00Z")],
+        cadenceStats=details['cadenceStats']
+    )
+    assert details['postFrequency'] == 2.0
+    assert details['cadenceStats']['count'] == 4
+    assert details['lastBuildDate'] == "2025-07-09T00:00:00Z"
+
+    # No new posts: the previous frequency is kept
+    assert getPostFreqDetails(5, 3.5, "2025-07-09T00:00:00Z", [])['postFrequency'] == 3.5
+
+def test_seeded_stats_are_not_trusted_until_intervals_are_observed():
+    day = 86400.0
+    seeded = seed_cadence_stats(50, 3.0)
+    assert cadence_summary(seeded)['confidence'] == 0.0
+
+    # The legacy frequency counts as one interval, so observed ones outweigh it
+    stats = update_cadence_stats(seeded, [1 * day, 2 * day, 3 * day], previous_timestamp=0)
+    summary = cadence_summary(stats)
+    assert summary['mean'] == 1.5
+    assert summary['stddev'] > 0
+    assert 0 < summary['confidence'] < 1
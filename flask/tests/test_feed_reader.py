@@ -0,0 +1,74 @@
+import os
+import sys
+from io import BytesIO
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.feed_reader as feed_reader_module
+from utils.feed_reader import FeedReader, iter_feed_entries
+from utils.post import iso_to_epoch
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Hasir</title>
+<item><title><![CDATA[Coming Sooner(?)]]></title><description><![CDATA[Maybe]]></description>
+<link>https://hasir.substack.com/p/coming-sooner</link><pubDate>Sun, 29 Jun 2025 15:16:29 GMT</pubDate>
+<enclosure url="https://substack-post-media.s3.amazonaws.com/public/images/a.png" length="0" type="image/png"/></item>
+<item><title>Coming soon</title><description></description>
+<link>https://hasir.substack.com/p/coming-soon</link><pubDate>Thu, 30 Sep 2021 07:47:35 GMT</pubDate></item>
+<item><title>Never reached</title><link>https://hasir.substack.com/p/x</link><pubDate>not a date</pubDate>
+"""  # Truncated on purpose: reading must stop before the broken part
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.raw = BytesIO(body)
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+def test_iter_feed_entries_reads_rss_and_atom():
+    entries = iter_feed_entries(BytesIO(RSS))
+    first = next(entries)
+    assert first.title == "Coming Sooner(?)"
+    assert first.link == "https://hasir.substack.com/p/coming-sooner"
+    assert first.image_url == "https://substack-post-media.s3.amazonaws.com/public/images/a.png"
+    assert first.published.timestamp() == iso_to_epoch("2025-06-29T15:16:29Z")
+
+    atom = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>A</title><summary>S</summary>
+    <link rel="alternate" href="https://example.com/a"/><link rel="enclosure" type="image/jpeg" href="https://example.com/a.jpg"/>
+    <published>2025-06-29T15:16:29Z</published></entry></feed>"""
+    (entry,) = list(iter_feed_entries(BytesIO(atom)))
+    assert (entry.title, entry.summary, entry.link, entry.image_url) == ("A", "S", "https://example.com/a", "https://example.com/a.jpg")
+
+
+def test_read_since_stops_at_cutoff_and_revalidates(monkeypatch):
+    client = FakeClient([
+        FakeResponse(200, RSS, {"ETag": '"v1"'}),
+        FakeResponse(304),
+    ])
+    monkeypatch.setattr(feed_reader_module, "get_http_client", lambda: client)
+    reader = FeedReader()
+
+    entries = reader.read_since("https://hasir.substack.com/feed", iso_to_epoch("2021-10-30T07:47:35Z"))
+    assert [entry.title for entry in entries] == ["Coming Sooner(?)"]
+    assert client.requests[0] == {}
+
+    # Nothing newer than what the cached version had: conditional request, 304, no entries
+    assert reader.read_since("https://hasir.substack.com/feed", iso_to_epoch("2025-06-29T15:16:29Z")) == []
+    assert client.requests[1] == {"If-None-Match": '"v1"'}
+    assert reader.get_stats() == {"requests": 2, "not_modified": 1, "entries_parsed": 2, "feeds": 1}
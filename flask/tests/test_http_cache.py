@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.http_cache as http_cache_module
+from utils.http_cache import HttpCache, MemoryCacheBackend, FileCacheBackend
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.text = json.dumps(data) if data is not None else ""
+        self.content = self.text.encode()
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers or {}))
+        return self.responses.pop(0)
+
+
+def test_archive_is_revalidated_and_metadata_served_fresh(monkeypatch):
+    archive_url = "https://hasir.substack.com/api/v1/archive?sort=new&offset=0&limit=20"
+    profile_url = "https://hasir.substack.com/api/v1/user/hasir/public_profile"
+    client = FakeClient([
+        FakeResponse(200, [{"id": 1}], {"ETag": '"a1"'}),
+        FakeResponse(304),
+        FakeResponse(200, {"publicationUsers": []}, {"ETag": '"p1"'}),
+    ])
+    monkeypatch.setattr(http_cache_module, "get_http_client", lambda: client)
+    cache = HttpCache(MemoryCacheBackend())
+
+    assert cache.get_json_with_size(archive_url) == ([{"id": 1}], len(b'[{"id": 1}]'))
+    assert cache.get_json_with_size(archive_url) == ([{"id": 1}], 0)
+    assert client.requests[1] == (archive_url, {"If-None-Match": '"a1"'})
+
+    # Profiles are fresh for hours: the second read makes no request
+    assert cache.get_json(profile_url) == {"publicationUsers": []}
+    assert cache.get_json(profile_url) == {"publicationUsers": []}
+    assert len(client.requests) == 3
+
+    assert cache.get_stats() == {
+        "archive": {"fresh_hits": 0, "revalidated": 1, "misses": 1, "errors": 0},
+        "public_profile": {"fresh_hits": 1, "revalidated": 0, "misses": 1, "errors": 0},
+    }
+
+
+def test_file_backend_round_trips(tmp_path):
+    backend = FileCacheBackend(str(tmp_path))
+    assert backend.get("missing") is None
+    backend.set("key", {"url": "https://example.com", "body": "[]", "etag": None, "last_modified": None, "fetched_at": 1.0})
+    assert backend.get("key")["body"] == "[]"
+
+def test_memory_backend_is_bounded_by_body_bytes():
+    backend = MemoryCacheBackend(max_entries=100, max_bytes=10)
+    backend.set("a", {"body": "aaaa"})
+    backend.set("b", {"body": "bbbb"})
+    backend.get("a")
+    backend.set("c", {"body": "cccc"})
+
+    # "b" was least recently used; "a" and "c" fit in 10 bytes
+    assert backend.get("b") is None
+    assert backend.get("a") is not None and backend.get("c") is not None
+
+    # A body larger than the whole budget isn't kept, and doesn't evict anything
+    backend.set("d", {"body": "d" * 11})
+    assert backend.get("d") is None
+    assert backend.get("a") is not None
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.categories as categories_module
+from utils.categories import Categories
+from utils.leaderboard_cache import SnapshotCache, leaderboard_snapshots
+
+
+def _leaderboard(pages, page_size):
+    def fetch(url):
+        page = int(url.rsplit('page=', 1)[1])
+        if page >= pages:
+            raise Exception("HTTP 404")
+        return {
+            "items": [{"publication": {"subdomain": f"pub{page}-{index}"}} for index in range(page_size)],
+            "more": page + 1 < pages
+        }
+    return fetch
+
+
+def test_bestsellers_fetch_pages_concurrently_and_are_cached(monkeypatch):
+    requested = []
+    fetch = _leaderboard(pages=2, page_size=25)
+    monkeypatch.setattr(categories_module, "fetch_json", lambda url: requested.append(url) or fetch(url))
+    leaderboard_snapshots.invalidate()
+    categories = Categories.__new__(Categories)  # No Bluesky login needed to read leaderboards
+
+    subdomains = categories.getBestsellers("tech", count=100)
+    # Pages 0-3 are requested, pages 2-3 fail past the end without affecting the result
+    assert len(requested) == 4
+    assert len(subdomains) == 50
+    assert subdomains[0] == "pub0-0.skystack.xyz" and subdomains[-1] == "pub1-24.skystack.xyz"
+
+    assert categories.getBestsellers("tech", count=100) == subdomains
+    assert len(requested) == 4
+    leaderboard_snapshots.invalidate()
+
+
+def test_snapshot_cache_expires():
+    cache = SnapshotCache(ttl_seconds=0)
+    calls = []
+    assert cache.get("key", lambda: calls.append(1) or frozenset({"a"})) == frozenset({"a"})
+    cache.get("key", lambda: calls.append(1) or frozenset({"a"}))
+    assert len(calls) == 2
+    assert cache.get_stats() == {"hits": 0, "misses": 2, "snapshots": 1}
@@ -0,0 +1,68 @@
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.categories as categories_module
+from utils.categories import Categories
+from utils.list_mirror import ListMembershipMirror, MemoryListMirrorBackend, list_item_rkey
+
+LIST_URI = "at://did:plc:admin/app.bsky.graph.list/tech"
+
+
+def test_mirror_reads_pds_once_and_tracks_writes():
+    pds_reads = []
+
+    def fetch_items():
+        pds_reads.append(1)
+        return [("alice.skystack.xyz", "did:plc:alice", "3kalice")]
+
+    mirror = ListMembershipMirror(MemoryListMirrorBackend(), cache_ttl_seconds=0)
+    assert mirror.contains(LIST_URI, "alice.skystack.xyz", fetch_items)
+    assert not mirror.contains(LIST_URI, "bob.skystack.xyz", fetch_items)
+    assert len(pds_reads) == 1  # Later reads come from the mirror
+
+    mirror.record_added(LIST_URI, [("bob.skystack.xyz", "did:plc:bob", "3kbob")])
+    mirror.record_removed(LIST_URI, ["did:plc:alice"])
+    assert mirror.has_member(LIST_URI, "did:plc:bob") and not mirror.has_member(LIST_URI, "did:plc:alice")
+    assert mirror.get_members(LIST_URI, fetch_items) == {"did:plc:bob": {"handle": "bob.skystack.xyz", "rkey": "3kbob"}}
+
+    assert mirror.reconcile(LIST_URI, fetch_items) == {"members": 1, "added": 1, "removed": 1}
+    assert mirror.get_handles(LIST_URI, fetch_items) == {"alice.skystack.xyz"}
+
+
+def test_writes_to_unmirrored_lists_are_ignored():
+    mirror = ListMembershipMirror(MemoryListMirrorBackend())
+    mirror.record_added(LIST_URI, [("bob.skystack.xyz", "did:plc:bob", "3kbob")])
+    assert mirror.get_handles(LIST_URI, lambda: []) == set()
+    assert list_item_rkey("at://did:plc:admin/app.bsky.graph.listitem/3kbob") == "3kbob"
+
+
+def test_update_list_members_batches_creates_and_deletes(monkeypatch):
+    mirror = ListMembershipMirror(MemoryListMirrorBackend())
+    mirror.reconcile(LIST_URI, lambda: [("old.skystack.xyz", "did:plc:old", "3kold")])
+    monkeypatch.setattr(categories_module, "get_list_mirror", lambda: mirror)
+    monkeypatch.setattr(categories_module.handle_resolver, "resolve_many",
+                        lambda client, handles: {"a.skystack.xyz": "did:plc:a", "b.skystack.xyz": "did:plc:b"})
+    batches = []
+
+    def apply_writes(client, writes):
+        batches.append(writes)
+        return [SimpleNamespace(uri="at://did:plc:admin/app.bsky.graph.listitem/3ka"), Exception("rejected"), None]
+
+    monkeypatch.setattr(categories_module, "apply_writes_in_batches", apply_writes)
+    categories = Categories.__new__(Categories)
+    categories.client = SimpleNamespace(me=SimpleNamespace(did="did:plc:admin"))
+
+    result = categories.updateListMembers(LIST_URI, ["a.skystack.xyz", "b.skystack.xyz", "missing.skystack.xyz"],
+                                          remove_usernames=["old.skystack.xyz"])
+
+    assert result == (1, 1, 2, ["missing.skystack.xyz", "b.skystack.xyz"])
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert batches[0][2].rkey == "3kold"
+    assert mirror.get_members(LIST_URI, lambda: []) == {"did:plc:a": {"handle": "a.skystack.xyz", "rkey": "3ka"}}
+
+
+def test_memory_backend_expires_lists():
+    backend = MemoryListMirrorBackend(ttl_seconds=0)
+    backend.replace(LIST_URI, {"did:plc:alice": {"handle": "alice.skystack.xyz", "rkey": "3kalice"}})
+    assert backend.load(LIST_URI) is None
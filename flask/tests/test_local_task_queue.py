@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from flask import Flask, request
+from utils.local_task_queue import LocalTaskQueue
+
+
+def make_app(calls):
+    app = Flask(__name__)
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        calls.append((time.monotonic(), request.get_json(), request.headers.get('Authorization')))
+        return {"status": "ok"}, 200
+
+    return app
+
+
+def test_local_task_queue_dispatches_in_delay_order():
+    calls = []
+    queue = LocalTaskQueue(workers_per_queue=1)
+    queue.init_app(make_app(calls))
+
+    start = time.monotonic()
+    queue.enqueue('http://localhost:8080/echo', {"n": 2}, 'default', delay_seconds=0.3,
+                  headers={"Authorization": "Bearer token"})
+    queue.enqueue('http://localhost:8080/echo', {"n": 1}, 'default')
+
+    assert queue.wait_until_idle(timeout=5)
+    assert [payload["n"] for _, payload, _ in calls] == [1, 2]
+    assert calls[1][0] - start >= 0.3
+    assert calls[1][2] == "Bearer token"
+    assert queue.get_stats()["succeeded"] == 2
+
+
+def test_local_task_queue_rejects_duplicate_names_per_queue():
+    calls = []
+    queue = LocalTaskQueue()
+    queue.init_app(make_app(calls))
+
+    assert queue.enqueue('/echo', {}, 'default', task_name='same')["status"] == "success"
+    assert queue.enqueue('/echo', {}, 'default', task_name='same')["status"] == "error"
+    assert queue.enqueue('/echo', {}, 'other', task_name='same')["status"] == "success"
+
+    assert queue.wait_until_idle(timeout=5)
+    assert len(calls) == 2
+    assert queue.get_stats()["duplicates"] == 1
+
+    # Finished tasks' names are dropped
+    assert queue.get_stats()["task_names"] == 0
+    assert queue.enqueue('/echo', {}, 'default', task_name='same')["status"] == "success"
+    assert queue.wait_until_idle(timeout=5)
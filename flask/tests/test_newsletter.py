@@ -2,6 +2,7 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.newsletter import Newsletter
+from utils.post import Post
 
 
 def test_get_publication():
@@ -40,22 +41,22 @@ def test_get_posts():
     posts = newsletter.getPosts()
 
     assert posts['postsArray'] == [
-        {
-            'title': "Coming Sooner(?)",
-            'subtitle': "Maybe",
-            'link': "https://hasir.substack.com/p/coming-sooner",
-            'id': 167107842,
-            'thumbnail_url': None,
-            'post_date': "2025-06-29T15:16:29.827Z"
-        },
-        {
-            'title': "Coming soon",
-            'subtitle': "",
-            'link': "https://hasir.substack.com/p/coming-soon",
-            'id': 41997751,
-            'thumbnail_url': "https://substackcdn.com/image/fetch/$s_!LMqd!,f_auto,q_auto:good,fl_progressive:steep/https%3A%2F%2Fsubstack-post-media.s3.amazonaws.com%2Fpublic%2Fimages%2F2a468181-7d79-4f0f-977c-c157ee482072_1000x1000.heic",
-            'post_date': "2021-09-30T07:47:35.496Z"
-        }
+        Post.create(
+            title="Coming Sooner(?)",
+            subtitle="Maybe",
+            link="https://hasir.substack.com/p/coming-sooner",
+            post_date="2025-06-29T15:16:29.827Z",
+            id=167107842,
+            thumbnail_url=None
+        ),
+        Post.create(
+            title="Coming soon",
+            subtitle="",
+            link="https://hasir.substack.com/p/coming-soon",
+            post_date="2021-09-30T07:47:35.496Z",
+            id=41997751,
+            thumbnail_url="https://substackcdn.com/image/fetch/$s_!LMqd!,f_auto,q_auto:good,fl_progressive:steep/https%3A%2F%2Fsubstack-post-media.s3.amazonaws.com%2Fpublic%2Fimages%2F2a468181-7d79-4f0f-977c-c157ee482072_1000x1000.heic"
+        )
     ]
     assert posts['numberOfPosts'] == 2
     assert posts['lastBuildDate'] == "2025-06-29T15:16:29.827Z"
@@ -67,15 +68,47 @@ def test_get_newsletter_data_since_last_build():
     
     assert result == {
         'post_items': [
-            {
-                'title': 'Coming Sooner(?)',
-                'subtitle': 'Maybe',
-                'link': 'https://hasir.substack.com/p/coming-sooner',
-                'post_date': '2025-06-29T15:16:29Z',
-                'thumbnail_url': None
-            }
+            Post.create(
+                title='Coming Sooner(?)',
+                subtitle='Maybe',
+                link='https://hasir.substack.com/p/coming-sooner',
+                post_date='2025-06-29T15:16:29Z',
+                thumbnail_url=None
+            )
         ],
         'number_of_posts': 2,
         'last_build_date': '2025-06-29T15:16:29Z',
-        'post_frequency': 0.5
-    }
\ No newline at end of file
+        'post_frequency': 1338.3117303703698,
+        'cadence_stats': {
+            'count': 1,
+            'mean': 1338.3117303703698,
+            'm2': 0.0,
+            'min': 1338.3117303703698,
+            'max': 1338.3117303703698
+        }
+    }
+
+def _fake_archive(size):
+    return [
+        {'id': index, 'title': f"Post {index}", 'canonical_url': f"https://hasir.substack.com/p/{index}",
+         'post_date': f"2025-01-{31 - index:02d}T10:00:00.000Z"}
+        for index in range(size)
+    ]
+
+def test_archive_iterator_stops_early_and_counts_pages():
+    archive = _fake_archive(30)
+    newsletter = Newsletter("https://hasir.substack.com/")
+    newsletter._fetch_archive_page_with_size = lambda offset, limit: (archive[offset:offset + limit], 100)
+
+    iterator = newsletter.iterArchive(older_than=newsletter._parse_iso_z(archive[4]['post_date']), limit=3, prefetch=0)
+    assert [entry.item.id for entry in iterator] == [5, 6, 7]
+    assert iterator.get_stats() == {'pages': 1, 'bytes': 100, 'posts_scanned': 8}
+
+    items, cursor = newsletter.getOlderPostsFromCursor(archive[7]['post_date'], {'offset': 8, 'postId': 7}, max_items=25)
+    assert [item.id for item in items] == list(range(8, 30))
+    assert cursor == {'offset': 30, 'postId': 29}
+
+def test_older_posts_with_invalid_date_is_an_empty_list():
+    newsletter = Newsletter("https://hasir.substack.com/")
+    assert newsletter.getOlderPosts(None) == []
+    assert newsletter.getOlderPosts("not a date") == []
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.atproto_user as atproto_user_module
+from utils.atproto_user import AtprotoUser
+
+
+def test_prepared_posts_are_published_while_a_slow_embed_is_pending(monkeypatch):
+    monkeypatch.setattr(atproto_user_module, "POST_PUBLISH_FLUSH_SECONDS", 0.05)
+    published = []
+    at_user = AtprotoUser.__new__(AtprotoUser)
+
+    def prepare(title, subtitle, link, thumbnail_url, post_date, labels):
+        if title == "slow":
+            time.sleep(0.5)
+        return title
+
+    def publish(records):
+        published.append((list(records), time.monotonic()))
+        return [f"uri:{record}" for record in records]
+
+    at_user.prepareEmbededLinkPost = prepare
+    at_user.publishPosts = publish
+    post_items = [SimpleNamespace(title=title, subtitle=None, link=None, thumbnail_url=None, post_date=None, labels=None)
+                  for title in ["a", "b", "slow", "c"]]
+
+    started = time.monotonic()
+    results = at_user.createEmbededLinkPosts(post_items, max_workers=2)
+
+    assert results == ["uri:a", "uri:b", "uri:slow", "uri:c"]
+    assert published[0][0] == ["a", "b"]
+    assert published[0][1] - started < 0.4  # Didn't wait for the slow embed
+    assert [record for records, _ in published for record in records] == ["a", "b", "slow", "c"]
@@ -0,0 +1,40 @@
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from atproto_client.exceptions import BadRequestError, NetworkError
+from utils.repo_writes import apply_writes_in_batches, delete_write
+
+
+class FakeClient:
+    def __init__(self, batch_error):
+        self.batch_error = batch_error
+        self.calls = []
+        self.me = SimpleNamespace(did="did:plc:admin")
+        self.com = SimpleNamespace(atproto=SimpleNamespace(repo=SimpleNamespace(apply_writes=self.apply_writes)))
+
+    def apply_writes(self, data):
+        self.calls.append(list(data.writes))
+        if len(data.writes) > 1 or data.writes[0].rkey == "bad":
+            raise self.batch_error
+        return SimpleNamespace(results=[SimpleNamespace(uri=f"at://did:plc:admin/x/{data.writes[0].rkey}")])
+
+
+def _writes():
+    return [delete_write("app.bsky.graph.listitem", rkey) for rkey in ("a", "bad", "c")]
+
+
+def test_rejected_batch_is_retried_write_by_write():
+    client = FakeClient(BadRequestError(SimpleNamespace(status_code=400)))
+    results = apply_writes_in_batches(client, _writes())
+
+    assert len(client.calls) == 4
+    assert results[0].uri.endswith("/a") and results[2].uri.endswith("/c")
+    assert isinstance(results[1], BadRequestError)
+
+def test_transport_errors_are_not_retried():
+    error = NetworkError(SimpleNamespace(status_code=502))
+    client = FakeClient(error)
+
+    assert apply_writes_in_batches(client, _writes()) == [error, error, error]
+    assert len(client.calls) == 1
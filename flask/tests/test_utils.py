@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from io import BytesIO
+from PIL import Image
+from utils.utils import compress_image
+from utils.post import Post, iso_to_epoch
+
+
+def test_compress_image_downsizes_and_reencodes():
+    image = Image.new('RGB', (4000, 2108), (200, 120, 40))
+    original = BytesIO()
+    image.save(original, format='PNG')
+
+    data, mime_type = compress_image(original.getvalue())
+
+    assert mime_type == 'image/jpeg'
+    assert len(data) <= 1000000
+    compressed = Image.open(BytesIO(data))
+    assert compressed.format == 'JPEG'
+    assert compressed.size == (1000, 527)
+    assert 'exif' not in compressed.info
+
+def test_compress_image_returns_undecodable_bytes_unchanged():
+    data, mime_type = compress_image(b'not an image', fallback_mime_type='image/heic')
+    assert data == b'not an image'
+    assert mime_type == 'image/heic'
+
+def test_compress_image_returns_original_bytes_when_encoding_fails(monkeypatch):
+    image = Image.new('RGB', (400, 400), (200, 120, 40))
+    original = BytesIO()
+    image.save(original, format='PNG')
+
+    def failing_save(self, *args, **kwargs):
+        raise OSError("encoder error")
+
+    monkeypatch.setattr(Image.Image, 'save', failing_save)
+    assert compress_image(original.getvalue(), fallback_mime_type='image/png') == (original.getvalue(), 'image/png')
+
+
+def test_post_parses_date_once_and_freezes_labels():
+    post = Post.create("Title", "Subtitle", "https://hasir.substack.com/p/title", "2025-06-29T15:16:29.827Z",
+                       id=1, labels=["en"])
+
+    assert post.published_at == iso_to_epoch("2025-06-29T15:16:29.827+00:00") == 1751210189.827
+    assert post.labels == ("en",)
+    assert post.to_dict()['labels'] == ["en"]
+    assert not hasattr(post, '__dict__')
+    assert iso_to_epoch("2025-06-29T15:16:29") == iso_to_epoch("2025-06-29T15:16:29Z")
+    assert iso_to_epoch("not a date") is None
@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.write_budget import WriteBudget, MemoryBudgetBackend
+
+
+def test_backfill_leaves_live_reserve_and_reports_next_delay():
+    budget = WriteBudget(pds_host='pds.test', account_points_per_hour=300, account_points_per_day=10000,
+                         pds_points_per_hour=100000, live_reserve=0.2)
+
+    # 300 points/hour with 60 reserved for live builds: 80 posts at 3 points each
+    items, next_delay = budget.acquire_backfill('alice.pds.test', 3, 100)
+    assert items == 80
+    # 60 points left; another 100 posts need 300 more above the reserve, i.e. an hour of refill
+    assert next_delay == 3600
+
+    items, next_delay = budget.acquire_backfill('alice.pds.test', 3, 10)
+    assert items == 0
+    assert next_delay > 0
+
+    # Other accounts have their own budget
+    assert budget.acquire_backfill('bob.pds.test', 3, 10)[0] == 10
+
+def test_live_writes_are_never_refused_but_delay_backfills():
+    budget = WriteBudget(pds_host='pds.test', account_points_per_hour=300, account_points_per_day=10000,
+                         pds_points_per_hour=100000, live_reserve=0.2)
+
+    budget.record_writes('alice.pds.test', 290)
+    items, next_delay = budget.acquire_backfill('alice.pds.test', 3, 10)
+    assert items == 0
+    assert next_delay > 0
+    assert budget.get_stats()["live_points"] == 290
+
+def test_released_backfill_points_are_available_again():
+    budget = WriteBudget(pds_host='pds.test', account_points_per_hour=300, account_points_per_day=10000,
+                         pds_points_per_hour=100000, live_reserve=0.2)
+
+    assert budget.acquire_backfill('alice.pds.test', 3, 100)[0] == 80
+    # Only 30 of the 80 posts were written
+    budget.release_backfill('alice.pds.test', 50 * 3)
+    assert budget.acquire_backfill('alice.pds.test', 3, 100)[0] == 50
+    assert budget.get_stats()["backfill_released"] == 150
+
+def test_live_writes_are_applied_in_one_update_per_flush():
+    updates = []
+
+    class CountingBackend(MemoryBudgetBackend):
+        def update(self, keys, apply):
+            updates.append(sorted(keys))
+            return super().update(keys, apply)
+
+    budget = WriteBudget(CountingBackend(), pds_host='pds.test', account_points_per_hour=300,
+                         account_points_per_day=10000, pds_points_per_hour=100000, live_reserve=0.2,
+                         flush_seconds=3600)
+    for _ in range(10):
+        budget.record_writes('alice.pds.test', 3)
+        budget.record_writes('bob.pds.test', 3)
+    assert updates == []
+
+    # Backfill requests see the pending points: one update for both accounts, then the acquire
+    assert budget.acquire_backfill('alice.pds.test', 3, 100)[0] == 70
+    assert len(updates) == 2
+    assert updates[0].count('pds:pds.test:hour') == 1 and len(updates[0]) == 5
@@ -2,6 +2,8 @@ from atproto import Client, models
 import base64
 import os
 from utils.endpoints import PDS_ENDPOINT, PDS_USERNAME_EXTENSION
+from utils.session_store import get_session_store
+from utils.handle_resolver import handle_resolver
 
 def create_invite_code(client, use_count: int = 1, for_account: str = None):
     data = models.ComAtprotoServerCreateInviteCode.Data(
@@ -28,6 +30,8 @@ def create_account(username: str):
         invite_code=invite_code
     )
     response = client.com.atproto.server.create_account(data)
+    # The handle may have been cached as unresolvable (or pointing at a deleted account)
+    handle_resolver.invalidate(username + PDS_USERNAME_EXTENSION)
     return response
 
 
@@ -35,12 +39,15 @@ def delete_account(username: str):
     client = Client(PDS_ENDPOINT)
     try:
         # Resolve handle to DID
-        user_data = client.resolve_handle(username + PDS_USERNAME_EXTENSION)
-        delete_account_data = models.ComAtprotoAdminDeleteAccount.Data(did=user_data.did)
+        did = handle_resolver.resolve(client, username + PDS_USERNAME_EXTENSION)
+        delete_account_data = models.ComAtprotoAdminDeleteAccount.Data(did=did)
 
         # Delete account as administrator
         headers = get_admin_headers()
         response = client.com.atproto.admin.delete_account(delete_account_data, headers=headers)
+        # Any stored session or cached DID belongs to the deleted account
+        get_session_store().delete(username + PDS_USERNAME_EXTENSION)
+        handle_resolver.invalidate(username + PDS_USERNAME_EXTENSION)
         return response
     except Exception as e:
         # You may want to log the error or handle it differently depending on your needs
@@ -1,19 +1,36 @@
 import re
+import hashlib
 
 from atproto import Client, client_utils, models
 
 import os
+import time
 import requests
 from io import BytesIO
-from PIL import Image
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from utils.endpoints import PDS_ENDPOINT, PDS_USERNAME_EXTENSION, OG_CARD_ENDPOINT
+from utils.http_client import get_http_client
+from utils.blob_cache import blob_cache
+from utils.handle_resolver import handle_resolver
+from utils.session_store import login_with_stored_session
+from utils.utils import compress_image
+from utils.repo_writes import apply_writes_in_batches, create_write, APPLY_WRITES_BATCH_SIZE
+from utils.write_budget import get_write_budget, WRITE_POINTS
+
+# Thumbnail downloads/uploads prepared ahead of record creation in createEmbededLinkPosts
+POST_PIPELINE_WORKERS = int(os.environ.get('POST_PIPELINE_WORKERS', 4))
+# createEmbededLinkPosts publishes once this many records are ready, or once the oldest waited this long,
+# so a slow embed doesn't hold back posts that are already prepared
+POST_PUBLISH_FLUSH_SIZE = int(os.environ.get('POST_PUBLISH_FLUSH_SIZE', APPLY_WRITES_BATCH_SIZE))
+POST_PUBLISH_FLUSH_SECONDS = float(os.environ.get('POST_PUBLISH_FLUSH_SECONDS', 2))
 
 class AtprotoUser:
     """A class to manage a user's AT Protocol (Bluesky) account."""
-    def __init__(self, username, url, password=None, pds_type="custom"):
+    def __init__(self, username, url, password=None, pds_type="custom", record_writes=True):
         """
-        Initializes the Atproto client and logs in the user.
+        Initializes the Atproto client and logs in the user, resuming a stored session when one exists.
 
         Args:
             username (str): The user's handle. For custom PDS, without the PDS extension.
@@ -23,10 +40,13 @@ class AtprotoUser:
                                      environment variable USER_LOGIN_PASS.
             pds_type (str, optional): Type of PDS to use. Either "bsky" or "custom".
                                      Defaults to "custom" for backward compatibility.
+            record_writes (bool, optional): Record repo writes as live writes in the write budget.
+                                     Backfills pass False since they take their budget up front.
         """
         self.username = username
         self.url = url
         self.pds_type = pds_type
+        self.record_writes = record_writes
         
         # Determine password
         if password is None:
@@ -50,7 +70,8 @@ class AtprotoUser:
             login_username = self.username + PDS_USERNAME_EXTENSION
             login_password = self.username + self.user_login_pass
         
-        self.client.login(login_username, login_password)
+        self.login_username = login_username
+        login_with_stored_session(self.client, login_username, login_password)
 
     def updateProfileDetails(self, display_name, description, profile_pic_url):
         """
@@ -99,6 +120,7 @@ class AtprotoUser:
             record=profile_record,
         )
         profile_response = self.client.com.atproto.repo.put_record(data)
+        self._recordWrites(WRITE_POINTS["update"])
         return profile_response
 
     def createEmbededLinkPost(self, title, subtitle, link, thumbnail_url, post_date, labels):
@@ -114,11 +136,145 @@ class AtprotoUser:
         Returns:
             The response from the server after creating the post.
         """
+        post_record = self.prepareEmbededLinkPost(title, subtitle, link, thumbnail_url, post_date, labels)
+        return self._publishPostWithEmbed(post_record)
+
+    def createEmbededLinkPosts(self, post_items, max_workers=POST_PIPELINE_WORKERS):
+        """
+        Creates link card posts for several post items as a pipeline: thumbnail downloads and blob uploads
+        for upcoming posts run in a bounded worker pool while finished records are consumed in order and
+        published in applyWrites batches (instead of one createRecord call per post). A batch is published
+        once POST_PUBLISH_FLUSH_SIZE records are ready, or when the oldest ready one has waited
+        POST_PUBLISH_FLUSH_SECONDS for the next.
+
+        Args:
+            post_items (list[Post]): Posts to publish (title, subtitle, link, thumbnail_url, post_date, labels).
+            max_workers (int): Number of posts whose embeds are prepared concurrently.
+
+        Returns:
+            list: One entry per post item, in order: the write result, or the Exception that post failed with
+                  (while preparing its embed or while publishing).
+        """
+        results = [None] * len(post_items)
+        batch_records = []
+        batch_indexes = []
+        batch_started = None
+
+        def publish_batch():
+            for index, result in zip(batch_indexes, self.publishPosts(batch_records)):
+                results[index] = result
+            batch_records.clear()
+            batch_indexes.clear()
+
+        def remaining_wait():
+            if not batch_records:
+                return None
+            return POST_PUBLISH_FLUSH_SECONDS - (time.monotonic() - batch_started)
+
+        for index, post_record in self._prepareEmbededLinkPostsPipelined(post_items, max_workers, remaining_wait):
+            if index is None:
+                # The next record wasn't ready before the oldest one in the batch got too old
+                publish_batch()
+                continue
+            if isinstance(post_record, Exception):
+                results[index] = post_record
+                continue
+            if not batch_records:
+                batch_started = time.monotonic()
+            batch_records.append(post_record)
+            batch_indexes.append(index)
+            if (len(batch_records) >= POST_PUBLISH_FLUSH_SIZE
+                    or time.monotonic() - batch_started >= POST_PUBLISH_FLUSH_SECONDS):
+                publish_batch()
+
+        if batch_records:
+            publish_batch()
+        return results
+
+    def _prepareEmbededLinkPostsPipelined(self, post_items, max_workers, wait_timeout=None):
+        """
+        Prepares post records in a worker pool, yielding (index, post_record or Exception) in input order.
+        At most 2 * max_workers posts are in flight, so uploaded blobs don't sit unreferenced for long.
+
+        Args:
+            post_items (list[Post]): Posts (see createEmbededLinkPosts).
+            max_workers (int): Pool size.
+            wait_timeout (callable, optional): Returns how long to wait for the next record (None: no limit).
+                When it isn't ready in time, (None, None) is yielded and the wait starts over.
+        """
+        def prepare(post_item):
+            return self.prepareEmbededLinkPost(
+                post_item.title,
+                post_item.subtitle,
+                post_item.link,
+                post_item.thumbnail_url,
+                post_item.post_date,
+                post_item.labels
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            upcoming = iter(enumerate(post_items))
+            pending = deque()
+
+            def submit_next():
+                next_item = next(upcoming, None)
+                if next_item is not None:
+                    index, post_item = next_item
+                    pending.append((index, executor.submit(prepare, post_item)))
+
+            for _ in range(2 * max(1, max_workers)):
+                submit_next()
+
+            while pending:
+                index, future = pending[0]
+                timeout = wait_timeout() if wait_timeout else None
+                if timeout is not None and not wait([future], timeout=max(timeout, 0)).done:
+                    yield None, None
+                    continue
+                pending.popleft()
+                submit_next()
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    yield index, e
+
+    def prepareEmbededLinkPost(self, title, subtitle, link, thumbnail_url, post_date, labels):
+        """
+        Builds (without publishing) a post record with a link card embed. Uploads the thumbnail.
+
+        Args:
+            title (str): The title of the link card.
+            subtitle (str): The description/subtitle of the link card.
+            link (str): The URL the link card should point to.
+            thumbnail_url (str): The URL of the image for the link card's thumbnail.
+            post_date (str): ISO format date string with Z suffix.
+            labels (Optional[list[str]]): Self labels for the post.
+
+        Returns:
+            The post record object.
+        """
         external_embed = self._createExternalEmbed(title, subtitle, link, thumbnail_url)
         self_labels = self._createSelfLabels(labels)
         post_text = self._buildPostText(title, subtitle)
-        post_record = self._createPostRecord(post_text, None, post_date, external_embed, self_labels)
-        return self._publishPost(post_record)
+        return self._createPostRecord(post_text, None, post_date, external_embed, self_labels)
+
+    def publishPosts(self, post_records):
+        """
+        Publishes post records in com.atproto.repo.applyWrites batches.
+
+        Args:
+            post_records (list): Post record objects (see prepareEmbededLinkPost).
+
+        Returns:
+            list: One entry per record, in order: the applyWrites create result, or the Exception it failed with.
+        """
+        writes = [create_write(models.ids.AppBskyFeedPost, post_record) for post_record in post_records]
+        results = apply_writes_in_batches(self.client, writes)
+        for post_record, result in zip(post_records, results):
+            if isinstance(result, Exception):
+                self._discardEmbedThumb(post_record)
+        self._recordWrites(WRITE_POINTS["create"] * sum(1 for result in results if not isinstance(result, Exception)))
+        return results
 
     def createEmbededLinkPostWithMentions(self, post_text, link, thumbnail_url, post_date, labels, embedTitle, embedSubtitle):
         """
@@ -147,7 +303,7 @@ class AtprotoUser:
             resolved_handle = f"{title_handle_match.group(1)}{PDS_USERNAME_EXTENSION}"
             mention_handle = f"@{resolved_handle}"
             try:
-                mention_did = self.client.resolve_handle(resolved_handle).did
+                mention_did = handle_resolver.resolve(self.client, resolved_handle)
             except Exception:
                 mention_did = None
 
@@ -161,7 +317,7 @@ class AtprotoUser:
         record_facets = text_builder.build_facets() if text_builder else None
 
         post_record = self._createPostRecord(record_text, record_facets, post_date, external_embed, self_labels)
-        return self._publishPost(post_record)
+        return self._publishPostWithEmbed(post_record)
 
     def followUser(self, follow_user):
         """
@@ -175,15 +331,19 @@ class AtprotoUser:
             The response from the server after following the user.
         """
         try:
-            user_data = self.client.resolve_handle(follow_user)
-            follow_response = self.client.follow(user_data.did)
+            follow_did = handle_resolver.resolve(self.client, follow_user)
+            follow_response = self.client.follow(follow_did)
+            self._recordWrites(WRITE_POINTS["create"])
             return follow_response
         except Exception as e:
             print(f"Error following user {follow_user}: {e}")
 
     def uploadBlob(self, image_url):
         """
-        Downloads an image from a URL and uploads it as a blob to the PDS.
+        Downloads an image from a URL, downsizes/re-encodes it (see compress_image) and uploads it
+        as a blob to the PDS with its real MIME type.
+        Repeated images are served from the blob cache: a known URL skips the download and the upload,
+        known bytes (by SHA-256) skip the upload.
 
         Args:
             image_url (str): The URL of the image to upload.
@@ -191,19 +351,30 @@ class AtprotoUser:
         Returns:
             The response from the server containing the uploaded blob's reference.
         """
+        did = self.client.me.did
+        cached_response = blob_cache.get_by_url(did, image_url)
+        if cached_response is not None:
+            return cached_response
+
         # Download image from URL and upload as blob
+        http_client = get_http_client()
         try:
-            response = requests.get(image_url, timeout=10)
+            response = http_client.get(image_url, timeout=10)
             response.raise_for_status()
             image_data = BytesIO(response.content).read()
-        except requests.exceptions.Timeout:
-            # If timeout, use fallback image URL
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            # If timeout (surfaced as ConnectionError once retries are exhausted), use fallback image URL
             image_url = self.url + OG_CARD_ENDPOINT
-            response = requests.get(image_url, timeout=10)
+            response = http_client.get(image_url, timeout=10)
             response.raise_for_status()
             image_data = BytesIO(response.content).read()
 
-        blob_response = self.client.com.atproto.repo.upload_blob(image_data, headers={"Content-Type": "url/" + image_url})
+        digest = hashlib.sha256(image_data).hexdigest()
+        blob_response = blob_cache.get_by_digest(did, digest)
+        if blob_response is None:
+            upload_data, mime_type = compress_image(image_data, fallback_mime_type=response.headers.get('Content-Type'))
+            blob_response = self.client.com.atproto.repo.upload_blob(upload_data, headers={"Content-Type": mime_type})
+        blob_cache.put(did, image_url, digest, blob_response)
         return blob_response
 
     def _createExternalEmbed(self, title, subtitle, link, thumbnail_url):
@@ -291,7 +462,45 @@ class AtprotoUser:
         Returns:
             The response from the server after creating the post.
         """
-        return self.client.app.bsky.feed.post.create(
+        post_response = self.client.app.bsky.feed.post.create(
             repo=self.client.me.did,
             record=post_record
-        )
\ No newline at end of file
+        )
+        self._recordWrites(WRITE_POINTS["create"])
+        return post_response
+
+    def _recordWrites(self, points):
+        """
+        Records live write points for this account in the write budget (see utils/write_budget.py).
+        """
+        if self.record_writes:
+            get_write_budget().record_writes(self.login_username, points)
+
+    def _publishPostWithEmbed(self, post_record):
+        """
+        Publishes a post record whose embed thumbnail may come from the blob cache.
+
+        Args:
+            post_record: The post record to publish.
+
+        Returns:
+            The response from the server after creating the post.
+        """
+        try:
+            return self._publishPost(post_record)
+        except Exception:
+            self._discardEmbedThumb(post_record)
+            raise
+
+    def _discardEmbedThumb(self, post_record):
+        """
+        Drops a failed post's thumbnail from the blob cache: the blob may now be unreferenced
+        and garbage collected by the PDS.
+
+        Args:
+            post_record: The post record that failed to publish.
+        """
+        external = getattr(post_record.embed, 'external', None)
+        thumb = getattr(external, 'thumb', None)
+        if thumb is not None:
+            blob_cache.discard(self.client.me.did, thumb)
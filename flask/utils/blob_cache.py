@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+BLOB_CACHE_MAX_ENTRIES = int(os.environ.get('BLOB_CACHE_MAX_ENTRIES', 2048))
+BLOB_CACHE_TTL_SECONDS = int(os.environ.get('BLOB_CACHE_TTL_SECONDS', 24 * 3600))
+
+
+class BlobCache:
+    """
+    Content-addressed cache of uploaded blob refs, scoped per account DID.
+
+    Entries are keyed both by source URL (a hit skips the download and the upload) and by the
+    SHA-256 of the image bytes (a hit skips the upload). Eviction is LRU, bounded by max_entries
+    per index, and entries expire after ttl_seconds so refs the PDS may have garbage collected
+    are not reused forever.
+    """
+
+    def __init__(self, max_entries=BLOB_CACHE_MAX_ENTRIES, ttl_seconds=BLOB_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._by_url = OrderedDict()
+        self._by_digest = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"url_hits": 0, "digest_hits": 0, "misses": 0, "evictions": 0}
+
+    def _get(self, index, key):
+        entry = index.get(key)
+        if entry is None:
+            return None
+        blob_response, expires_at = entry
+        if expires_at < time.monotonic():
+            del index[key]
+            return None
+        index.move_to_end(key)
+        return blob_response
+
+    def _put(self, index, key, blob_response):
+        index[key] = (blob_response, time.monotonic() + self.ttl_seconds)
+        index.move_to_end(key)
+        while len(index) > self.max_entries:
+            index.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get_by_url(self, did, url):
+        """
+        Returns the cached upload response for url in did's repo, or None.
+        """
+        with self._lock:
+            blob_response = self._get(self._by_url, (did, url))
+            if blob_response is not None:
+                self._counters["url_hits"] += 1
+            return blob_response
+
+    def get_by_digest(self, did, digest):
+        """
+        Returns the cached upload response for bytes with this SHA-256 in did's repo, or None.
+        Counts a miss when nothing is cached, since the caller will upload next.
+        """
+        with self._lock:
+            blob_response = self._get(self._by_digest, (did, digest))
+            if blob_response is not None:
+                self._counters["digest_hits"] += 1
+            else:
+                self._counters["misses"] += 1
+            return blob_response
+
+    def put(self, did, url, digest, blob_response):
+        """
+        Remembers blob_response for both url and digest in did's repo.
+        """
+        with self._lock:
+            if url:
+                self._put(self._by_url, (did, url), blob_response)
+            if digest:
+                self._put(self._by_digest, (did, digest), blob_response)
+
+    def discard(self, did, blob):
+        """
+        Drops every entry pointing at blob in did's repo, e.g. after the record that was meant to
+        reference it failed (an unreferenced blob is garbage collected by the PDS).
+        """
+        cid = str(blob.cid)
+        with self._lock:
+            for index in (self._by_url, self._by_digest):
+                stale_keys = [
+                    key for key, (blob_response, _) in index.items()
+                    if key[0] == did and str(blob_response.blob.cid) == cid
+                ]
+                for key in stale_keys:
+                    del index[key]
+
+    def get_stats(self):
+        """
+        Returns hit/miss counters and the hit rate.
+        """
+        with self._lock:
+            hits = self._counters["url_hits"] + self._counters["digest_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._by_url) + len(self._by_digest),
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+
+blob_cache = BlobCache()
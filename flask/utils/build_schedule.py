@@ -0,0 +1,184 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from utils.cadence import cadence_summary
+
+# Recent inter-arrival times (hours) kept per newsletter
+POSTING_MODEL_MAX_GAPS = int(os.environ.get('POSTING_MODEL_MAX_GAPS', 16))
+# Each new post scales the existing histogram by this factor, so old habits fade out
+POSTING_HISTOGRAM_DECAY = float(os.environ.get('POSTING_HISTOGRAM_DECAY', 0.95))
+# Minimum (decayed) posts in the histogram before it's used to pick the weekday/hour
+POSTING_HISTOGRAM_MIN_WEIGHT = float(os.environ.get('POSTING_HISTOGRAM_MIN_WEIGHT', 3))
+BUILD_MIN_POLL_HOURS = float(os.environ.get('BUILD_MIN_POLL_HOURS', 1))
+BUILD_MAX_POLL_HOURS = float(os.environ.get('BUILD_MAX_POLL_HOURS', 7 * 24))
+# How long after the predicted post time to build, so the post is already in the archive
+BUILD_POST_LAG_MINUTES = float(os.environ.get('BUILD_POST_LAG_MINUTES', 30))
+DEFAULT_POST_GAP_DAYS = 7
+# Recent gaps the posting model needs before they are preferred over the long-run cadence stats
+POSTING_MODEL_MIN_GAPS = int(os.environ.get('POSTING_MODEL_MIN_GAPS', 3))
+# Cadence stats less regular than this (see cadence_summary) aren't used to bound the next post
+CADENCE_MIN_CONFIDENCE = float(os.environ.get('CADENCE_MIN_CONFIDENCE', 0.5))
+HOURS_PER_WEEK = 7 * 24
+# Longest stretch scanned when looking for the most likely posting hour
+MAX_PREDICTION_WINDOW_HOURS = 14 * 24
+
+
+def _parse_date(date_str):
+    if not date_str:
+        return None
+    try:
+        date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _format_date(date):
+    return date.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _week_slot(date):
+    date = date.astimezone(timezone.utc)
+    return date.weekday() * 24 + date.hour
+
+
+def _quantile(sorted_values, q):
+    index = (len(sorted_values) - 1) * q
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def update_posting_model(posting_model, post_dates_list):
+    """
+    Folds newly seen post dates into a newsletter's posting model.
+
+    The model is a small dict stored on the newsletter document:
+    - 'histogram' (list[float]): 168 decayed post counts, one per UTC weekday/hour (Monday 00:00 first)
+    - 'recentGaps' (list[float]): the last POSTING_MODEL_MAX_GAPS inter-arrival times in hours, oldest first
+    - 'lastPostAt' (str): ISO Z date of the latest post folded in
+
+    Args:
+        posting_model (dict): Existing model, or None to start a new one
+        post_dates_list (list): ISO Z post dates, in any order. Dates not newer than lastPostAt are ignored.
+
+    Returns:
+        dict: The updated model (a new dict; the input isn't modified)
+    """
+    posting_model = posting_model or {}
+    histogram = list(posting_model.get('histogram') or [0.0] * HOURS_PER_WEEK)
+    if len(histogram) != HOURS_PER_WEEK:
+        histogram = [0.0] * HOURS_PER_WEEK
+    recent_gaps = list(posting_model.get('recentGaps') or [])
+    last_post = _parse_date(posting_model.get('lastPostAt'))
+
+    post_dates = sorted(date for date in (_parse_date(d) for d in post_dates_list or []) if date)
+    for post_date in post_dates:
+        if last_post is not None and post_date <= last_post:
+            continue
+        histogram = [count * POSTING_HISTOGRAM_DECAY for count in histogram]
+        histogram[_week_slot(post_date)] += 1
+        if last_post is not None:
+            recent_gaps.append((post_date - last_post).total_seconds() / 3600.0)
+        last_post = post_date
+
+    return {
+        'histogram': [round(count, 4) for count in histogram],
+        'recentGaps': [round(gap, 3) for gap in recent_gaps[-POSTING_MODEL_MAX_GAPS:]],
+        'lastPostAt': _format_date(last_post) if last_post else None
+    }
+
+
+def _predict_next_post(posting_model, last_post, gaps):
+    """
+    Time by which the next post is most likely out: the end of the busiest weekday/hour between the
+    25th and 75th percentile gap, or last post + median gap without enough histogram data.
+    """
+    sorted_gaps = sorted(gaps)
+    median_gap = _quantile(sorted_gaps, 0.5)
+    histogram = (posting_model or {}).get('histogram') or []
+    if len(histogram) != HOURS_PER_WEEK or sum(histogram) < POSTING_HISTOGRAM_MIN_WEIGHT:
+        return last_post + timedelta(hours=median_gap)
+
+    window_start = max(_quantile(sorted_gaps, 0.25), BUILD_MIN_POLL_HOURS)
+    window_end = max(_quantile(sorted_gaps, 0.75), window_start) + 24
+    window_end = min(window_end, window_start + MAX_PREDICTION_WINDOW_HOURS)
+
+    start = (last_post + timedelta(hours=window_start)).replace(minute=0, second=0, microsecond=0)
+    best_time, best_weight = None, 0
+    for hour in range(int(window_end - window_start) + 1):
+        candidate = start + timedelta(hours=hour)
+        weight = histogram[_week_slot(candidate)]
+        if weight > best_weight:
+            best_time, best_weight = candidate, weight
+    if best_time is None:
+        return last_post + timedelta(hours=median_gap)
+    return best_time + timedelta(hours=1)
+
+
+def _cadence_gaps(cadence_stats):
+    """
+    Gaps (hours) one standard deviation either side of the mean interval of cadence stats, or [] when
+    they are missing or less regular than CADENCE_MIN_CONFIDENCE.
+    """
+    summary = cadence_summary(cadence_stats)
+    if not summary['mean'] or summary['confidence'] < CADENCE_MIN_CONFIDENCE:
+        return []
+    mean, stddev = summary['mean'] * 24, (summary['stddev'] or 0.0) * 24
+    return [max(mean - stddev, BUILD_MIN_POLL_HOURS), mean, mean + stddev]
+
+
+def predict_next_build(lastBuildDate, postFrequency, posting_model=None, now=None, cadence_stats=None):
+    """
+    Predicts a newsletter's next post and when to build (poll) it next.
+
+    Uses the posting model's recent inter-arrival times to bound when the next post is due. With fewer
+    than POSTING_MODEL_MIN_GAPS of them, the mean +/- one standard deviation of the cadence stats is used
+    instead when its confidence is at least CADENCE_MIN_CONFIDENCE, then postFrequency, then a week. The
+    posting model's weekday/hour histogram picks the most likely hour in that window. The build is scheduled shortly after the predicted post. Once a newsletter is overdue,
+    polling backs off with how long it has been quiet, within BUILD_MIN_POLL_HOURS..BUILD_MAX_POLL_HOURS.
+
+    Args:
+        lastBuildDate (str): Date of the latest imported post (ISO Z)
+        postFrequency (float): Average days between posts, or None
+        posting_model (dict, optional): See update_posting_model
+        now (datetime, optional): Current time (UTC), for testing
+        cadence_stats (dict, optional): See utils/cadence.py
+
+    Returns:
+        dict: 'nextBuildAt' (datetime), 'predictedPostAt' (datetime), 'pollIntervalSeconds' (float).
+              All None when there is no post date to predict from.
+    """
+    now = now or datetime.now(timezone.utc)
+    last_post = _parse_date((posting_model or {}).get('lastPostAt')) or _parse_date(lastBuildDate)
+    if last_post is None:
+        return {'nextBuildAt': None, 'predictedPostAt': None, 'pollIntervalSeconds': None}
+
+    gaps = [gap for gap in (posting_model or {}).get('recentGaps') or [] if gap > 0]
+    if len(gaps) < POSTING_MODEL_MIN_GAPS:
+        gaps = _cadence_gaps(cadence_stats) or gaps
+    if not gaps:
+        try:
+            gaps = [float(postFrequency) * 24] if postFrequency is not None and float(postFrequency) > 0 else []
+        except (ValueError, TypeError):
+            gaps = []
+    gaps = gaps or [DEFAULT_POST_GAP_DAYS * 24.0]
+
+    predicted_post = _predict_next_post(posting_model, last_post, gaps)
+    next_build = predicted_post + timedelta(minutes=BUILD_POST_LAG_MINUTES)
+
+    if next_build <= now:
+        # Overdue: poll more often for a regular publisher, less often the longer it stays quiet
+        overdue_hours = (now - predicted_post).total_seconds() / 3600.0
+        interval_hours = max(_quantile(sorted(gaps), 0.5) / 4, overdue_hours / 2)
+        interval_hours = min(max(interval_hours, BUILD_MIN_POLL_HOURS), BUILD_MAX_POLL_HOURS)
+        next_build = now + timedelta(hours=interval_hours)
+    else:
+        next_build = min(max(next_build, now + timedelta(hours=BUILD_MIN_POLL_HOURS)),
+                         now + timedelta(hours=BUILD_MAX_POLL_HOURS))
+
+    return {
+        'nextBuildAt': next_build,
+        'predictedPostAt': predicted_post,
+        'pollIntervalSeconds': (next_build - now).total_seconds()
+    }
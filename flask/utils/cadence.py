@@ -0,0 +1,100 @@
+import math
+
+SECONDS_PER_DAY = 86400.0
+
+
+def new_cadence_stats():
+    """
+    Returns empty cadence stats. Stored on the newsletter document as 'cadenceStats':
+    - 'count' (int): number of intervals folded in
+    - 'mean' (float): mean interval in days
+    - 'm2' (float): sum of squared differences from the mean (Welford), in days^2
+    - 'min' / 'max' (float): shortest / longest interval in days, None before the first interval
+    - 'seeded' (int): how many of the intervals were seeded rather than observed (see seed_cadence_stats)
+    """
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None, 'seeded': 0}
+
+
+def seed_cadence_stats(numberOfPosts, postFrequency):
+    """
+    Cadence stats for a newsletter stored before 'cadenceStats' existed, when it has at least one
+    interval (numberOfPosts > 1): a single seeded interval of postFrequency days. The legacy postFrequency
+    is weighted as one interval, so observed intervals quickly outweigh it, and the seeded interval isn't
+    counted towards the confidence (see cadence_summary), which has to build up from observed intervals.
+    """
+    stats = new_cadence_stats()
+    try:
+        count = max(int(numberOfPosts or 0) - 1, 0)
+        mean = float(postFrequency) if postFrequency is not None else None
+    except (ValueError, TypeError):
+        return stats
+    if count and mean is not None and mean >= 0:
+        stats['count'] = 1
+        stats['mean'] = mean
+        stats['seeded'] = 1
+    return stats
+
+
+def add_interval(stats, interval_days):
+    """
+    Folds one interval (in days) into stats in O(1) and returns the new stats (the input isn't modified).
+    """
+    count = stats['count'] + 1
+    delta = interval_days - stats['mean']
+    mean = stats['mean'] + delta / count
+    return {
+        'count': count,
+        'mean': mean,
+        'm2': stats['m2'] + delta * (interval_days - mean),
+        'min': interval_days if stats['min'] is None else min(stats['min'], interval_days),
+        'max': interval_days if stats['max'] is None else max(stats['max'], interval_days),
+        'seeded': stats.get('seeded', 0)
+    }
+
+
+def update_cadence_stats(stats, post_timestamps, previous_timestamp=None):
+    """
+    Folds the intervals between new posts into cadence stats.
+
+    Args:
+        stats (dict): Existing stats (see new_cadence_stats), or None to start new ones
+        post_timestamps (list): Publish times of the new posts as epoch seconds, in any order
+        previous_timestamp (float, optional): Publish time of the latest post already counted, so the
+            interval up to the oldest new post is counted too
+
+    Returns:
+        dict: The updated stats
+    """
+    stats = dict(stats) if stats else new_cadence_stats()
+    previous = previous_timestamp
+    for timestamp in sorted(t for t in post_timestamps if t is not None):
+        if previous is not None and timestamp > previous:
+            stats = add_interval(stats, (timestamp - previous) / SECONDS_PER_DAY)
+        if previous is None or timestamp > previous:
+            previous = timestamp
+    return stats
+
+
+def cadence_summary(stats):
+    """
+    Returns {'mean', 'stddev', 'min', 'max', 'count', 'confidence'} for cadence stats, intervals in days.
+    confidence (0..1) is 1 minus the standard error of the mean relative to the mean: close to 1 for
+    a long, regular history and 0 with fewer than two observed (not seeded) intervals.
+    """
+    stats = stats or new_cadence_stats()
+    count = stats['count']
+    observed = count - stats.get('seeded', 0)
+    mean = stats['mean'] if count else None
+    variance = stats['m2'] / (count - 1) if count > 1 else None
+    stddev = math.sqrt(max(variance, 0.0)) if variance is not None else None
+    confidence = 0.0
+    if stddev is not None and mean and observed > 1:
+        confidence = max(0.0, 1.0 - (stddev / math.sqrt(observed)) / mean)
+    return {
+        'mean': mean,
+        'stddev': stddev,
+        'min': stats['min'],
+        'max': stats['max'],
+        'count': count,
+        'confidence': confidence
+    }
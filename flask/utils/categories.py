@@ -1,11 +1,38 @@
 import os
+import math
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from atproto import Client, models
 
 from utils.utils import fetch_json
 from utils.endpoints import SUBSTACK_BESTSELLERS_ENDPOINT, PDS_USERNAME_EXTENSION
+from utils.session_store import login_with_stored_session
+from utils.handle_resolver import handle_resolver
+from utils.leaderboard_cache import leaderboard_snapshots
+from utils.list_mirror import get_list_mirror, list_item_rkey
+from utils.repo_writes import apply_writes_in_batches, create_write, delete_write
+
+# Leaderboard pages fetched at the same time once the first page shows `more`
+LEADERBOARD_FETCH_WORKERS = int(os.environ.get('LEADERBOARD_FETCH_WORKERS', 4))
+
+
+def _leaderboard_items(data):
+    items = data.get("items") if isinstance(data, dict) else None
+    return items if isinstance(items, list) else []
+
+
+def _leaderboard_more(data):
+    return bool(data.get("more")) if isinstance(data, dict) else False
+
+
+def _fetch_leaderboard_page(id, page):
+    try:
+        return fetch_json(SUBSTACK_BESTSELLERS_ENDPOINT.format(id=id, page=page))
+    except Exception as e:
+        return e
+
 
 class Categories:
     """Utility methods for working with Substack categories."""
@@ -21,25 +48,41 @@ class Categories:
             raise ValueError("Both handle and app password are required to authenticate the Bluesky client.")
 
         self.client = Client()
-        self.client.login(handle, app_password)
+        login_with_stored_session(self.client, handle, app_password)
 
     def getBestsellers(self, id: str, count: int = 100) -> List[str]:
         """
         Fetches the paid leaderboard for a category and returns up to `count`
-        subdomains of the publications listed.
+        subdomains of the publications listed. Results are shared through a snapshot
+        cache (LEADERBOARD_SNAPSHOT_TTL_SECONDS), so repeated calls within the TTL don't refetch.
 
         :param id: str - Category identifier used in the endpoint path.
         :param count: int - Maximum number of subdomains to return.
         :return: list[str] - Subdomains extracted from the leaderboard items.
         """
-        subdomains: List[str] = []
-        page = 0
-        while len(subdomains) < count:
-            url = SUBSTACK_BESTSELLERS_ENDPOINT.format(id=id, page=page)
-            data = fetch_json(url)
+        return list(leaderboard_snapshots.get((id, count), lambda: tuple(self._fetchBestsellers(id, count))))
+
+    def _fetchBestsellers(self, id: str, count: int) -> List[str]:
+        """
+        Reads leaderboard pages until `count` subdomains are found. The first page is read alone; if it
+        shows `more`, the remaining pages needed for `count` are requested concurrently
+        (LEADERBOARD_FETCH_WORKERS) and consumed in page order.
+        """
+        first_page = fetch_json(SUBSTACK_BESTSELLERS_ENDPOINT.format(id=id, page=0))
+        pages = [first_page]
+        page_size = len(_leaderboard_items(first_page))
+        if page_size and _leaderboard_more(first_page) and page_size < count:
+            page_numbers = range(1, math.ceil(count / page_size))
+            with ThreadPoolExecutor(max_workers=max(1, min(LEADERBOARD_FETCH_WORKERS, len(page_numbers)))) as executor:
+                pages.extend(executor.map(_fetch_leaderboard_page, [id] * len(page_numbers), page_numbers))
 
-            items = data.get("items") if isinstance(data, dict) else None
-            if not isinstance(items, list) or not items:
+        subdomains: List[str] = []
+        for data in pages:
+            # Pages past the end are requested speculatively; their errors only count if they're reached
+            if isinstance(data, Exception):
+                raise data
+            items = _leaderboard_items(data)
+            if not items:
                 break
 
             for item in items:
@@ -54,23 +97,20 @@ class Categories:
                 if isinstance(subdomain, str) and subdomain:
                     subdomains.append(subdomain + PDS_USERNAME_EXTENSION)
 
-            more = data.get("more") if isinstance(data, dict) else False
-            if not more:
+            if len(subdomains) >= count or not _leaderboard_more(data):
                 break
 
-            page += 1
-
         return subdomains
 
-    def getListMembers(self, list_uri: str, page_limit: int = 100) -> List[str]:
+    def getListItems(self, list_uri: str, page_limit: int = 100) -> List[tuple[str, str, str]]:
         """
-        Retrieves the usernames of accounts contained within a Bluesky list.
+        Reads every item of a Bluesky list from the PDS (app.bsky.graph.getList).
 
         :param list_uri: The URI identifying the list to query.
         :param page_limit: Maximum number of items to request per API call.
-        :return: list[str] - Handles of list members.
+        :return: list[tuple] - (handle, did, rkey) of each list item.
         """
-        usernames: List[str] = []
+        items: List[tuple[str, str, str]] = []
         cursor: str | None = None
 
         while True:
@@ -80,61 +120,147 @@ class Categories:
             for item in getattr(response, "items", []) or []:
                 subject = getattr(item, "subject", None)
                 handle = getattr(subject, "handle", None)
+                did = getattr(subject, "did", None)
                 if isinstance(handle, str) and handle:
-                    usernames.append(handle)
+                    items.append((handle, did, list_item_rkey(getattr(item, "uri", None))))
 
             cursor = getattr(response, "cursor", None)
             if not cursor:
                 break
 
-        return usernames
+        return items
+
+    def getListMembers(self, list_uri: str, page_limit: int = 100) -> List[str]:
+        """
+        Retrieves the usernames of accounts contained within a Bluesky list, from the list
+        membership mirror (see utils/list_mirror.py). A list without a mirror yet is read from the PDS.
+
+        :param list_uri: The URI identifying the list to query.
+        :param page_limit: Maximum number of items to request per API call.
+        :return: list[str] - Handles of list members.
+        """
+        return list(get_list_mirror().get_handles(list_uri, lambda: self.getListItems(list_uri, page_limit)))
+
+    def isListMember(self, list_uri: str, username: str, fresh: bool = False) -> bool:
+        """
+        Checks whether a handle is a member of a Bluesky list, using the list membership mirror.
+
+        :param list_uri: The URI identifying the list.
+        :param username: The handle to look for.
+        :param fresh: If the cached mirror says no, also look up this one member in the mirror backend,
+            to see additions by other instances since the list was loaded in this process.
+        :return: bool - True if the handle is in the list.
+        """
+        mirror = get_list_mirror()
+        if mirror.contains(list_uri, username, lambda: self.getListItems(list_uri)):
+            return True
+        if not fresh:
+            return False
+        did = handle_resolver.resolve_many(self.client, [username]).get(username)
+        return bool(did) and mirror.has_member(list_uri, did)
+
+    def reconcileListMirror(self, list_uri: str) -> dict:
+        """
+        Replaces the list membership mirror of a list with its current state on the PDS.
+
+        :param list_uri: The URI identifying the list.
+        :return: dict - {"members", "added", "removed"} counts (see ListMembershipMirror.reconcile).
+        """
+        return get_list_mirror().reconcile(list_uri, lambda: self.getListItems(list_uri))
 
     def addUsersToList(self, usernames: List[str], list_uri: str) -> tuple[int, int, List[str]]:
         """
-        Adds multiple usernames (handles) to an atproto list.
+        Adds multiple usernames (handles) to an atproto list (see updateListMembers).
 
         :param usernames: List of Bluesky handles (e.g., ["alice.bsky.social", "bob.bsky.social"]).
         :param list_uri: The URI of the list to add users to.
-        :return: Tuple of (successful_count, failed_count, failed_usernames) - number of successfully added users, number of failed attempts, and list of failed usernames.
+        :return: Tuple of (successful_count, failed_count, failed_usernames) - number of successful additions, number of failed attempts, and list of failed usernames.
+        """
+        added, _, failed, failed_usernames = self.updateListMembers(list_uri, usernames)
+        return (added, failed, failed_usernames)
+
+    def updateListMembers(self, list_uri: str, add_usernames: List[str],
+                          remove_usernames: List[str] | None = None) -> tuple[int, int, int, List[str]]:
         """
-        successful = 0
+        Adds usernames (handles) to an atproto list and removes others from it.
+
+        Handles are resolved in batches (cached getProfiles lookups) and the listitem creates and
+        deletes are grouped into com.atproto.repo.applyWrites calls (APPLY_WRITES_BATCH_SIZE per call);
+        a rejected batch is retried write by write, so failures are still reported per username.
+        Removals look up the listitem rkeys in the list membership mirror.
+
+        :param list_uri: The URI of the list to update.
+        :param add_usernames: List of Bluesky handles to add.
+        :param remove_usernames: Optional list of handles to remove.
+        :return: Tuple of (added_count, removed_count, failed_count, failed_usernames).
+        """
+        added = 0
+        removed = 0
         failed = 0
         failed_usernames: List[str] = []
+        remove_usernames = remove_usernames or []
+
+        def fail(username):
+            nonlocal failed
+            failed += 1
+            failed_usernames.append(username if username else "<empty>")
+
+        # Resolve all handles up front (cached, batched getProfiles lookups); DIDs pass through as-is
+        resolved_dids = handle_resolver.resolve_many(self.client, add_usernames)
 
-        for username in usernames:
+        writes = []
+        targets: List[tuple[str, str, str]] = []
+        created_at = datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+        for username in add_usernames:
             if not isinstance(username, str) or not username:
-                failed += 1
-                failed_usernames.append(username if username else "<empty>")
+                fail(username)
                 continue
 
-            # Resolve handle to DID if it's not already a DID
-            if username.startswith("did:"):
-                did = username
-            else:
-                try:
-                    did = self.client.resolve_handle(username).did
-                except Exception as e:
-                    print(f"Error resolving handle '{username}': {e}")
-                    failed += 1
-                    failed_usernames.append(username)
-                    continue
+            did = resolved_dids.get(username)
+            if not did:
+                fail(username)
+                continue
 
             # Create list item record
-            created_at = datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
             record = models.AppBskyGraphListitem.Record(subject=did, list=list_uri, created_at=created_at)
-            data = models.ComAtprotoRepoCreateRecord.Data(
-                repo=self.client.me.did,
-                collection=models.ids.AppBskyGraphListitem,
-                record=record,
-            )
-
-            try:
-                res = self.client.com.atproto.repo.create_record(data)
-                successful += 1
-            except Exception as e:
-                print(f"Error adding user '{username}' (did: '{did}') to list: {e}")
-                failed += 1
-                failed_usernames.append(username)
+            writes.append(create_write(models.ids.AppBskyGraphListitem, record))
+            targets.append(("add", username, did))
+
+        if remove_usernames:
+            members = get_list_mirror().get_members(list_uri, lambda: self.getListItems(list_uri))
+            items_by_handle = {member.get("handle"): (did, member.get("rkey")) for did, member in members.items()}
+            for username in remove_usernames:
+                did, rkey = items_by_handle.get(username, (None, None))
+                if not rkey:
+                    print(f"Can't remove '{username}' from list: not in the list mirror")
+                    fail(username)
+                    continue
+                writes.append(delete_write(models.ids.AppBskyGraphListitem, rkey))
+                targets.append(("remove", username, did))
+
+        added_items: List[tuple[str, str, str]] = []
+        removed_dids: List[str] = []
+        for (action, username, did), result in zip(targets, apply_writes_in_batches(self.client, writes)):
+            if isinstance(result, Exception):
+                print(f"Error {'adding' if action == 'add' else 'removing'} user '{username}' (did: '{did}') {'to' if action == 'add' else 'from'} list: {result}")
+                fail(username)
                 continue
+            if action == "add":
+                added += 1
+                # Older PDS versions don't return per-write results; reconciliation fills in the rkey
+                added_items.append((username, did, list_item_rkey(getattr(result, "uri", None))))
+            else:
+                removed += 1
+                removed_dids.append(did)
+
+        # Keep the list membership mirror in step with the PDS
+        try:
+            get_list_mirror().record_added(list_uri, added_items)
+        except Exception as e:
+            print(f"Error recording additions in list mirror for {list_uri}: {e}")
+        try:
+            get_list_mirror().record_removed(list_uri, removed_dids)
+        except Exception as e:
+            print(f"Error recording removals in list mirror for {list_uri}: {e}")
 
-        return (successful, failed, failed_usernames)
\ No newline at end of file
+        return (added, removed, failed, failed_usernames)
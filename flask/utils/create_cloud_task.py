@@ -1,14 +1,44 @@
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from google.cloud import tasks_v2
 from google.protobuf import timestamp_pb2
 from utils.utils import is_localhost
+from utils.local_task_queue import local_task_queue
+
+CLOUD_TASKS_BULK_WORKERS = int(os.environ.get('CLOUD_TASKS_BULK_WORKERS', 16))
+
+_tasks_client = None
+_tasks_client_lock = threading.Lock()
+
+
+def get_tasks_client():
+    """
+    Returns the process-wide CloudTasksClient (its gRPC channel is reused across calls and threads).
+    """
+    global _tasks_client
+    if _tasks_client is None:
+        with _tasks_client_lock:
+            if _tasks_client is None:
+                _tasks_client = tasks_v2.CloudTasksClient()
+    return _tasks_client
+
+
+def get_task_backend():
+    """
+    Returns where tasks are sent, from TASK_BACKEND: 'cloud' (Cloud Tasks), 'local' (in-process
+    LocalTaskQueue) or 'none' (dropped with a warning). Defaults to 'local' with ENVIRONMENT=local,
+    'cloud' otherwise.
+    """
+    return os.environ.get('TASK_BACKEND', 'local' if is_localhost() else 'cloud')
+
 
 def create_cloud_task(
-        endpoint: str, 
-        payload: dict, 
-        queue_name: str = os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default'), 
+        endpoint: str,
+        payload: dict,
+        queue_name: str = os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default'),
         task_name: str = None,
         delay_seconds: int = None,
         headers: dict = None
@@ -16,6 +46,7 @@ def create_cloud_task(
     """
     Creates a Google Cloud Task with the specified endpoint and payload.
     Optionally sets a custom task name and delay.
+    With the local task backend the task is run in-process instead (see get_task_backend).
 
     Args:
         endpoint (str): The endpoint URL where the task will be sent
@@ -27,11 +58,13 @@ def create_cloud_task(
     Returns:
         dict: Response containing task information or error details
     """
-    if not is_localhost():
+    backend = get_task_backend()
+    if backend == 'local':
+        return local_task_queue.enqueue(endpoint, payload, queue_name, task_name, delay_seconds, headers)
+    elif backend == 'cloud':
         try:
             project_id = os.environ.get('GOOGLE_CLOUD_PROJECT')
             location = os.environ.get('CLOUD_TASKS_LOCATION', 'us-central1')
-            queue_name = queue_name
 
             if not project_id:
                 return {
@@ -39,7 +72,7 @@ def create_cloud_task(
                     "message": "GOOGLE_CLOUD_PROJECT environment variable not set"
                 }
 
-            client = tasks_v2.CloudTasksClient()
+            client = get_tasks_client()
             parent = client.queue_path(project_id, location, queue_name)
 
             request_headers = {
@@ -84,5 +117,42 @@ def create_cloud_task(
     else:
         return {
             "status": "warning",
-            "message": "Can't run Cloud Tasks locally"
-        }
\ No newline at end of file
+            "message": f"Task not created, task backend is '{backend}'"
+        }
+
+
+def create_cloud_tasks(
+        tasks: list,
+        queue_name: str = os.environ.get('CLOUD_TASKS_CREATE_AND_BUILD_QUEUE', 'default'),
+        headers: dict = None,
+        max_workers: int = CLOUD_TASKS_BULK_WORKERS
+    ):
+    """
+    Creates many Cloud Tasks in the same queue concurrently, using a bounded thread pool
+    and the shared CloudTasksClient.
+
+    Args:
+        tasks (list): (endpoint, payload, delay_seconds, task_name) tuples; delay_seconds and task_name may be None
+        queue_name (str): Queue name
+        headers (dict, optional): Extra headers sent with every task
+        max_workers (int): Maximum concurrent create_task calls
+
+    Returns:
+        list: One create_cloud_task response dict per task, in the same order as tasks
+    """
+    if not tasks:
+        return []
+
+    def create(task):
+        endpoint, payload, delay_seconds, task_name = task
+        return create_cloud_task(
+            endpoint,
+            payload,
+            queue_name,
+            task_name=task_name,
+            delay_seconds=delay_seconds,
+            headers=headers
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks)))) as executor:
+        return list(executor.map(create, tasks))
@@ -0,0 +1,195 @@
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+from utils.http_client import get_http_client
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+RSS_ITEM_TAGS = ('item', ATOM_NS + 'entry')
+FEED_VALIDATOR_CACHE_MAX_ENTRIES = int(os.environ.get('FEED_VALIDATOR_CACHE_MAX_ENTRIES', 10000))
+
+
+class FeedEntry(NamedTuple):
+    title: Optional[str]
+    summary: Optional[str]
+    link: Optional[str]
+    published: Optional[datetime]   # UTC, None when missing or unparseable
+    image_url: Optional[str]        # first image enclosure
+
+
+def _parse_feed_date(value):
+    """
+    Parses an RSS (RFC 822) or Atom (ISO 8601) date to an aware UTC datetime, or None.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    return child.text if child is not None else None
+
+
+def _rss_entry(item):
+    image_url = None
+    for enclosure in item.iter('enclosure'):
+        if enclosure.get('type', '').startswith('image/') and enclosure.get('url'):
+            image_url = enclosure.get('url')
+            break
+    return FeedEntry(
+        title=_text(item, 'title'),
+        summary=_text(item, 'description'),
+        link=(_text(item, 'link') or '').strip() or None,
+        published=_parse_feed_date(_text(item, 'pubDate')),
+        image_url=image_url
+    )
+
+
+def _atom_entry(entry):
+    link, image_url = None, None
+    for link_element in entry.iter(ATOM_NS + 'link'):
+        rel = link_element.get('rel', 'alternate')
+        if rel == 'alternate' and link is None:
+            link = link_element.get('href')
+        elif rel == 'enclosure' and image_url is None and link_element.get('type', '').startswith('image/'):
+            image_url = link_element.get('href')
+    return FeedEntry(
+        title=_text(entry, ATOM_NS + 'title'),
+        summary=_text(entry, ATOM_NS + 'summary') or _text(entry, ATOM_NS + 'content'),
+        link=link,
+        published=_parse_feed_date(_text(entry, ATOM_NS + 'published') or _text(entry, ATOM_NS + 'updated')),
+        image_url=image_url
+    )
+
+
+def iter_feed_entries(source):
+    """
+    Incrementally parses an RSS 2.0 or Atom feed, yielding a FeedEntry per item/entry as soon as its
+    closing tag is read. Parsed items are cleared, and nothing after the last consumed entry is read,
+    so a caller that stops early doesn't pay for the rest of the feed.
+
+    Args:
+        source: A binary file-like object (e.g. a streamed response's raw body) or a file path.
+    """
+    for _, element in ET.iterparse(source, events=('end',)):
+        if element.tag == 'item':
+            yield _rss_entry(element)
+            element.clear()
+        elif element.tag == ATOM_NS + 'entry':
+            yield _atom_entry(element)
+            element.clear()
+
+
+class FeedReader:
+    """
+    Reads the entries of a feed newer than a cutoff, stopping at the first older one.
+
+    Feeds are fetched through the shared HTTP client and streamed into iter_feed_entries. The ETag /
+    Last-Modified of each feed is remembered (LRU, FEED_VALIDATOR_CACHE_MAX_ENTRIES feeds) along with
+    the newest entry date it contained. When that date isn't newer than the caller's cutoff, the
+    request is conditional, so an unchanged feed costs a 304 and no parsing.
+    """
+
+    def __init__(self, max_entries=FEED_VALIDATOR_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "not_modified": 0, "entries_parsed": 0}
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _conditional_headers(self, feed_url, since_timestamp):
+        with self._lock:
+            validators = self._validators.get(feed_url)
+            if validators is not None:
+                self._validators.move_to_end(feed_url)
+        if not validators or since_timestamp is None or validators["latest"] is None:
+            return {}
+        if validators["latest"] > since_timestamp:
+            return {}  # The cached version has entries the caller hasn't seen, so a 304 wouldn't do
+        headers = {}
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def _remember(self, feed_url, response, latest):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._validators.pop(feed_url, None)
+                return
+            self._validators[feed_url] = {"etag": etag, "last_modified": last_modified, "latest": latest}
+            self._validators.move_to_end(feed_url)
+            while len(self._validators) > self.max_entries:
+                self._validators.popitem(last=False)
+
+    def read_since(self, feed_url, since_timestamp):
+        """
+        Returns the feed's entries published after since_timestamp, in feed order (newest first).
+        Entries without a parseable date are skipped. Raises on HTTP errors.
+
+        Args:
+            feed_url (str): The feed URL.
+            since_timestamp (float | None): Cutoff as epoch seconds; None reads every entry.
+
+        Returns:
+            list[FeedEntry]: The new entries (empty when the feed is unchanged).
+        """
+        self._count("requests")
+        response = get_http_client().get(
+            feed_url, headers=self._conditional_headers(feed_url, since_timestamp), stream=True
+        )
+        try:
+            if response.status_code == 304:
+                self._count("not_modified")
+                return []
+            response.raise_for_status()
+            response.raw.decode_content = True
+
+            entries = []
+            latest = None
+            parsed = 0
+            for entry in iter_feed_entries(response.raw):
+                parsed += 1
+                if entry.published is None:
+                    continue
+                published_at = entry.published.timestamp()
+                latest = published_at if latest is None else max(latest, published_at)
+                if since_timestamp is not None and published_at <= since_timestamp:
+                    break  # Feeds are newest first: everything after is older too
+                entries.append(entry)
+            self._count("entries_parsed", parsed)
+            self._remember(feed_url, response, latest)
+            return entries
+        finally:
+            response.close()
+
+    def get_stats(self):
+        """
+        Returns request, 304 and parsed-entry counters, and the number of feeds with stored validators.
+        """
+        with self._lock:
+            return {**self._counters, "feeds": len(self._validators)}
+
+
+feed_reader = FeedReader()
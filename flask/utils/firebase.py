@@ -1,14 +1,108 @@
 import os
-import requests
 import datetime
+import threading
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
 from utils.endpoints import ALL_NEWSLETTERS_STATIC_JSON
+from utils.http_client import get_http_client
+from utils.build_schedule import predict_next_build
+
+# Page size for cursor-paginated scans of the newsletters collection
+NEWSLETTER_QUERY_PAGE_SIZE = 500
+BUILD_CHECK_FIELDS = ["sub_domain", "lastBuildDate", "numberOfPostsAdded", "postFrequency", "skipPostFrequencyCheck"]
+# Firestore rejects write batches with more than 500 operations
+MAX_BATCH_WRITES = 500
+# Marker document recording that backfillNextBuildAt has run (collection, document)
+NEXT_BUILD_AT_BACKFILL_MARKER = ("migrations", "nextBuildAt")
+
+def compute_next_build_at(lastBuildDate, postFrequency, postingModel=None, cadenceStats=None):
+    """
+    Returns when a newsletter is next due to be built, predicted from its posting cadence
+    (see utils/build_schedule.py).
+    :param lastBuildDate: str - ISO 8601 with 'Z'
+    :param postFrequency: number of days | None
+    :param postingModel: dict | None - weekday/hour histogram and recent gaps
+    :param cadenceStats: dict | None - long-run interval stats (see utils/cadence.py)
+    :return: datetime (UTC) | None when there is no lastBuildDate (never due)
+    """
+    return predict_next_build(lastBuildDate, postFrequency, postingModel, cadence_stats=cadenceStats)["nextBuildAt"]
+
+class BatchedWriter:
+    """
+    Groups Firestore writes into WriteBatch commits of up to max_writes operations each.
+    Use through FirebaseClient.batch(); pending writes are committed when the with-block exits
+    (or on flush()), and discarded if the block raises.
+    """
+    def __init__(self, db, max_writes=MAX_BATCH_WRITES):
+        self.db = db
+        self.max_writes = max_writes
+        self._batch = None
+        self._pending = 0
+        self.committed = 0
+
+    def _add(self, operation, *args, **kwargs):
+        if self._batch is None:
+            self._batch = self.db.batch()
+        getattr(self._batch, operation)(*args, **kwargs)
+        self._pending += 1
+        if self._pending >= self.max_writes:
+            self.flush()
+
+    def set(self, collection_name, document_id, data, merge=False):
+        self._add("set", self.db.collection(collection_name).document(document_id), data, merge=merge)
+
+    def update(self, collection_name, document_id, data):
+        self._add("update", self.db.collection(collection_name).document(document_id), data)
+
+    def increment(self, collection_name, document_id, field, amount=1, extra_fields=None):
+        """
+        Queues a server-side increment of field (creating the document if needed), plus any extra_fields.
+        """
+        data = {**(extra_fields or {}), field: firestore.Increment(amount)}
+        self.set(collection_name, document_id, data, merge=True)
+
+    def delete(self, collection_name, document_id):
+        self._add("delete", self.db.collection(collection_name).document(document_id))
+
+    def flush(self):
+        """
+        Commits pending writes, if any.
+        """
+        if self._batch is not None and self._pending:
+            self._batch.commit()
+            self.committed += self._pending
+        self._batch = None
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
 
 class FirebaseClient:
+    """
+    Firestore access for the service. Use get_firebase_client() instead of constructing it:
+    the Firestore client (and its gRPC channel) is created lazily on first use and shared process-wide.
+    """
     def __init__(self):
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._next_build_at_backfilled = False
+
+    @property
+    def db(self):
+        if self._db is None:
+            with self._db_lock:
+                if self._db is None:
+                    self._db = self._create_db()
+        return self._db
+
+    def _create_db(self):
         creds_dict = {
             "type": os.environ.get("FIREBASE_TYPE"),
             "project_id": os.environ.get("FIREBASE_PROJECT_ID"),
@@ -25,7 +119,36 @@ class FirebaseClient:
         cred = credentials.Certificate(creds_dict)
         if not firebase_admin._apps:
             firebase_admin.initialize_app(cred)
-        self.db = firestore.client()
+        return firestore.client()
+
+    def warmup(self):
+        """
+        Creates the Firestore client and opens its channel with a minimal read, so the first
+        real request doesn't pay for it.
+        """
+        self.db.collection("newsletters").select([]).limit(1).get()
+
+    def batch(self, max_writes=MAX_BATCH_WRITES):
+        """
+        Returns a BatchedWriter for grouping many writes into few commits:
+            with firebase.batch() as batch:
+                batch.update("newsletters", subdomain, {...})
+        :param max_writes: int - operations per commit (Firestore allows at most 500)
+        """
+        return BatchedWriter(self.db, max_writes=max_writes)
+
+    def increment(self, collection_name, document_id, field, amount=1, extra_fields=None):
+        """
+        Atomically adds amount to a numeric field on the server (no read, safe under concurrent writers).
+        Creates the document if it doesn't exist. A missing or non-numeric field is treated as 0.
+        :param collection_name: str
+        :param document_id: str
+        :param field: str
+        :param amount: int
+        :param extra_fields: dict | None - other fields to set in the same write
+        """
+        data = {**(extra_fields or {}), field: firestore.Increment(amount)}
+        self.db.collection(collection_name).document(document_id).set(data, merge=True)
 
     def add_to_collection(self, collection_name, document_id, data):
         """
@@ -53,7 +176,7 @@ class FirebaseClient:
         }
         return self.add_to_collection("categories", id, data)
 
-    def createNewsletter(self, publication_id, name, sub_domain, custom_domain, hero_text, logo_url, lastBuildDate, postFrequency, numberOfPostsAdded, oldestPostDate, isDormant = False):
+    def createNewsletter(self, publication_id, name, sub_domain, custom_domain, hero_text, logo_url, lastBuildDate, postFrequency, numberOfPostsAdded, oldestPostDate, isDormant = False, postingModel = None, archiveCursor = None, cadenceStats = None):
         """
         Creates or updates a newsletter document in the 'newsletters' collection.
         :param publication_id: str
@@ -66,6 +189,9 @@ class FirebaseClient:
         :param postFrequency: any
         :param numberOfPostsAdded: any
         :param skipPostFrequencyCheck: bool
+        :param postingModel: dict | None - see utils/build_schedule.update_posting_model
+        :param archiveCursor: dict | None - archive position of the oldest imported post ({offset, postId})
+        :param cadenceStats: dict | None - streaming post interval stats, see utils/cadence.py
         """
         data = {
             "publication_id": publication_id,
@@ -78,7 +204,11 @@ class FirebaseClient:
             "postFrequency": postFrequency,
             "numberOfPostsAdded": numberOfPostsAdded,
             "skipPostFrequencyCheck": False,
+            "postingModel": postingModel,
+            "cadenceStats": cadenceStats,
+            "nextBuildAt": compute_next_build_at(lastBuildDate, postFrequency, postingModel, cadenceStats),
             "oldestPostDate": oldestPostDate,
+            "archiveCursor": archiveCursor,
             "isDormant": isDormant
         }
         self.add_to_collection("newsletters", sub_domain, data)
@@ -98,103 +228,181 @@ class FirebaseClient:
         }
         doc_ref.update(update_data)
 
-    def updateLastBuildDetails(self, subdomain, lastBuildDate, numberOfPostsAdded, postFrequency):
+    def updateLastBuildDetails(self, subdomain, lastBuildDate, numberOfPostsAdded, postFrequency, postingModel = None, cadenceStats = None):
         """
-        Updates lastBuildDate, numberOfPostsAdded, and postFrequency for a newsletter by subdomain, keeping other fields unchanged.
+        Updates lastBuildDate, numberOfPostsAdded, and postFrequency (and the derived nextBuildAt) for a newsletter by subdomain, keeping other fields unchanged.
         :param subdomain: str
         :param lastBuildDate: str
         :param numberOfPostsAdded: any
         :param postFrequency: any
+        :param postingModel: dict | None - updated posting model, stored when given
+        :param cadenceStats: dict | None - updated cadence stats, stored when given
         """
         doc_ref = self.db.collection("newsletters").document(subdomain)
         update_data = {
             "lastBuildDate": lastBuildDate,
             "numberOfPostsAdded": numberOfPostsAdded,
-            "postFrequency": postFrequency
+            "postFrequency": postFrequency,
+            "nextBuildAt": compute_next_build_at(lastBuildDate, postFrequency, postingModel, cadenceStats)
         }
+        if postingModel is not None:
+            update_data["postingModel"] = postingModel
+        if cadenceStats is not None:
+            update_data["cadenceStats"] = cadenceStats
         doc_ref.update(update_data)
 
-    def updateNumPosts(self, subdomain, numberOfPostsAddedNow, oldestPostDate):
+    def getBuildState(self, subdomain):
+        """
+        Returns the posting model and cadence stats stored for a newsletter, read in one request.
+        :param subdomain: str
+        :return: dict - {"postingModel": dict | None, "cadenceStats": dict | None}
+        """
+        doc = self.db.collection("newsletters").document(subdomain).get(field_paths=["postingModel", "cadenceStats"])
+        data = (doc.to_dict() or {}) if doc.exists else {}
+        return {"postingModel": data.get("postingModel"), "cadenceStats": data.get("cadenceStats")}
+
+    def updateNumPosts(self, subdomain, numberOfPostsAddedNow, oldestPostDate, archiveCursor = None):
         """
         Updates numberOfPostsAdded by adding numberOfPostsAddedNow to the existing count for a newsletter by subdomain.
+        The addition happens server-side (firestore.Increment), so overlapping tasks don't lose counts.
         Also updates oldestPostDate (required).
         :param subdomain: str
         :param numberOfPostsAddedNow: int - number of posts to add to the existing count
         :param oldestPostDate: str - updates oldestPostDate (required)
+        :param archiveCursor: dict | None - where the older-posts import stopped in the archive ({offset, postId})
         """
-        doc_ref = self.db.collection("newsletters").document(subdomain)
-        doc = doc_ref.get()
-        
-        update_fields = {}
-        if doc.exists:
-            current_data = doc.to_dict()
-            current_posts = current_data.get("numberOfPostsAdded", 0)
-            
-            # Ensure both values are integers for proper addition
-            try:
-                current_posts = int(current_posts) if current_posts is not None else 0
-                new_posts = int(numberOfPostsAddedNow)
-                updated_posts = current_posts + new_posts
-            except (ValueError, TypeError):
-                # If conversion fails, treat as 0
-                updated_posts = 0 + int(numberOfPostsAddedNow) if numberOfPostsAddedNow is not None else 0
-            
-            update_fields["numberOfPostsAdded"] = updated_posts
-            update_fields["oldestPostDate"] = oldestPostDate
-            doc_ref.update(update_fields)
-        else:
-            # If document doesn't exist, create it with the new post count and oldestPostDate
-            update_fields["numberOfPostsAdded"] = numberOfPostsAddedNow
-            update_fields["oldestPostDate"] = oldestPostDate
-            doc_ref.set(update_fields)
+        try:
+            numberOfPostsAddedNow = int(numberOfPostsAddedNow) if numberOfPostsAddedNow is not None else 0
+        except (ValueError, TypeError):
+            numberOfPostsAddedNow = 0
+
+        extra_fields = {"oldestPostDate": oldestPostDate}
+        if archiveCursor is not None:
+            extra_fields["archiveCursor"] = archiveCursor
+        self.increment("newsletters", subdomain, "numberOfPostsAdded", numberOfPostsAddedNow,
+                       extra_fields=extra_fields)
 
     def getNewslettersToBeBuilt(self):
         """
-        Returns a list of newsletters that are due to be built (lastBuildDate + postFrequency < current time).
-        lastBuildDate is in ISO 8601 format, postFrequency is in days.
-        :return: list of dicts with sub_domain, custom_domain, lastBuildDate, numberOfPostsAdded, postFrequency
+        Returns a list of newsletters that are due to be built (nextBuildAt <= current time, where
+        nextBuildAt is predicted from the posting model, see utils/build_schedule.py), plus those flagged
+        with skipPostFrequencyCheck. Newsletters without a postFrequency are included with it set to None.
+        Uses an indexed range query on nextBuildAt with field projection and cursor pagination, so only
+        due documents (and only the fields needed here) are read.
+        Documents created before nextBuildAt existed are backfilled on the first call (see
+        ensureNextBuildAtBackfilled), so they are picked up by the range query.
+        :return: list of dicts with sub_domain, lastBuildDate, numberOfPostsAdded, postFrequency
         """
+        self.ensureNextBuildAtBackfilled()
         now = datetime.datetime.now(datetime.timezone.utc)
-        newsletters_to_build = []
         newsletters_ref = self.db.collection("newsletters")
-        docs = newsletters_ref.stream()
-        for doc in docs:
-            data = doc.to_dict()
+
+        due_query = (
+            newsletters_ref
+            .where(filter=firestore.FieldFilter("nextBuildAt", "<=", now))
+            .order_by("nextBuildAt")
+            .select(BUILD_CHECK_FIELDS)
+        )
+        skip_query = (
+            newsletters_ref
+            .where(filter=firestore.FieldFilter("skipPostFrequencyCheck", "==", True))
+            .select(BUILD_CHECK_FIELDS)
+        )
+
+        newsletters_to_build = []
+        seen_subdomains = set()
+        skip_flag_resets = self.batch()
+        for doc in list(self._paginate(due_query)) + list(self._paginate(skip_query)):
+            data = doc.to_dict() or {}
             lastBuildDate_str = data.get("lastBuildDate")
             postFrequency = data.get("postFrequency")
-
-            try:
-                if lastBuildDate_str:
-                    # Parse ISO 8601 format with 'Z' (e.g., 2024-06-07T12:34:56Z)
-                    lastBuildDate = datetime.datetime.fromisoformat(lastBuildDate_str.replace('Z', '+00:00'))
-                else:
-                    lastBuildDate = None
-            except Exception:
-                lastBuildDate = None
             try:
-                postFrequency = int(postFrequency) if postFrequency is not None else None
+                postFrequency = float(postFrequency) if postFrequency is not None else None
             except Exception:
                 postFrequency = None
 
-            
-            if lastBuildDate and postFrequency is not None:
-                next_build_time = lastBuildDate + datetime.timedelta(days=postFrequency)
-                skip_check = data.get("skipPostFrequencyCheck", False)
-                if next_build_time < now or skip_check:
-                    newsletters_to_build.append({
-                        "sub_domain": data.get("sub_domain"),
-                        "lastBuildDate": lastBuildDate_str,
-                        "numberOfPostsAdded": data.get("numberOfPostsAdded"),
-                        "postFrequency": postFrequency
-                    })
-                    
-                    # If skipPostFrequencyCheck was True, set it to False after adding
-                    if skip_check:
-                        doc_ref = self.db.collection("newsletters").document(data.get("sub_domain"))
-                        doc_ref.update({"skipPostFrequencyCheck": False})
-        
+            sub_domain = data.get("sub_domain")
+            if not lastBuildDate_str or sub_domain in seen_subdomains:
+                continue
+            seen_subdomains.add(sub_domain)
+
+            newsletters_to_build.append({
+                "sub_domain": sub_domain,
+                "lastBuildDate": lastBuildDate_str,
+                "numberOfPostsAdded": data.get("numberOfPostsAdded"),
+                "postFrequency": postFrequency
+            })
+
+            # If skipPostFrequencyCheck was True, set it to False after adding
+            if data.get("skipPostFrequencyCheck", False):
+                skip_flag_resets.update("newsletters", sub_domain, {"skipPostFrequencyCheck": False})
+
+        skip_flag_resets.flush()
         return newsletters_to_build
 
+    def _paginate(self, query, page_size=NEWSLETTER_QUERY_PAGE_SIZE):
+        """
+        Yields document snapshots from query, page by page using start_after cursors.
+        :param query: Firestore query (must have a stable order)
+        :param page_size: int
+        """
+        cursor = None
+        while True:
+            page_query = query.limit(page_size)
+            if cursor is not None:
+                page_query = page_query.start_after(cursor)
+            docs = list(page_query.stream())
+            yield from docs
+            if len(docs) < page_size:
+                break
+            cursor = docs[-1]
+
+    def setSkipPostFrequencyCheck(self, subdomain):
+        """
+        Flags a newsletter to be built on the next build check regardless of its post frequency.
+        :param subdomain: str
+        """
+        doc_ref = self.db.collection("newsletters").document(subdomain)
+        doc_ref.update({
+            "skipPostFrequencyCheck": True,
+            "nextBuildAt": datetime.datetime.now(datetime.timezone.utc)
+        })
+
+    def backfillNextBuildAt(self):
+        """
+        One-off migration: sets nextBuildAt on newsletter documents created before it existed.
+        Run through ensureNextBuildAtBackfilled.
+        :return: int - number of documents updated
+        """
+        updated = 0
+        newsletters_ref = self.db.collection("newsletters")
+        query = newsletters_ref.order_by("__name__").select(["lastBuildDate", "postFrequency", "postingModel", "cadenceStats", "nextBuildAt"])
+        with self.batch() as batch:
+            for doc in self._paginate(query):
+                data = doc.to_dict() or {}
+                if "nextBuildAt" in data:
+                    continue
+                batch.update("newsletters", doc.id, {
+                    "nextBuildAt": compute_next_build_at(data.get("lastBuildDate"), data.get("postFrequency"), data.get("postingModel"), data.get("cadenceStats"))
+                })
+                updated += 1
+        return updated
+
+    def ensureNextBuildAtBackfilled(self):
+        """
+        Runs backfillNextBuildAt unless its marker document says it already ran. The marker is read
+        once per process; the backfill skips documents that already have nextBuildAt, so instances
+        racing on the first run only repeat reads.
+        """
+        if self._next_build_at_backfilled:
+            return
+        marker_ref = self.db.collection(NEXT_BUILD_AT_BACKFILL_MARKER[0]).document(NEXT_BUILD_AT_BACKFILL_MARKER[1])
+        if not marker_ref.get().exists:
+            updated = self.backfillNextBuildAt()
+            marker_ref.set({"completed_at": datetime.datetime.now(datetime.timezone.utc), "updated": updated})
+            print(f"Backfilled nextBuildAt on {updated} newsletters")
+        self._next_build_at_backfilled = True
+
     def checkIfNewsletterExists(self, subdomain):
         """
         Checks if a newsletter document exists in the 'newsletters' collection for the given subdomain.
@@ -221,6 +429,17 @@ class FirebaseClient:
             return []
         return [newsletter.get('subdomain') for newsletter in recommended if 'subdomain' in newsletter]
 
+    def getArchiveCursor(self, subdomain):
+        """
+        Returns the archiveCursor saved by the older-posts import for a newsletter by subdomain.
+        :param subdomain: str
+        :return: dict | None
+        """
+        doc = self.db.collection("newsletters").document(subdomain).get(field_paths=["archiveCursor"])
+        if not doc.exists:
+            return None
+        return (doc.to_dict() or {}).get("archiveCursor")
+
     def getOldestPostDate(self, subdomain):
         """
         Returns the oldestPostDate field for a newsletter by subdomain.
@@ -241,7 +460,7 @@ class FirebaseClient:
         """
         url = ALL_NEWSLETTERS_STATIC_JSON
         try:
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()
             newsletters = response.json()
             if isinstance(newsletters, list):
@@ -258,7 +477,7 @@ class FirebaseClient:
         """
         url = ALL_NEWSLETTERS_STATIC_JSON
         try:
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()
             newsletters = response.json()
             details = []
@@ -346,3 +565,19 @@ class FirebaseClient:
             "created_at": timestamp
         }
         self.add_to_collection("endpoint_failures", timestamp, data)
+
+
+_firebase_client = None
+_firebase_client_lock = threading.Lock()
+
+
+def get_firebase_client():
+    """
+    Returns the process-wide FirebaseClient. Cheap: Firestore itself is only initialized on first use.
+    """
+    global _firebase_client
+    if _firebase_client is None:
+        with _firebase_client_lock:
+            if _firebase_client is None:
+                _firebase_client = FirebaseClient()
+    return _firebase_client
@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+
+from atproto import models
+
+HANDLE_CACHE_TTL_SECONDS = int(os.environ.get('HANDLE_CACHE_TTL_SECONDS', 6 * 3600))
+HANDLE_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get('HANDLE_CACHE_NEGATIVE_TTL_SECONDS', 300))
+HANDLE_CACHE_MAX_ENTRIES = int(os.environ.get('HANDLE_CACHE_MAX_ENTRIES', 10000))
+GET_PROFILES_MAX_ACTORS = 25
+
+
+class HandleResolver:
+    """
+    Process-wide handle -> DID cache shared by every place that turns a handle into a DID.
+
+    Successful resolutions are kept for HANDLE_CACHE_TTL_SECONDS, failures for the (much shorter)
+    HANDLE_CACHE_NEGATIVE_TTL_SECONDS so a handle that doesn't exist yet is retried soon.
+    """
+
+    def __init__(self, ttl_seconds=HANDLE_CACHE_TTL_SECONDS, negative_ttl_seconds=HANDLE_CACHE_NEGATIVE_TTL_SECONDS,
+                 max_entries=HANDLE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+    def _lookup(self, handle):
+        """Returns (found, did); did is None for a cached failure."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None or entry[1] < time.monotonic():
+                self._counters["misses"] += 1
+                return False, None
+            self._counters["hits" if entry[0] else "negative_hits"] += 1
+            return True, entry[0]
+
+    def _store(self, handle, did):
+        ttl = self.ttl_seconds if did else self.negative_ttl_seconds
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[1] >= now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[handle] = (did, time.monotonic() + ttl)
+
+    def resolve(self, client, handle):
+        """
+        Resolves a handle to a DID, using the cache when possible. DIDs are returned as-is.
+
+        Args:
+            client (atproto.Client): Client used on a cache miss.
+            handle (str): The handle, e.g. 'alice.skystack.xyz'.
+
+        Returns:
+            str: The DID.
+
+        Raises:
+            Exception: If the handle can't be resolved (also raised for cached failures).
+        """
+        if handle.startswith("did:"):
+            return handle
+        handle = handle.lower()
+
+        found, did = self._lookup(handle)
+        if found:
+            if did is None:
+                raise ValueError(f"Handle '{handle}' could not be resolved (cached failure)")
+            return did
+        return self._resolve_uncached(client, handle)
+
+    def _resolve_uncached(self, client, handle):
+        try:
+            did = client.resolve_handle(handle).did
+        except Exception:
+            self._store(handle, None)
+            raise
+        self._store(handle, did)
+        return did
+
+    def resolve_many(self, client, handles):
+        """
+        Resolves several handles at once. Cache misses are looked up with app.bsky.actor.getProfiles
+        (up to 25 actors per call); handles the AppView doesn't return fall back to resolveHandle.
+
+        Args:
+            client (atproto.Client): A logged in client.
+            handles (list[str]): Handles (or DIDs).
+
+        Returns:
+            dict: {handle: did} for every handle that resolved. Unresolvable handles are left out.
+        """
+        resolved = {}
+        to_fetch = []
+        for handle in handles:
+            if not isinstance(handle, str) or not handle:
+                continue
+            if handle.startswith("did:"):
+                resolved[handle] = handle
+                continue
+            found, did = self._lookup(handle.lower())
+            if found:
+                if did:
+                    resolved[handle] = did
+            else:
+                to_fetch.append(handle)
+
+        for start in range(0, len(to_fetch), GET_PROFILES_MAX_ACTORS):
+            chunk = to_fetch[start:start + GET_PROFILES_MAX_ACTORS]
+            try:
+                response = client.app.bsky.actor.get_profiles(models.AppBskyActorGetProfiles.Params(actors=chunk))
+                profiles = {profile.handle.lower(): profile.did for profile in response.profiles or []}
+            except Exception as e:
+                print(f"getProfiles failed for {len(chunk)} actors, resolving one by one: {e}")
+                profiles = {}
+
+            for handle in chunk:
+                did = profiles.get(handle.lower())
+                if did:
+                    self._store(handle.lower(), did)
+                    resolved[handle] = did
+                    continue
+                try:
+                    resolved[handle] = self._resolve_uncached(client, handle.lower())
+                except Exception as e:
+                    print(f"Error resolving handle '{handle}': {e}")
+
+        return resolved
+
+    def invalidate(self, handle):
+        """
+        Forgets a handle, e.g. after its account was created or deleted.
+        """
+        with self._lock:
+            self._entries.pop(handle.lower(), None)
+
+    def get_stats(self):
+        """
+        Returns cache counters.
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+handle_resolver = HandleResolver()
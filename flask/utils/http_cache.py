@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+
+from utils.http_client import get_http_client
+
+HTTP_CACHE_BACKEND = os.environ.get('HTTP_CACHE_BACKEND', 'memory')
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', '/tmp/skystack_http_cache')
+HTTP_CACHE_MAX_ENTRIES = int(os.environ.get('HTTP_CACHE_MAX_ENTRIES', 4096))
+# Most response body bytes the memory backend holds in total
+HTTP_CACHE_MAX_MEMORY_BYTES = int(os.environ.get('HTTP_CACHE_MAX_MEMORY_BYTES', 64 * 1024 * 1024))
+# Bodies larger than this aren't stored (a Firestore document holds at most 1MB)
+HTTP_CACHE_MAX_BODY_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BODY_BYTES', 900000))
+
+# (name, URL fragment, freshness TTL in seconds). The first matching rule applies. Within the TTL a
+# cached response is used without any request; after it, the request is revalidated with the stored
+# ETag / Last-Modified, so an unchanged response costs a 304.
+HTTP_CACHE_RULES = [
+    ("archive", "/api/v1/archive", int(os.environ.get('HTTP_CACHE_ARCHIVE_TTL_SECONDS', 0))),
+    ("public_profile", "/public_profile", int(os.environ.get('HTTP_CACHE_PROFILE_TTL_SECONDS', 6 * 3600))),
+    ("recommendations", "/api/v1/recommendations/from/", int(os.environ.get('HTTP_CACHE_RECOMMENDATIONS_TTL_SECONDS', 24 * 3600))),
+    ("users_ranked", "/api/v1/publication/users/ranked", int(os.environ.get('HTTP_CACHE_USERS_TTL_SECONDS', 24 * 3600))),
+    ("leaderboard", "/api/v1/category/leaderboard/", int(os.environ.get('HTTP_CACHE_LEADERBOARD_TTL_SECONDS', 3600))),
+]
+HTTP_CACHE_DEFAULT_RULE = ("other", "", int(os.environ.get('HTTP_CACHE_DEFAULT_TTL_SECONDS', 0)))
+
+
+def _cache_key(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Keeps cached responses in an in-process LRU, bounded by entry count and total body bytes."""
+
+    def __init__(self, max_entries=HTTP_CACHE_MAX_ENTRIES, max_bytes=HTTP_CACHE_MAX_MEMORY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key, entry):
+        size = len((entry.get("body") or "").encode())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+
+class FileCacheBackend:
+    """Stores cached responses as JSON files in a local directory, one file per URL."""
+
+    def __init__(self, path=HTTP_CACHE_DIR):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.path, key + '.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        file_path = os.path.join(self.path, key + '.json')
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, file_path)
+
+
+class FirestoreCacheBackend:
+    """Stores cached responses in the 'http_cache' collection, one document per URL."""
+
+    COLLECTION = "http_cache"
+
+    def __init__(self):
+        self._db = None
+
+    def _collection(self):
+        if self._db is None:
+            from utils.firebase import get_firebase_client
+            self._db = get_firebase_client().db
+        return self._db.collection(self.COLLECTION)
+
+    def get(self, key):
+        doc = self._collection().document(key).get()
+        if not doc.exists:
+            return None
+        return doc.to_dict()
+
+    def set(self, key, entry):
+        self._collection().document(key).set({
+            **entry,
+            "updated_at": datetime.datetime.now(datetime.timezone.utc)
+        })
+
+
+class HttpCache:
+    """
+    Response cache for JSON GET requests to Substack, in front of the shared HTTP client.
+
+    Each response is stored with its ETag / Last-Modified. Within its endpoint's freshness TTL (see
+    HTTP_CACHE_RULES) a cached response is returned without a request; after that the request carries
+    If-None-Match / If-Modified-Since and a 304 replays the cached body. Hits, revalidations and misses
+    are counted per endpoint. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(self, backend=None, rules=None):
+        self.backend = backend
+        self.rules = rules if rules is not None else HTTP_CACHE_RULES
+        self._counters = {}
+        self._counters_lock = threading.Lock()
+
+    def _rule(self, url):
+        for rule in self.rules:
+            if rule[1] in url:
+                return rule
+        return HTTP_CACHE_DEFAULT_RULE
+
+    def _count(self, name, counter):
+        with self._counters_lock:
+            counters = self._counters.get(name)
+            if counters is None:
+                counters = self._counters[name] = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "errors": 0}
+            counters[counter] += 1
+
+    def _load(self, name, key):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            self._count(name, "errors")
+            print(f"Error reading HTTP cache entry: {e}")
+            return None
+
+    def _store(self, name, key, entry):
+        try:
+            self.backend.set(key, entry)
+        except Exception as e:
+            self._count(name, "errors")
+            print(f"Error writing HTTP cache entry for {entry.get('url')}: {e}")
+
+    def get_json_with_size(self, url):
+        """
+        Fetches JSON from url through the cache.
+
+        Args:
+            url (str): The URL to fetch.
+
+        Returns:
+            tuple: (data, bytes_downloaded) - bytes_downloaded is 0 when the cached body was used.
+        """
+        if self.backend is None:
+            response = get_http_client().get(url)
+            response.raise_for_status()
+            return response.json(), len(response.content)
+
+        name, _, ttl = self._rule(url)
+        key = _cache_key(url)
+        entry = self._load(name, key)
+        now = time.time()
+
+        if entry is not None and now - entry.get("fetched_at", 0) < ttl:
+            self._count(name, "fresh_hits")
+            return json.loads(entry["body"]), 0
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = get_http_client().get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self._count(name, "revalidated")
+            self._store(name, key, {**entry, "fetched_at": now})
+            return json.loads(entry["body"]), 0
+
+        response.raise_for_status()
+        self._count(name, "misses")
+        data = response.json()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if (etag or last_modified or ttl > 0) and len(response.content) <= HTTP_CACHE_MAX_BODY_BYTES:
+            self._store(name, key, {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": response.text,
+                "fetched_at": now
+            })
+        return data, len(response.content)
+
+    def get_json(self, url):
+        """
+        Same as get_json_with_size, returning only the data.
+        """
+        data, _ = self.get_json_with_size(url)
+        return data
+
+    def get_stats(self):
+        """
+        Returns {endpoint: {fresh_hits, revalidated, misses, errors}}.
+        """
+        with self._counters_lock:
+            return {name: dict(counters) for name, counters in self._counters.items()}
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """
+    Returns the process-wide HttpCache. The backend is picked with HTTP_CACHE_BACKEND:
+    'memory' (default, per process LRU of up to HTTP_CACHE_MAX_MEMORY_BYTES of bodies), 'file' (HTTP_CACHE_DIR), 'firestore' (shared by every
+    instance) or 'none' (no caching).
+    """
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                if HTTP_CACHE_BACKEND == 'firestore':
+                    backend = FirestoreCacheBackend()
+                elif HTTP_CACHE_BACKEND == 'file':
+                    backend = FileCacheBackend()
+                elif HTTP_CACHE_BACKEND == 'none':
+                    backend = None
+                else:
+                    backend = MemoryCacheBackend()
+                _http_cache = HttpCache(backend)
+    return _http_cache
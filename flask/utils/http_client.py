@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 20))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+# Never let a server-provided Retry-After pin a worker for longer than this.
+HTTP_MAX_RETRY_AFTER = float(os.environ.get('HTTP_MAX_RETRY_AFTER', 30))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class _CappedRetry(Retry):
+    """urllib3 Retry that honours Retry-After but caps how long it will sleep."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_MAX_RETRY_AFTER)
+
+
+class HttpClient:
+    """
+    Pooled HTTP client shared by everything that talks to Substack (and other plain HTTP sources).
+
+    Connections are kept alive and pooled per host, every request gets a (connect, read) timeout,
+    idempotent requests are retried with exponential backoff on connection errors and 429/5xx
+    (honouring Retry-After), and per-host latency counters are kept for metrics.
+    """
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 max_retries=HTTP_MAX_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR,
+                 pool_maxsize=HTTP_POOL_MAXSIZE):
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = _CappedRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        Performs a GET request through the shared pool.
+
+        Args:
+            url (str): The URL to fetch.
+            timeout (float | tuple, optional): Overrides the default (connect, read) timeout.
+            **kwargs: Passed through to requests.Session.get (headers, params, stream, ...).
+
+        Returns:
+            requests.Response: The response. Status codes are not checked here.
+        """
+        host = urlparse(url).netloc
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(host, time.monotonic() - start, None)
+            raise
+        self._record(host, time.monotonic() - start, response.status_code)
+        return response
+
+    def _record(self, host, elapsed, status_code):
+        with self._stats_lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0
+                }
+            stats["requests"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            if status_code is None or status_code >= 400:
+                stats["errors"] += 1
+
+    def get_stats(self):
+        """
+        Returns per-host latency counters.
+
+        Returns:
+            dict: {host: {requests, errors, total_seconds, max_seconds, avg_seconds}}
+        """
+        with self._stats_lock:
+            return {
+                host: {
+                    **stats,
+                    "avg_seconds": stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+                }
+                for host, stats in self._stats.items()
+            }
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Returns the process-wide HttpClient, creating it on first use.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
@@ -0,0 +1,74 @@
+import os
+import time
+import threading
+
+# How long a category's leaderboard snapshot is reused by /updateList tasks
+LEADERBOARD_SNAPSHOT_TTL_SECONDS = int(os.environ.get('LEADERBOARD_SNAPSHOT_TTL_SECONDS', 6 * 3600))
+# How long the set of all newsletter usernames is shared by /updateList tasks of the same run
+NEWSLETTER_USERNAMES_TTL_SECONDS = int(os.environ.get('NEWSLETTER_USERNAMES_TTL_SECONDS', 3600))
+
+
+class SnapshotCache:
+    """
+    In-process TTL cache of immutable snapshots (tuples, frozensets).
+
+    A missing or expired key is loaded once: concurrent callers for the same key wait for the
+    first loader instead of repeating the fetch. Loader errors are not cached.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry
+        return None
+
+    def get(self, key, loader):
+        """
+        Returns the snapshot for key, calling loader() to build it when missing or expired.
+        """
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                self._counters["hits"] += 1
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._fresh(key)
+                if entry is not None:
+                    self._counters["hits"] += 1
+                    return entry[0]
+                self._counters["misses"] += 1
+            value = loader()
+            with self._lock:
+                self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            return value
+
+    def invalidate(self, key=None):
+        """
+        Drops the snapshot for key, or every snapshot when key is None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_stats(self):
+        """
+        Returns hit/miss counters and the number of snapshots held.
+        """
+        with self._lock:
+            return {**self._counters, "snapshots": len(self._entries)}
+
+
+leaderboard_snapshots = SnapshotCache(LEADERBOARD_SNAPSHOT_TTL_SECONDS)
+newsletter_username_snapshots = SnapshotCache(NEWSLETTER_USERNAMES_TTL_SECONDS)
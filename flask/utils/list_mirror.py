@@ -0,0 +1,286 @@
+import os
+import time
+import datetime
+import threading
+
+from utils.utils import is_localhost
+
+LIST_MIRROR_BACKEND = os.environ.get('LIST_MIRROR_BACKEND', 'memory' if is_localhost() else 'firestore')
+# How long a list's members loaded from the backend are used before reading the backend again
+LIST_MIRROR_CACHE_TTL_SECONDS = int(os.environ.get('LIST_MIRROR_CACHE_TTL_SECONDS', 300))
+# How long the memory backend keeps a list before it is read from the PDS again (it isn't shared
+# between instances, so it can't be kept up to date by other instances' writes or reconciliations)
+LIST_MIRROR_MEMORY_TTL_SECONDS = int(os.environ.get('LIST_MIRROR_MEMORY_TTL_SECONDS', 3600))
+FIRESTORE_BATCH_WRITES = 500
+
+
+def list_item_rkey(uri):
+    """
+    Returns the record key of a listitem from its at:// URI (at://<did>/app.bsky.graph.listitem/<rkey>).
+    """
+    return uri.rsplit('/', 1)[-1] if isinstance(uri, str) and uri else None
+
+
+class MemoryListMirrorBackend:
+    """
+    Keeps list memberships in this process (a local stand-in for the Firestore backend). A list
+    expires ttl_seconds after it was last read from the PDS, so it is then read from the PDS again.
+    """
+
+    def __init__(self, ttl_seconds=LIST_MIRROR_MEMORY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lists = {}
+        self._lock = threading.Lock()
+
+    def load(self, list_uri):
+        with self._lock:
+            entry = self._lists.get(list_uri)
+            if entry is None or entry[1] <= time.monotonic():
+                self._lists.pop(list_uri, None)
+                return None
+            return dict(entry[0])
+
+    def get_member(self, list_uri, did):
+        members = self.load(list_uri)
+        return None if members is None else members.get(did)
+
+    def replace(self, list_uri, members):
+        """Stores members for list_uri and returns the members stored before ({} when none)."""
+        with self._lock:
+            previous = self._lists.get(list_uri)
+            self._lists[list_uri] = (dict(members), time.monotonic() + self.ttl_seconds)
+            return dict(previous[0]) if previous is not None else {}
+
+    def add(self, list_uri, members):
+        with self._lock:
+            if list_uri in self._lists:
+                self._lists[list_uri][0].update(members)
+
+    def remove(self, list_uri, dids):
+        with self._lock:
+            if list_uri in self._lists:
+                for did in dids:
+                    self._lists[list_uri][0].pop(did, None)
+
+
+class FirestoreListMirrorBackend:
+    """
+    Keeps list memberships in the 'list_memberships' collection: one document per list URI (list_uri,
+    reconciled_at) with a 'members' subcollection holding one {handle, rkey} document per member DID,
+    so large lists stay within Firestore's per-document limits.
+    """
+
+    COLLECTION = "list_memberships"
+    MEMBERS_COLLECTION = "members"
+
+    def __init__(self):
+        self._db = None
+
+    def _document(self, list_uri):
+        if self._db is None:
+            from utils.firebase import get_firebase_client
+            self._db = get_firebase_client().db
+        return self._db.collection(self.COLLECTION).document(list_uri.replace('/', '_'))
+
+    def _write(self, operations):
+        """Commits (operation, args) pairs in WriteBatches of up to FIRESTORE_BATCH_WRITES."""
+        for start in range(0, len(operations), FIRESTORE_BATCH_WRITES):
+            batch = self._db.batch()
+            for operation, args in operations[start:start + FIRESTORE_BATCH_WRITES]:
+                getattr(batch, operation)(*args)
+            batch.commit()
+
+    def load(self, list_uri):
+        doc_ref = self._document(list_uri)
+        if not doc_ref.get().exists:
+            return None
+        return {doc.id: doc.to_dict() or {} for doc in doc_ref.collection(self.MEMBERS_COLLECTION).stream()}
+
+    def get_member(self, list_uri, did):
+        doc = self._document(list_uri).collection(self.MEMBERS_COLLECTION).document(did).get()
+        return (doc.to_dict() or {}) if doc.exists else None
+
+    def replace(self, list_uri, members):
+        """Stores members for list_uri, writing only changed members, and returns the members stored before."""
+        doc_ref = self._document(list_uri)
+        members_ref = doc_ref.collection(self.MEMBERS_COLLECTION)
+        stored = {doc.id: doc.to_dict() or {} for doc in members_ref.stream()}
+
+        # Only members that changed are written
+        operations = [("delete", (members_ref.document(did),)) for did in stored.keys() - members.keys()]
+        operations += [
+            ("set", (members_ref.document(did), member))
+            for did, member in members.items() if stored.get(did) != member
+        ]
+        self._write(operations)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        doc_ref.set({"list_uri": list_uri, "reconciled_at": now, "updated_at": now})
+        return stored
+
+    def add(self, list_uri, members):
+        doc_ref = self._document(list_uri)
+        if not doc_ref.get().exists:
+            return
+        members_ref = doc_ref.collection(self.MEMBERS_COLLECTION)
+        self._write([("set", (members_ref.document(did), member)) for did, member in members.items()])
+        doc_ref.update({"updated_at": datetime.datetime.now(datetime.timezone.utc)})
+
+    def remove(self, list_uri, dids):
+        doc_ref = self._document(list_uri)
+        if not doc_ref.get().exists:
+            return
+        members_ref = doc_ref.collection(self.MEMBERS_COLLECTION)
+        self._write([("delete", (members_ref.document(did),)) for did in dids])
+        doc_ref.update({"updated_at": datetime.datetime.now(datetime.timezone.utc)})
+
+
+class ListMembershipMirror:
+    """
+    Persisted index of Bluesky list memberships: {did: {handle, rkey}} per list URI.
+
+    Membership is read from the mirror instead of paging through app.bsky.graph.getList; a list
+    without a mirror yet is read from the PDS once. Our own list writes update the mirror as they
+    happen, and reconcile() (run on a schedule through /reconcileListMirrors) replaces it with the
+    PDS state to pick up changes made elsewhere. Loaded lists are kept in-process for
+    LIST_MIRROR_CACHE_TTL_SECONDS, with a handle set for O(1) membership checks.
+    """
+
+    def __init__(self, backend=None, cache_ttl_seconds=LIST_MIRROR_CACHE_TTL_SECONDS):
+        self.backend = backend or MemoryListMirrorBackend()
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._counters = {"cache_hits": 0, "backend_loads": 0, "pds_reads": 0, "reconciles": 0}
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _remember(self, list_uri, members):
+        handles = {member.get("handle") for member in members.values() if member.get("handle")}
+        with self._lock:
+            self._cache[list_uri] = (members, handles, time.monotonic() + self.cache_ttl_seconds)
+        return members, handles
+
+    def _load(self, list_uri, fetch_items):
+        with self._lock:
+            entry = self._cache.get(list_uri)
+            if entry is not None and entry[2] > time.monotonic():
+                self._counters["cache_hits"] += 1
+                return entry[0], entry[1]
+
+        members = self.backend.load(list_uri)
+        if members is not None:
+            self._count("backend_loads")
+        else:
+            self._count("pds_reads")
+            members = self._members_from_items(fetch_items())
+            self.backend.replace(list_uri, members)
+        return self._remember(list_uri, members)
+
+    @staticmethod
+    def _members_from_items(items):
+        return {did: {"handle": handle, "rkey": rkey} for handle, did, rkey in items if did}
+
+    def get_members(self, list_uri, fetch_items):
+        """
+        Returns {did: {handle, rkey}} for list_uri.
+
+        Args:
+            list_uri (str): The list URI.
+            fetch_items (callable): Returns [(handle, did, rkey), ...] read from the PDS; only called
+                when the list has no mirror yet.
+        """
+        members, _ = self._load(list_uri, fetch_items)
+        return dict(members)
+
+    def get_handles(self, list_uri, fetch_items):
+        """
+        Returns the set of member handles of list_uri (see get_members).
+        """
+        _, handles = self._load(list_uri, fetch_items)
+        return set(handles)
+
+    def contains(self, list_uri, handle, fetch_items):
+        """
+        Returns whether handle is a member of list_uri (see get_members).
+        """
+        _, handles = self._load(list_uri, fetch_items)
+        return handle in handles
+
+    def has_member(self, list_uri, did):
+        """
+        Returns whether did is a member of list_uri in the backend, bypassing the in-process cache, so
+        writes by other instances since the list was loaded are seen. Reads one member, not the list.
+        """
+        return self.backend.get_member(list_uri, did) is not None
+
+    def record_added(self, list_uri, items):
+        """
+        Records list items we created: [(handle, did, rkey), ...]. Lists without a mirror yet are left
+        alone; their first read loads them from the PDS.
+        """
+        members = self._members_from_items(items)
+        if not members:
+            return
+        self.backend.add(list_uri, members)
+        with self._lock:
+            entry = self._cache.get(list_uri)
+            if entry is not None:
+                entry[0].update(members)
+                entry[1].update(member["handle"] for member in members.values() if member["handle"])
+
+    def record_removed(self, list_uri, dids):
+        """
+        Records list items we deleted, by subject DID.
+        """
+        dids = [did for did in dids if did]
+        if not dids:
+            return
+        self.backend.remove(list_uri, dids)
+        with self._lock:
+            self._cache.pop(list_uri, None)
+
+    def reconcile(self, list_uri, fetch_items):
+        """
+        Replaces the mirror of list_uri with the PDS state.
+
+        Returns:
+            dict: {"members": total, "added": missing from the mirror, "removed": no longer on the list}
+        """
+        members = self._members_from_items(fetch_items())
+        previous = self.backend.replace(list_uri, members)
+        self._remember(list_uri, members)
+        self._count("reconciles")
+        return {
+            "members": len(members),
+            "added": len(members.keys() - previous.keys()),
+            "removed": len(previous.keys() - members.keys())
+        }
+
+    def get_stats(self):
+        """
+        Returns cache/backend/PDS read counters and the number of lists held in-process.
+        """
+        with self._lock:
+            return {**self._counters, "lists": len(self._cache)}
+
+
+_list_mirror = None
+_list_mirror_lock = threading.Lock()
+
+
+def get_list_mirror():
+    """
+    Returns the process-wide ListMembershipMirror. The backend is picked with LIST_MIRROR_BACKEND:
+    'firestore' (persisted and shared by every instance; the default outside ENVIRONMENT=local) or
+    'memory' (per process, re-read from the PDS every LIST_MIRROR_MEMORY_TTL_SECONDS).
+    """
+    global _list_mirror
+    if _list_mirror is None:
+        with _list_mirror_lock:
+            if _list_mirror is None:
+                backend = FirestoreListMirrorBackend() if LIST_MIRROR_BACKEND == 'firestore' else MemoryListMirrorBackend()
+                _list_mirror = ListMembershipMirror(backend)
+    return _list_mirror
@@ -0,0 +1,158 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+LOCAL_TASKS_WORKERS_PER_QUEUE = int(os.environ.get('LOCAL_TASKS_WORKERS_PER_QUEUE', 4))
+# Scales every delay_seconds, e.g. 0 to run delayed tasks right away when load testing
+LOCAL_TASKS_DELAY_SCALE = float(os.environ.get('LOCAL_TASKS_DELAY_SCALE', 1))
+
+
+class LocalTaskQueue:
+    """
+    In-process stand-in for Cloud Tasks, used when TASK_BACKEND=local (the default with ENVIRONMENT=local).
+
+    Tasks are held in a time-ordered heap until their delay has passed, then POSTed to the matching
+    Flask route through app.test_client() on a per-queue thread pool (LOCAL_TASKS_WORKERS_PER_QUEUE
+    workers each), so a queue's concurrency is bounded like a Cloud Tasks queue. Like Cloud Tasks,
+    a task name is unique per queue: a duplicate is rejected while the task is scheduled or running.
+    Names are forgotten once the task has finished, so they don't pile up for the life of the process.
+    """
+
+    def __init__(self, workers_per_queue=LOCAL_TASKS_WORKERS_PER_QUEUE, delay_scale=LOCAL_TASKS_DELAY_SCALE):
+        self.workers_per_queue = workers_per_queue
+        self.delay_scale = delay_scale
+        self._app = None
+        self._heap = []
+        self._sequence = itertools.count()
+        self._task_names = set()
+        self._executors = {}
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._scheduler = None
+        self._counters = {"enqueued": 0, "duplicates": 0, "succeeded": 0, "failed": 0}
+
+    def init_app(self, app):
+        """
+        Sets the Flask app tasks are dispatched to.
+        """
+        self._app = app
+
+    def enqueue(self, endpoint, payload, queue_name, task_name=None, delay_seconds=None, headers=None):
+        """
+        Schedules a POST of payload to endpoint's path on this process' Flask app.
+
+        Args:
+            endpoint (str): Task URL; only the path is used
+            payload (dict): JSON body
+            queue_name (str): Queue the task runs on
+            task_name (str, optional): Unique name within the queue
+            delay_seconds (int, optional): Delay before the task runs
+
+        Returns:
+            dict: Response in the same shape as create_cloud_task
+        """
+        task_id = task_name or uuid.uuid4().hex
+        full_name = f"queues/{queue_name}/tasks/{task_id}"
+
+        with self._condition:
+            if full_name in self._task_names:
+                self._counters["duplicates"] += 1
+                return {
+                    "status": "error",
+                    "message": f"Failed to create Cloud Task: task {full_name} already exists"
+                }
+            self._task_names.add(full_name)
+
+            run_at = time.monotonic() + (delay_seconds or 0) * self.delay_scale
+            task = {
+                "name": full_name,
+                "queue_name": queue_name,
+                "path": urlparse(endpoint).path or "/",
+                "payload": payload,
+                "headers": headers or {}
+            }
+            heapq.heappush(self._heap, (run_at, next(self._sequence), task))
+            self._pending += 1
+            self._counters["enqueued"] += 1
+            self._ensure_scheduler()
+            self._condition.notify_all()
+
+        return {
+            "status": "success",
+            "message": "Task queued locally",
+            "task_name": full_name,
+            "task_id": task_id
+        }
+
+    def _ensure_scheduler(self):
+        if self._scheduler is None or not self._scheduler.is_alive():
+            self._scheduler = threading.Thread(target=self._run_scheduler, name="local-task-queue", daemon=True)
+            self._scheduler.start()
+
+    def _run_scheduler(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                _, _, task = heapq.heappop(self._heap)
+                executor = self._executors.get(task["queue_name"])
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=self.workers_per_queue,
+                        thread_name_prefix=f"local-task-{task['queue_name']}"
+                    )
+                    self._executors[task["queue_name"]] = executor
+            executor.submit(self._dispatch, task)
+
+    def _get_app(self):
+        if self._app is None:
+            # Imported lazily: app.py imports the endpoints, which import this module
+            from app import app
+            self._app = app
+        return self._app
+
+    def _dispatch(self, task):
+        succeeded = False
+        try:
+            with self._get_app().test_client() as client:
+                response = client.post(task["path"], json=task["payload"], headers=task["headers"])
+            succeeded = response.status_code < 400
+            print(f"Local task {task['name']} -> {task['path']}: {response.status_code}")
+        except Exception as e:
+            print(f"Local task {task['name']} -> {task['path']} failed: {e}")
+        finally:
+            with self._condition:
+                self._counters["succeeded" if succeeded else "failed"] += 1
+                self._task_names.discard(task["name"])
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def wait_until_idle(self, timeout=None):
+        """
+        Blocks until every queued task (including delayed ones) has run. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def get_stats(self):
+        """
+        Returns task counters and how many tasks are scheduled or running.
+        """
+        with self._condition:
+            return {**self._counters, "pending": self._pending, "scheduled": len(self._heap),
+                    "task_names": len(self._task_names)}
+
+
+local_task_queue = LocalTaskQueue()
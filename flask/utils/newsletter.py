@@ -1,17 +1,167 @@
 from utils.endpoints import PUBLIC_PROFILE_ENDPOINT, RECOMMENDATIONS_ENDPOINT, ARCHIVE_ENDPOINT
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from utils.http_cache import get_http_cache
 from utils.utils import fetch_json, getLatestRSSItems, getPostFreqDetails, normalize_substack_image_url
+from utils.post import Post
+from utils.cadence import update_cadence_stats
+
+ARCHIVE_PAGE_SIZE = 20
+MAX_ARCHIVE_FETCH_WORKERS = 4
+# How far (in posts) a saved archive cursor may have moved and still be found by the boundary check:
+# forward when new posts were published since, backward when posts were deleted (one page in total)
+ARCHIVE_CURSOR_MAX_SHIFT_FORWARD = 14
+ARCHIVE_CURSOR_MAX_SHIFT_BACKWARD = 5
+
+class ArchiveEntry(NamedTuple):
+    item: Post                      # mapped post (see Newsletter._map_post_item)
+    offset: int                     # position in the archive (0 = newest)
+
+
+class ArchiveIterator:
+    """
+    Lazily walks a newsletter's archive (newest first), one page at a time, yielding ArchiveEntry objects.
+
+    - prefetch: number of pages requested ahead of the one being consumed (0 = strictly serial)
+    - newer_than: stop at the first post not strictly newer than this datetime
+    - older_than: skip posts not strictly older than this datetime
+    - limit: stop after yielding this many posts
+    - stop_when: stop at the first entry for which this returns True (that entry isn't yielded)
+
+    Each post date is parsed once, into Post.published_at; posts without a parseable post_date are skipped.
+    Counters (pages, bytes, posts_scanned) and the position of the last scanned post (last_offset,
+    last_post_id) are available while and after iterating.
+    """
+
+    def __init__(self, newsletter: 'Newsletter', offset: int = 0, page_size: int = ARCHIVE_PAGE_SIZE,
+                 prefetch: int = 1, newer_than: Optional[datetime] = None, older_than: Optional[datetime] = None,
+                 limit: Optional[int] = None, stop_when: Optional[Callable[[ArchiveEntry], bool]] = None):
+        self.newsletter = newsletter
+        self.start_offset = offset
+        self.page_size = page_size
+        self.prefetch = max(0, prefetch)
+        self.newer_than = newer_than
+        self.older_than = older_than
+        self.limit = limit
+        self.stop_when = stop_when
+        self.pages = 0
+        self.bytes = 0
+        self.posts_scanned = 0
+        self.last_offset = None
+        self.last_post_id = None
+        self._counters_lock = threading.Lock()
+
+    def _end_offset(self) -> Optional[int]:
+        # Without skipped posts, `limit` posts end at a known offset, so no page past it is requested
+        if self.limit is not None and self.older_than is None:
+            return self.start_offset + self.limit
+        return None
+
+    def _page_requests(self):
+        end_offset = self._end_offset()
+        offset = self.start_offset
+        while end_offset is None or offset < end_offset:
+            page_limit = self.page_size if end_offset is None else min(self.page_size, end_offset - offset)
+            yield offset, page_limit
+            offset += page_limit
+
+    def _fetch(self, page_request: Tuple[int, int]) -> List[Dict[str, Any]]:
+        data, size = self.newsletter._fetch_archive_page_with_size(offset=page_request[0], limit=page_request[1])
+        with self._counters_lock:
+            self.pages += 1
+            self.bytes += size
+        return data
+
+    def _iter_pages(self):
+        page_requests = self._page_requests()
+        if self.prefetch == 0:
+            for page_request in page_requests:
+                data = self._fetch(page_request)
+                yield page_request, data
+                if len(data) < page_request[1]:
+                    return
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        pending = deque()
+        try:
+            def fill():
+                # The page being consumed plus `prefetch` pages ahead
+                while len(pending) <= self.prefetch:
+                    page_request = next(page_requests, None)
+                    if page_request is None:
+                        return
+                    pending.append((page_request, executor.submit(self._fetch, page_request)))
+
+            fill()
+            while pending:
+                page_request, future = pending.popleft()
+                data = future.result()
+                if len(data) < page_request[1]:
+                    yield page_request, data
+                    return  # Short page: the archive ends here
+                fill()
+                yield page_request, data
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __iter__(self):
+        yielded = 0
+        if self.limit is not None and self.limit <= 0:
+            return
+        newer_than = self.newer_than.timestamp() if self.newer_than is not None else None
+        older_than = self.older_than.timestamp() if self.older_than is not None else None
+        for (offset, _), data in self._iter_pages():
+            for index, post in enumerate(data):
+                self.posts_scanned += 1
+                self.last_offset = offset + index
+                self.last_post_id = post.get('id')
+
+                item = self.newsletter._map_post_item(post)
+                if item.published_at is None:
+                    continue
+                if newer_than is not None and item.published_at <= newer_than:
+                    return  # Reverse chronological: everything after is older too
+                if older_than is not None and item.published_at >= older_than:
+                    continue
+
+                entry = ArchiveEntry(item, offset + index)
+                if self.stop_when is not None and self.stop_when(entry):
+                    return
+                yield entry
+                yielded += 1
+                if self.limit is not None and yielded >= self.limit:
+                    return
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"pages": self.pages, "bytes": self.bytes, "posts_scanned": self.posts_scanned}
+
+
 class Newsletter:
     def __init__(self, url: str):
         self.url = url.rstrip('/')
 
     # Internal helpers
     def _fetch_archive_page(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        data, _ = self._fetch_archive_page_with_size(offset, limit)
+        return data
+
+    def _fetch_archive_page_with_size(self, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
         endpoint = ARCHIVE_ENDPOINT.format(offset=offset, limit=limit)
         api_url = self.url + endpoint
-        data = fetch_json(api_url)
-        return data or []
+        data, size = get_http_cache().get_json_with_size(api_url)
+        return data or [], size
+
+    def iterArchive(self, **kwargs) -> ArchiveIterator:
+        """
+        Returns a lazy ArchiveIterator over this newsletter's archive (see ArchiveIterator for the options).
+        """
+        return ArchiveIterator(self, **kwargs)
 
     def _parse_iso_z(self, iso_str: Optional[str]) -> Optional[datetime]:
         if not iso_str:
@@ -28,16 +178,16 @@ class Newsletter:
             if post.get(label) not in (None, '', [])
         ]
 
-    def _map_post_item(self, post: Dict[str, Any]) -> Dict[str, Any]:
-        return {
-            'title': post.get('title'),
-            'subtitle': post.get('subtitle'),
-            'link': post.get('canonical_url'),
-            'id': post.get('id'),
-            'thumbnail_url': normalize_substack_image_url(post.get('cover_image'), self.url, isPost=True),
-            'post_date': post.get('post_date'),
-            'labels': self._labels_from_post(post)
-        }
+    def _map_post_item(self, post: Dict[str, Any]) -> Post:
+        return Post.create(
+            title=post.get('title'),
+            subtitle=post.get('subtitle'),
+            link=post.get('canonical_url'),
+            post_date=post.get('post_date'),
+            id=post.get('id'),
+            thumbnail_url=normalize_substack_image_url(post.get('cover_image'), self.url, isPost=True),
+            labels=self._labels_from_post(post)
+        )
 
     def getPublication(self, admin_handle: str) -> Optional[Dict[str, Any]]:
         """
@@ -95,52 +245,35 @@ class Newsletter:
                     })
         return rec_newsletters, rec_users
 
-    def getPosts(self, limit: int = 50) -> Dict[str, Any]:
+    def getPosts(self, limit: int = 50, concurrent: bool = True) -> Dict[str, Any]:
         """
         Fetches up to `limit` posts, paginating as needed (max 20 per request).
+        With `concurrent` (default), up to MAX_ARCHIVE_FETCH_WORKERS pages are requested ahead in parallel.
         Returns:
-        - postsArray: [title, subtitle, link, id, thumbnail_url]
+        - postsArray: [Post] (title, subtitle, link, id, thumbnail_url, post_date, published_at, labels)
         - numberOfPosts: number of posts returned
         - lastPostTime: post_date of the latest post (arr[0])
         - postFrequency: average time (in days) between posts
+        - cadenceStats: streaming interval stats of those posts (see utils/cadence.py)
         """
-        posts: List[Dict[str, Any]] = []
-        offset = 0
-        max_per_page = 20
-        while len(posts) < limit:
-            fetch_limit = min(max_per_page, limit - len(posts))
-            data = self._fetch_archive_page(offset=offset, limit=fetch_limit)
-            if not data:
-                break
-            posts.extend(data)
-            if len(data) < fetch_limit:
-                break  # No more posts available
-            offset += fetch_limit
-
-        posts = posts[:limit]
-        postsArray = [self._map_post_item(post) for post in posts]
+        archive = self.iterArchive(limit=limit, prefetch=MAX_ARCHIVE_FETCH_WORKERS if concurrent else 0)
+        postsArray = [entry.item for entry in archive]
         numberOfPosts = len(postsArray)
-        lastBuildDate = posts[0]['post_date'] if posts else None
+        lastBuildDate = postsArray[0].post_date if postsArray else None
         
         # Calculate postFrequency (average days between posts)
-        if numberOfPosts > 1:
-            post_dates = [datetime.fromisoformat(post['post_date'].replace('Z', '+00:00')) for post in posts]
-            time_diffs = [
-                (post_dates[i] - post_dates[i+1]).total_seconds() / 86400.0
-                for i in range(len(post_dates)-1)
-            ]
-            postFrequency = sum(time_diffs) / len(time_diffs)
-        else:
-            postFrequency = None
+        cadenceStats = update_cadence_stats(None, [post.published_at for post in postsArray])
+        postFrequency = cadenceStats['mean'] if cadenceStats['count'] else None
 
         return {
             'postsArray': postsArray,
             'numberOfPosts': numberOfPosts,
             'lastBuildDate': lastBuildDate,
-            'postFrequency': postFrequency
+            'postFrequency': postFrequency,
+            'cadenceStats': cadenceStats
         }
 
-    def getLatestPosts(self, lastBuildDate: Optional[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    def getLatestPosts(self, lastBuildDate: Optional[str]) -> Tuple[List[Post], List[str]]:
         """
         Fetch posts that are strictly newer than the provided ISO Z timestamp.
 
@@ -148,7 +281,7 @@ class Newsletter:
         - lastBuildDate (str): ISO 8601 string with 'Z' suffix, e.g. '2025-09-06T12:00:27.657Z'.
 
         Returns:
-        - items (list[dict]): post dicts with keys: title, subtitle, link, id, thumbnail_url, post_date
+        - items (list[Post]): posts (title, subtitle, link, id, thumbnail_url, post_date, published_at, labels)
         - post_dates_list (list[str]): ISO Z date strings for each item returned
         """
         if not lastBuildDate:
@@ -161,111 +294,104 @@ class Newsletter:
         items = []
         post_dates_list = []
 
-        offset = 0
-        max_per_page = 20
-        stop_pagination = False
-        while True:
-            data = self._fetch_archive_page(offset=offset, limit=max_per_page)
-            if not data:
-                break
-
-            for post in data:
-                post_date_str = post.get('post_date')
-                if not post_date_str:
-                    continue
-                post_dt = self._parse_iso_z(post_date_str)
-                if post_dt is None:
-                    continue
-
-                # Only include posts strictly newer than cutoff
-                if post_dt > cutoff_dt:
-                    item = self._map_post_item(post)
-                    item['post_date'] = post_date_str
-                    items.append(item)
-                    post_dates_list.append(post_date_str)
-                else:
-                    # As data is reverse chronological, older or equal means we can stop.
-                    stop_pagination = True
-                    break
-
-            if stop_pagination:
-                break
-
-            if len(data) < max_per_page:
-                break  # No more posts available
-
-            offset += max_per_page
+        # Only include posts strictly newer than cutoff. As data is reverse chronological, the first older
+        # or equal post ends the scan.
+        for entry in self.iterArchive(newer_than=cutoff_dt, prefetch=0):
+            items.append(entry.item)
+            post_dates_list.append(entry.item.post_date)
 
         return items, post_dates_list
 
-    def getOlderPosts(self, oldestAddedPostDate: Optional[str]) -> List[Dict[str, Any]]:
+    def getOlderPosts(self, oldestAddedPostDate: Optional[str], max_items: int = 10) -> List[Post]:
         """
         Fetch posts that are strictly older than the provided ISO Z timestamp.
 
         Args:
         - oldestAddedPostDate (str): ISO 8601 string with 'Z' suffix, e.g. '2025-09-06T12:00:27.657Z'.
+        - max_items (int): Maximum number of posts to return.
 
         Returns:
-        - items (list[dict]): post dicts with keys: title, subtitle, link, id, thumbnail_url, post_date
+        - items (list[Post]): posts (title, subtitle, link, id, thumbnail_url, post_date, published_at, labels)
         """
-        MAX_ITEMS = 10
+        if not oldestAddedPostDate or self._parse_iso_z(oldestAddedPostDate) is None:
+            return []
+        items, _ = self.getOlderPostsFromCursor(oldestAddedPostDate, None, max_items=max_items)
+        return items
+
+    def getOlderPostsFromCursor(self, oldestAddedPostDate: Optional[str], archiveCursor: Optional[Dict[str, Any]],
+                                max_items: int = 10) -> Tuple[List[Post], Optional[Dict[str, Any]]]:
+        """
+        Fetch posts that are strictly older than the provided ISO Z timestamp, resuming the archive scan
+        where the previous call stopped instead of paging from offset 0.
+
+        Args:
+        - oldestAddedPostDate (str): ISO 8601 string with 'Z' suffix, e.g. '2025-09-06T12:00:27.657Z'.
+        - archiveCursor (dict | None): cursor returned by the previous call, {'offset': int, 'postId': id}
+          (postId is the archive post just before offset). Verified with a small boundary request; if the
+          post can't be found near offset the scan restarts from 0, so a stale cursor is only slower.
+        - max_items (int): Maximum number of posts to return.
 
+        Returns:
+        - items (list[Post]): posts (title, subtitle, link, id, thumbnail_url, post_date, published_at, labels)
+        - archiveCursor (dict | None): cursor for the next call (the input cursor if nothing was scanned)
+        """
         if not oldestAddedPostDate:
-            return [], []
+            return [], archiveCursor
 
         oldest_dt = self._parse_iso_z(oldestAddedPostDate)
         if oldest_dt is None:
-            return [], []
-
-        items = []
+            return [], archiveCursor
 
-        offset = 0
-        max_per_page = 20
-        while True:
-            if len(items) >= MAX_ITEMS:
-                break
-
-            data = self._fetch_archive_page(offset=offset, limit=max_per_page)
-            if not data:
-                break
-
-            for post in data:
-                if len(items) >= MAX_ITEMS:
-                    break
-
-                post_date_str = post.get('post_date')
-                if not post_date_str:
-                    continue
-                post_dt = self._parse_iso_z(post_date_str)
-                if post_dt is None:
-                    continue
+        # Only include posts strictly older than oldestAddedPostDate
+        archive = self.iterArchive(offset=self._resume_archive_offset(archiveCursor), older_than=oldest_dt, limit=max_items)
+        items = [entry.item for entry in archive]
 
-                # Only include posts strictly older than oldestAddedPostDate
-                if post_dt < oldest_dt:
-                    item = self._map_post_item(post)
-                    item['post_date'] = post_date_str
-                    items.append(item)
+        next_cursor = archiveCursor
+        if archive.last_offset is not None:
+            next_cursor = {"offset": archive.last_offset + 1, "postId": archive.last_post_id}
 
-            if len(data) < max_per_page or len(items) >= MAX_ITEMS:
-                break  # No more posts available or reached max limit
+        return items, next_cursor
 
-            offset += max_per_page
+    def _resume_archive_offset(self, archiveCursor: Optional[Dict[str, Any]]) -> int:
+        """
+        Returns the archive offset to resume from: just after the cursor's post, located with one small
+        archive request around the saved offset (new posts shift it forward, deletions backward).
+        Returns 0 when there is no cursor or the post isn't found there.
+        """
+        if not archiveCursor or archiveCursor.get('postId') is None:
+            return 0
+        try:
+            expected_index = int(archiveCursor.get('offset', 0)) - 1
+        except (TypeError, ValueError):
+            return 0
+        if expected_index < 0:
+            return 0
+
+        start = max(0, expected_index - ARCHIVE_CURSOR_MAX_SHIFT_BACKWARD)
+        limit = expected_index - start + ARCHIVE_CURSOR_MAX_SHIFT_FORWARD + 1
+        try:
+            window = self._fetch_archive_page(offset=start, limit=limit)
+        except Exception as e:
+            print(f"Archive cursor check failed for {self.url}, rescanning from the start: {e}")
+            return 0
 
-        # Truncate in case we went over in the last page
-        if len(items) > MAX_ITEMS:
-            items = items[:MAX_ITEMS]
+        for index, post in enumerate(window):
+            if post.get('id') == archiveCursor['postId']:
+                return start + index + 1
 
-        return items
+        print(f"Archive cursor for {self.url} not found near offset {expected_index + 1}, rescanning from the start")
+        return 0
 
-    def getNewsletterDataSinceLastBuild(self, lastBuildDate, numberOfPosts, postFrequency):
+    def getNewsletterDataSinceLastBuild(self, lastBuildDate, numberOfPosts, postFrequency, cadenceStats=None):
         """
         Build a newsletter by fetching latest RSS items and calculating post frequency details.
         
         Returns a dictionary containing updated newsletter statistics:
-        - 'post_items' (list): New items from the RSS feed.
+        - 'post_items' (list[Post]): New posts from the archive API or the RSS feed.
         - 'number_of_posts' (int): Updated total number of posts.
         - 'last_post_time' (str): Timestamp of the most recent post.
         - 'post_frequency' (float): Updated average post frequency in days.
+        - 'cadence_stats' (dict): Updated cadence stats (cadenceStats, when given, are the stored ones).
         """
         
         # Fetch latest RSS items. Try based on API. If API fails, use RSS Feed.
@@ -279,12 +405,15 @@ class Newsletter:
             numberOfPosts=numberOfPosts,
             postFrequency=postFrequency,  # n days
             lastBuildDate=lastBuildDate,
-            post_dates_list=post_dates_list
+            post_dates_list=post_dates_list,
+            post_timestamps=[item.published_at for item in items],
+            cadenceStats=cadenceStats
         )
     
         return {
             'post_items': items,
             'number_of_posts': post_freq_details['numberOfPosts'],
             'last_build_date': post_freq_details['lastBuildDate'],
-            'post_frequency': post_freq_details['postFrequency']
+            'post_frequency': post_freq_details['postFrequency'],
+            'cadence_stats': post_freq_details['cadenceStats']
         }
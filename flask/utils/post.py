@@ -0,0 +1,52 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+def iso_to_epoch(iso_str: Optional[str]) -> Optional[float]:
+    """
+    Parses an ISO 8601 date (with or without 'Z') to epoch seconds. Naive dates are taken as UTC.
+    Returns None when the string is missing or invalid.
+    """
+    if not iso_str:
+        return None
+    try:
+        date = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+@dataclass(frozen=True, slots=True)
+class Post:
+    """
+    A newsletter post as read from the archive API or the RSS feed, ready to be published.
+
+    post_date keeps the original ISO Z string (used for createdAt and stored dates), published_at the same
+    instant as epoch seconds, parsed once at ingestion. thumbnail_url is already normalized.
+    """
+    title: Optional[str]
+    subtitle: Optional[str]
+    link: Optional[str]
+    post_date: Optional[str]
+    published_at: Optional[float]
+    id: Optional[int] = None
+    thumbnail_url: Optional[str] = None
+    labels: Tuple[str, ...] = ()
+
+    @classmethod
+    def create(cls, title, subtitle, link, post_date, id=None, thumbnail_url=None, labels=()):
+        """
+        Builds a Post, parsing post_date once.
+        """
+        return cls(title, subtitle, link, post_date, iso_to_epoch(post_date), id, thumbnail_url, tuple(labels or ()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the post as a plain dict (e.g. for JSON responses and logging).
+        """
+        data = asdict(self)
+        data['labels'] = list(self.labels)
+        return data
@@ -0,0 +1,72 @@
+import os
+
+from atproto import models
+
+APPLY_WRITES_BATCH_SIZE = int(os.environ.get('APPLY_WRITES_BATCH_SIZE', 25))
+
+
+def create_write(collection, record):
+    """
+    Builds an applyWrites create operation for record in collection.
+    """
+    return models.ComAtprotoRepoApplyWrites.Create(collection=collection, value=record)
+
+
+def delete_write(collection, rkey):
+    """
+    Builds an applyWrites delete operation for the record rkey in collection.
+    """
+    return models.ComAtprotoRepoApplyWrites.Delete(collection=collection, rkey=rkey)
+
+
+def apply_writes_in_batches(client, writes, batch_size=APPLY_WRITES_BATCH_SIZE):
+    """
+    Applies repo writes to the logged in account using com.atproto.repo.applyWrites,
+    grouping up to batch_size operations per call.
+
+    applyWrites is atomic, so when the PDS rejects a batch (a 4xx response, e.g. InvalidRequest) each
+    of its writes is retried on its own to find out which ones actually fail. Other errors (timeouts,
+    connection errors, 5xx, rate limits) may come after the batch was committed, so retrying would
+    duplicate its creates: the error is returned for every write of the batch instead.
+
+    Args:
+        client (atproto.Client): A logged in client; writes go to client.me.did.
+        writes (list): Create/Update/Delete operations (see create_write, delete_write).
+        batch_size (int): Maximum operations per applyWrites call.
+
+    Returns:
+        list: One entry per write, in order: the applyWrites result for that write, or the Exception it failed with.
+    """
+    results = []
+    for start in range(0, len(writes), batch_size):
+        batch = writes[start:start + batch_size]
+        try:
+            results.extend(_apply_writes(client, batch))
+        except Exception as batch_error:
+            if not _is_rejected(batch_error):
+                print(f"applyWrites batch of {len(batch)} failed, not retrying: {batch_error}")
+                results.extend([batch_error] * len(batch))
+                continue
+            print(f"applyWrites batch of {len(batch)} was rejected, retrying writes one by one: {batch_error}")
+            for write in batch:
+                try:
+                    results.extend(_apply_writes(client, [write]))
+                except Exception as e:
+                    results.append(e)
+    return results
+
+
+def _is_rejected(error):
+    """
+    Returns whether error is the PDS refusing the request (4xx), so nothing was written. Request
+    timeouts and rate limits are excluded: a retry wouldn't tell the writes apart.
+    """
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status_code, int) and 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+def _apply_writes(client, writes):
+    data = models.ComAtprotoRepoApplyWrites.Data(repo=client.me.did, writes=writes)
+    response = client.com.atproto.repo.apply_writes(data)
+    # Older PDS versions don't return per-write results
+    return response.results if response and response.results else [None] * len(writes)
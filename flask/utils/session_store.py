@@ -0,0 +1,203 @@
+import os
+import json
+import datetime
+import threading
+from collections import OrderedDict
+
+from atproto import SessionEvent
+
+ATPROTO_SESSION_BACKEND = os.environ.get('ATPROTO_SESSION_BACKEND', 'memory')
+ATPROTO_SESSION_FILE = os.environ.get('ATPROTO_SESSION_FILE', '/tmp/skystack_atproto_sessions.json')
+ATPROTO_SESSION_CACHE_SIZE = int(os.environ.get('ATPROTO_SESSION_CACHE_SIZE', 256))
+
+
+class FileSessionBackend:
+    """Stores exported session strings in a local JSON file ({handle: session_string})."""
+
+    def __init__(self, path=ATPROTO_SESSION_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, handle):
+        with self._lock:
+            return self._read().get(handle)
+
+    def set(self, handle, session_string):
+        with self._lock:
+            data = self._read()
+            data[handle] = session_string
+            self._write(data)
+
+    def delete(self, handle):
+        with self._lock:
+            data = self._read()
+            if data.pop(handle, None) is not None:
+                self._write(data)
+
+
+class FirestoreSessionBackend:
+    """Stores exported session strings in the 'atproto_sessions' collection, one document per handle."""
+
+    COLLECTION = "atproto_sessions"
+
+    def __init__(self):
+        self._db = None
+
+    def _collection(self):
+        if self._db is None:
+            from utils.firebase import get_firebase_client
+            self._db = get_firebase_client().db
+        return self._db.collection(self.COLLECTION)
+
+    def get(self, handle):
+        doc = self._collection().document(handle).get()
+        if not doc.exists:
+            return None
+        return (doc.to_dict() or {}).get("session_string")
+
+    def set(self, handle, session_string):
+        self._collection().document(handle).set({
+            "session_string": session_string,
+            "updated_at": datetime.datetime.now(datetime.timezone.utc)
+        })
+
+    def delete(self, handle):
+        self._collection().document(handle).delete()
+
+
+class SessionStore:
+    """
+    Keeps exported atproto session strings (access + refresh JWTs) per handle so that
+    AtprotoUser can resume a session instead of calling createSession every time.
+
+    Lookups hit an in-process LRU first and fall back to an optional shared backend
+    (file or Firestore) that survives across instances.
+    """
+
+    def __init__(self, backend=None, max_size=ATPROTO_SESSION_CACHE_SIZE):
+        self.backend = backend
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, handle):
+        """
+        Returns the stored session string for handle, or None.
+        """
+        with self._lock:
+            session_string = self._cache.get(handle)
+            if session_string is not None:
+                self._cache.move_to_end(handle)
+                return session_string
+
+        if self.backend is None:
+            return None
+        try:
+            session_string = self.backend.get(handle)
+        except Exception as e:
+            print(f"Error reading stored session for '{handle}': {e}")
+            return None
+        if session_string:
+            self._remember(handle, session_string)
+        return session_string
+
+    def set(self, handle, session_string):
+        """
+        Stores session_string for handle in the LRU and the shared backend.
+        """
+        self._remember(handle, session_string)
+        if self.backend is not None:
+            try:
+                self.backend.set(handle, session_string)
+            except Exception as e:
+                print(f"Error persisting session for '{handle}': {e}")
+
+    def delete(self, handle):
+        """
+        Forgets the session for handle (e.g. after it was rejected by the PDS).
+        """
+        with self._lock:
+            self._cache.pop(handle, None)
+        if self.backend is not None:
+            try:
+                self.backend.delete(handle)
+            except Exception as e:
+                print(f"Error deleting stored session for '{handle}': {e}")
+
+    def _remember(self, handle, session_string):
+        with self._lock:
+            self._cache[handle] = session_string
+            self._cache.move_to_end(handle)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Returns the process-wide SessionStore. The shared backend is picked with
+    ATPROTO_SESSION_BACKEND: 'memory' (default, LRU only), 'file' or 'firestore'.
+    """
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                if ATPROTO_SESSION_BACKEND == 'firestore':
+                    backend = FirestoreSessionBackend()
+                elif ATPROTO_SESSION_BACKEND == 'file':
+                    backend = FileSessionBackend()
+                else:
+                    backend = None
+                _session_store = SessionStore(backend)
+    return _session_store
+
+
+def login_with_stored_session(client, login_username, login_password):
+    """
+    Logs an atproto Client in, resuming the stored session for login_username when there is one.
+    The SDK refreshes the access token when it is about to expire; a full createSession login only
+    happens when there is no stored session or it is rejected (e.g. the refresh token expired).
+    New and refreshed sessions are written back to the store.
+
+    Args:
+        client (atproto.Client): The client to log in.
+        login_username (str): The handle used to log in.
+        login_password (str): The password used for a full login.
+
+    Returns:
+        The profile of the logged in account (same as Client.login).
+    """
+    session_store = get_session_store()
+
+    def persist_session(event, session):
+        if event in (SessionEvent.CREATE, SessionEvent.REFRESH):
+            session_store.set(login_username, session.export())
+
+    client.on_session_change(persist_session)
+
+    session_string = session_store.get(login_username)
+    if session_string:
+        try:
+            return client.login(session_string=session_string)
+        except Exception as e:
+            print(f"Stored session for {login_username} rejected, logging in again: {e}")
+            session_store.delete(login_username)
+
+    return client.login(login_username, login_password)
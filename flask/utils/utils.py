@@ -1,10 +1,19 @@
 import os
-import requests
-import feedparser
 import html
-from datetime import datetime, timezone
+from io import BytesIO
+from PIL import Image, ImageOps
 
 from utils.endpoints import RSS_ENDPOINT, SUBSTACK_CDN, OG_CARD_ENDPOINT
+from utils.feed_reader import feed_reader
+from utils.http_cache import get_http_cache
+from utils.post import Post, iso_to_epoch
+from utils.cadence import seed_cadence_stats, update_cadence_stats
+
+# Link cards and avatars are rendered far below this size; the PDS rejects blobs over 1MB for both.
+IMAGE_MAX_DIMENSIONS = (1000, 1000)
+IMAGE_MAX_BYTES = 1000000
+IMAGE_FORMAT = os.environ.get('THUMBNAIL_FORMAT', 'JPEG').upper()
+IMAGE_QUALITY_STEPS = (85, 75, 65, 50, 40)
 
 def is_localhost():
     ENVIRONMENT = os.environ.get('ENVIRONMENT', 'local')
@@ -12,120 +21,79 @@ def is_localhost():
 
 def fetch_json(url):
     """
-    General fetch function to get JSON data from a URL.
+    General fetch function to get JSON data from a URL, through the HTTP response cache
+    (see utils/http_cache.py).
     Raises an exception if the request fails or the response is not JSON.
     """
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    return get_http_cache().get_json(url)
 
 def getLatestRSSItems(url, lastBuildDate):
     """
-    Fetches RSS feed and returns two arrays:
-    1. [[title, subtitle, link, thumbnail_url, post_date], ...] for entries newer than lastBuildDate
+    Streams the RSS feed (see utils/feed_reader.py), stopping at the first entry not newer than
+    lastBuildDate, and returns two arrays:
+    1. [Post(title, subtitle, link, post_date, thumbnail_url), ...] for entries newer than lastBuildDate
     2. [published, ...] for those entries
     """
-    feed_url = url + RSS_ENDPOINT
-    feed = feedparser.parse(feed_url)
-    lastBuildDate = datetime.fromisoformat(lastBuildDate.replace("Z", "+00:00"))
-
     items = []
     post_dates_list = []
 
-    for entry in feed.entries:
-        # entry.published_parsed is a time.struct_time
-        if hasattr(entry, 'published_parsed') and entry.published_parsed:
-            entry_time = datetime(*entry.published_parsed[:6])
-            # Make entry_time timezone-aware if naive
-            if entry_time.tzinfo is None or entry_time.tzinfo.utcoffset(entry_time) is None:
-                entry_time = entry_time.replace(tzinfo=timezone.utc)
-            if lastBuildDate.tzinfo is None or lastBuildDate.tzinfo.utcoffset(lastBuildDate) is None:
-                lastBuildDate = lastBuildDate.replace(tzinfo=timezone.utc)
-            
-            if entry_time > lastBuildDate:
-                post_date = entry_time.isoformat().replace('+00:00', 'Z')
-
-                item = {
-                    "title": html.unescape(entry.title),
-                    "subtitle": html.unescape(entry.summary),
-                    "link": entry.link,
-                    "post_date": post_date
-                }
-                
-                # Set thumbnail_url to None by default
-                thumbnail_url = None
-                # Add thumbnail URL if enclosure exists in links
-                if hasattr(entry, 'links') and entry.links:
-                    for link in entry.links:
-                        if link.get('rel') == 'enclosure' and link.get('type', '').startswith('image/'):
-                            thumbnail_url = normalize_substack_image_url(link['href'], url, isPost=True)
-                            break
-                        
-                item["thumbnail_url"] = thumbnail_url
-                items.append(item)
-                post_dates_list.append(post_date)
-            else:
-                break
+    for entry in feed_reader.read_since(url + RSS_ENDPOINT, iso_to_epoch(lastBuildDate)):
+        entry_time = entry.published.replace(microsecond=0)
+        post_date = entry_time.isoformat().replace('+00:00', 'Z')
+
+        # Thumbnail from the first image enclosure, if any
+        thumbnail_url = normalize_substack_image_url(entry.image_url, url, isPost=True) if entry.image_url else None
+
+        items.append(Post(
+            title=html.unescape(entry.title or ''),
+            subtitle=html.unescape(entry.summary or ''),
+            link=entry.link,
+            post_date=post_date,
+            published_at=entry_time.timestamp(),
+            thumbnail_url=thumbnail_url
+        ))
+        post_dates_list.append(post_date)
 
     return items, post_dates_list
 
-def getPostFreqDetails(numberOfPosts, postFrequency, lastBuildDate, post_dates_list):
+def getPostFreqDetails(numberOfPosts, postFrequency, lastBuildDate, post_dates_list, post_timestamps=None, cadenceStats=None):
     """
-    Calculate post frequency details using an incremental running average.
+    Calculate post frequency details by folding the new posts' intervals into the newsletter's
+    streaming cadence stats (Welford mean/variance, min/max; see utils/cadence.py) in O(1) per post.
     
     Args:
         numberOfPosts (int): Current number of posts
         postFrequency (float): Current average post frequency (in days)
         lastBuildDate (str): '2025-07-04T14:02:13Z' (ISO String with Z suffix)
         post_dates_list (list): List of published times (latest to oldest). eg: ['2025-07-04T14:02:13Z'] (ISO String with Z suffix)
+        post_timestamps (list, optional): The same times as epoch seconds (e.g. Post.published_at), so they aren't parsed again
+        cadenceStats (dict, optional): Stored cadence stats. Seeded from numberOfPosts and postFrequency when missing.
     
     Returns:
-        dict: Updated post frequency details
+        dict: Updated post frequency details (numberOfPosts, lastBuildDate, postFrequency, cadenceStats)
     """
     # Update number of posts
     newNumberOfPosts = numberOfPosts + len(post_dates_list)
+    previousTimestamp = iso_to_epoch(lastBuildDate)
     
     # Update last post time (use the latest from publishedList)
     if post_dates_list:
         lastBuildDate = post_dates_list[0]
     
-    # Calculate new post frequency using incremental running average
-    if len(post_dates_list) > 0:
-        # Convert published times to datetime objects
-        post_dates = [datetime.fromisoformat(pub.replace('Z', '+00:00')) for pub in post_dates_list]
-        
-        # If only one new post, augment with lastBuildDate to calculate frequency
-        if len(post_dates_list) == 1:
-            old_last_build = datetime.fromisoformat(lastBuildDate.replace('Z', '+00:00'))
-            # Insert lastBuildDate at the end to create a time series
-            post_dates.append(old_last_build)
-        
-        # Calculate time differences in days between consecutive posts
-        time_diffs = [
-            (post_dates[i] - post_dates[i+1]).total_seconds() / 86400.0
-            for i in range(len(post_dates)-1)
-        ]
-        
-        # Calculate average frequency from new posts
-        new_posts_avg_frequency = sum(time_diffs) / len(time_diffs)
-        
-        # Calculate incremental running average
-        if postFrequency is not None and numberOfPosts > 0:
-            # Weighted average: (old_freq * old_count + new_freq * new_count) / total_count
-            # For single post case, we use 1 as the weight since we're only adding one new data point
-            weight = len(post_dates_list) if len(post_dates_list) > 1 else 1
-            new_postFrequency = (postFrequency * numberOfPosts + new_posts_avg_frequency * weight) / newNumberOfPosts
-        else:
-            # If no previous data, use the new average
-            new_postFrequency = new_posts_avg_frequency
-    else:
-        # If no new posts, keep the previous frequency
-        new_postFrequency = postFrequency
+    # Every new post adds one interval, including the one since the previous latest post
+    if post_timestamps is None:
+        post_timestamps = [iso_to_epoch(pub) for pub in post_dates_list]
+    stats = cadenceStats or seed_cadence_stats(numberOfPosts, postFrequency)
+    stats = update_cadence_stats(stats, post_timestamps, previousTimestamp)
+    
+    # Keep the previous frequency until there is at least one interval
+    new_postFrequency = stats['mean'] if stats['count'] else postFrequency
     
     return {
         'numberOfPosts': newNumberOfPosts,
         'lastBuildDate': lastBuildDate,
-        'postFrequency': new_postFrequency
+        'postFrequency': new_postFrequency,
+        'cadenceStats': stats
     }
 
 def normalize_substack_image_url(image_url, url, isPost=False):
@@ -141,4 +109,64 @@ def normalize_substack_image_url(image_url, url, isPost=False):
     if image_url.startswith("https://substackcdn.com/") or image_url.startswith("https://www.substackcdn.com/"):
         return image_url
     
-    return SUBSTACK_CDN + image_url
\ No newline at end of file
+    return SUBSTACK_CDN + image_url
+
+def compress_image(image_data, fallback_mime_type=None, max_dimensions=IMAGE_MAX_DIMENSIONS, max_bytes=IMAGE_MAX_BYTES, image_format=IMAGE_FORMAT):
+    """
+    Downsizes and re-encodes an image for upload as a blob.
+    The image is fitted within max_dimensions (keeping aspect ratio), EXIF orientation is applied and all
+    metadata is dropped, then it is encoded as JPEG or WebP, lowering quality (and then size) until it fits
+    under max_bytes.
+    If the bytes can't be decoded or re-encoded (e.g. HEIC, or a truncated download), they are returned unchanged.
+
+    Args:
+        image_data (bytes): The original image bytes.
+        fallback_mime_type (str, optional): MIME type to report when the image is returned unchanged.
+        max_dimensions (tuple): Maximum (width, height).
+        max_bytes (int): Maximum encoded size in bytes.
+        image_format (str): 'JPEG' or 'WEBP'.
+
+    Returns:
+        tuple: (bytes, mime_type)
+    """
+    try:
+        return _encode_image(image_data, max_dimensions, max_bytes, image_format)
+    except Exception:
+        if not fallback_mime_type or not fallback_mime_type.startswith('image/'):
+            fallback_mime_type = 'image/jpeg'
+        return image_data, fallback_mime_type.split(';')[0]
+
+
+def _encode_image(image_data, max_dimensions, max_bytes, image_format):
+    """
+    Does the work of compress_image, raising when the image can't be decoded or encoded.
+    """
+    image = Image.open(BytesIO(image_data))
+    image = ImageOps.exif_transpose(image)
+
+    if image_format == 'WEBP':
+        image = image.convert('RGBA') if image.mode in ('RGBA', 'LA', 'P') else image.convert('RGB')
+        mime_type = 'image/webp'
+    else:
+        image_format = 'JPEG'
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no alpha channel, flatten onto white
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.split()[-1])
+        else:
+            image = image.convert('RGB')
+        mime_type = 'image/jpeg'
+
+    image.thumbnail(max_dimensions, Image.LANCZOS)
+
+    while True:
+        for quality in IMAGE_QUALITY_STEPS:
+            output = BytesIO()
+            # Saving without exif/icc_profile strips the original metadata
+            image.save(output, format=image_format, quality=quality, optimize=True)
+            if output.tell() <= max_bytes:
+                return output.getvalue(), mime_type
+        if min(image.size) <= 64:
+            return output.getvalue(), mime_type
+        image = image.resize((image.width // 2, image.height // 2), Image.LANCZOS)
@@ -0,0 +1,270 @@
+import os
+import time
+import math
+import atexit
+import threading
+from urllib.parse import urlparse
+
+from utils.endpoints import PDS_ENDPOINT
+from utils.utils import is_localhost
+
+# atproto repo write costs, in rate-limit points
+WRITE_POINTS = {"create": 3, "update": 2, "delete": 1}
+
+WRITE_BUDGET_BACKEND = os.environ.get('WRITE_BUDGET_BACKEND', 'memory' if is_localhost() else 'firestore')
+WRITE_BUDGET_ACCOUNT_POINTS_PER_HOUR = int(os.environ.get('WRITE_BUDGET_ACCOUNT_POINTS_PER_HOUR', 5000))
+WRITE_BUDGET_ACCOUNT_POINTS_PER_DAY = int(os.environ.get('WRITE_BUDGET_ACCOUNT_POINTS_PER_DAY', 35000))
+WRITE_BUDGET_PDS_POINTS_PER_HOUR = int(os.environ.get('WRITE_BUDGET_PDS_POINTS_PER_HOUR', 50000))
+# Share of every bucket that backfills can't use, so live builds always have budget left
+WRITE_BUDGET_LIVE_RESERVE = float(os.environ.get('WRITE_BUDGET_LIVE_RESERVE', 0.2))
+# Live write points are summed in-process and applied to the buckets at most this often
+WRITE_BUDGET_FLUSH_SECONDS = float(os.environ.get('WRITE_BUDGET_FLUSH_SECONDS', 10))
+
+
+def refill_bucket(state, capacity, refill_per_second, now):
+    """
+    Returns the bucket's token count at now. A bucket without state starts full.
+    """
+    if not state:
+        return float(capacity)
+    elapsed = max(0.0, now - state.get("updated_at", now))
+    return min(float(capacity), state.get("tokens", capacity) + elapsed * refill_per_second)
+
+
+class MemoryBudgetBackend:
+    """Keeps bucket states in this process (a local stand-in for the Firestore backend)."""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, keys, apply):
+        """
+        Atomically reads the states for keys, calls apply(states) -> (new_states, result) and stores new_states.
+        """
+        with self._lock:
+            new_states, result = apply({key: self._states.get(key) for key in keys})
+            self._states.update(new_states)
+            return result
+
+
+class FirestoreBudgetBackend:
+    """Keeps bucket states in the 'write_budgets' collection (one document per bucket), updated in transactions."""
+
+    COLLECTION = "write_budgets"
+
+    def __init__(self):
+        self._db = None
+
+    def _get_db(self):
+        if self._db is None:
+            from utils.firebase import get_firebase_client
+            self._db = get_firebase_client().db
+        return self._db
+
+    def update(self, keys, apply):
+        from firebase_admin import firestore
+
+        db = self._get_db()
+        refs = {key: db.collection(self.COLLECTION).document(key.replace('/', '_')) for key in keys}
+
+        @firestore.transactional
+        def run(transaction):
+            states = {}
+            for key, ref in refs.items():
+                doc = ref.get(transaction=transaction)
+                states[key] = doc.to_dict() if doc.exists else None
+            new_states, result = apply(states)
+            for key, state in new_states.items():
+                transaction.set(refs[key], state)
+            return result
+
+        return run(db.transaction())
+
+
+class WriteBudget:
+    """
+    Token-bucket accounting of atproto write points, per account (hourly and daily) and per PDS (hourly).
+
+    Live writes (new posts, follows, profile updates) are always allowed and just recorded, so they can
+    push buckets below zero. They are summed in-process and applied in one backend update every
+    WRITE_BUDGET_FLUSH_SECONDS (and before every backfill request), so the hot path doesn't run a
+    transaction on the shared PDS bucket per write. Backfills ask for budget first and may only use what
+    is left above a reserve of WRITE_BUDGET_LIVE_RESERVE of each bucket, so they never starve live builds.
+    """
+
+    def __init__(self, backend=None, pds_host=None, account_points_per_hour=WRITE_BUDGET_ACCOUNT_POINTS_PER_HOUR,
+                 account_points_per_day=WRITE_BUDGET_ACCOUNT_POINTS_PER_DAY,
+                 pds_points_per_hour=WRITE_BUDGET_PDS_POINTS_PER_HOUR, live_reserve=WRITE_BUDGET_LIVE_RESERVE,
+                 flush_seconds=WRITE_BUDGET_FLUSH_SECONDS):
+        self.backend = backend or MemoryBudgetBackend()
+        self.pds_host = pds_host or urlparse(PDS_ENDPOINT).netloc
+        self.account_points_per_hour = account_points_per_hour
+        self.account_points_per_day = account_points_per_day
+        self.pds_points_per_hour = pds_points_per_hour
+        self.live_reserve = live_reserve
+        self.flush_seconds = flush_seconds
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._counters = {"live_points": 0, "backfill_points": 0, "backfill_released": 0, "backfill_deferred": 0}
+        self._counters_lock = threading.Lock()
+
+    def _buckets(self, account):
+        """Returns {key: (capacity, refill_per_second)} for the buckets a write by account draws from."""
+        return {
+            f"account:{account}:hour": (self.account_points_per_hour, self.account_points_per_hour / 3600.0),
+            f"account:{account}:day": (self.account_points_per_day, self.account_points_per_day / 86400.0),
+            f"pds:{self.pds_host}:hour": (self.pds_points_per_hour, self.pds_points_per_hour / 3600.0),
+        }
+
+    def _count(self, counter, amount):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def record_writes(self, account, points):
+        """
+        Records points spent by live writes of account. Never blocks or refuses; the points are applied to
+        the buckets on the next flush.
+
+        Args:
+            account (str): Account handle or DID.
+            points (int): Write points spent (see WRITE_POINTS).
+        """
+        if points <= 0:
+            return
+        with self._pending_lock:
+            self._pending[account] = self._pending.get(account, 0) + points
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+        self._count("live_points", points)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Applies the live write points recorded since the last flush, in one backend update. Points that
+        can't be applied are kept for the next flush.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        buckets = {}
+        for account, points in pending.items():
+            for key, (capacity, rate) in self._buckets(account).items():
+                buckets[key] = (capacity, rate, buckets.get(key, (0, 0, 0))[2] + points)
+
+        def apply(states):
+            now = time.time()
+            return {
+                key: {
+                    "tokens": refill_bucket(states[key], capacity, rate, now) - points,
+                    "updated_at": now
+                }
+                for key, (capacity, rate, points) in buckets.items()
+            }, None
+
+        try:
+            self.backend.update(list(buckets), apply)
+        except Exception as e:
+            print(f"Error recording live write points for {len(pending)} accounts: {e}")
+            with self._pending_lock:
+                for account, points in pending.items():
+                    self._pending[account] = self._pending.get(account, 0) + points
+
+    def acquire_backfill(self, account, points_per_item, max_items, next_step_items=None):
+        """
+        Takes budget for up to max_items backfill writes of points_per_item each.
+
+        Args:
+            account (str): Account handle or DID.
+            points_per_item (int): Write points one item costs.
+            max_items (int): Most items the caller wants to write now.
+            next_step_items (int, optional): Items the next step will want (defaults to max_items).
+
+        Returns:
+            tuple: (items, next_delay_seconds) - how many items may be written now, and how long until
+                   budget for next_step_items is expected to be available again.
+        """
+        self.flush()
+        next_step_items = max_items if next_step_items is None else next_step_items
+        buckets = self._buckets(account)
+
+        def apply(states):
+            now = time.time()
+            tokens = {key: refill_bucket(states[key], capacity, rate, now) for key, (capacity, rate) in buckets.items()}
+            available = min(tokens[key] - capacity * self.live_reserve for key, (capacity, _) in buckets.items())
+            items = max(0, min(max_items, int(available // points_per_item)))
+            spent = items * points_per_item
+
+            next_delay = 0.0
+            for key, (capacity, rate) in buckets.items():
+                missing = next_step_items * points_per_item + capacity * self.live_reserve - (tokens[key] - spent)
+                if missing > 0:
+                    next_delay = max(next_delay, missing / rate)
+
+            new_states = {key: {"tokens": tokens[key] - spent, "updated_at": now} for key in buckets} if spent else {}
+            return new_states, (items, math.ceil(next_delay))
+
+        items, next_delay = self.backend.update(list(buckets), apply)
+        self._count("backfill_points", items * points_per_item)
+        if items == 0:
+            self._count("backfill_deferred", 1)
+        return items, next_delay
+
+    def release_backfill(self, account, points):
+        """
+        Returns points taken by acquire_backfill that weren't spent (fewer items to write than granted,
+        or failed writes). Buckets are refilled up to their capacity.
+
+        Args:
+            account (str): Account handle or DID.
+            points (int): Unspent write points.
+        """
+        if points <= 0:
+            return
+        buckets = self._buckets(account)
+
+        def apply(states):
+            now = time.time()
+            return {
+                key: {
+                    "tokens": min(float(capacity), refill_bucket(states[key], capacity, rate, now) + points),
+                    "updated_at": now
+                }
+                for key, (capacity, rate) in buckets.items()
+            }, None
+
+        try:
+            self.backend.update(list(buckets), apply)
+            self._count("backfill_released", points)
+        except Exception as e:
+            print(f"Error releasing {points} write points for {account}: {e}")
+
+    def get_stats(self):
+        """
+        Returns points recorded/granted/released by this process.
+        """
+        with self._counters_lock:
+            return dict(self._counters)
+
+
+_write_budget = None
+_write_budget_lock = threading.Lock()
+
+
+def get_write_budget():
+    """
+    Returns the process-wide WriteBudget. The backend is picked with WRITE_BUDGET_BACKEND:
+    'firestore' (shared by every instance; the default outside ENVIRONMENT=local) or 'memory' (per process).
+    """
+    global _write_budget
+    if _write_budget is None:
+        with _write_budget_lock:
+            if _write_budget is None:
+                backend = FirestoreBudgetBackend() if WRITE_BUDGET_BACKEND == 'firestore' else MemoryBudgetBackend()
+                _write_budget = WriteBudget(backend)
+                atexit.register(_write_budget.flush)
+    return _write_budget